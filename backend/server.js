@@ -2,7 +2,9 @@ const express = require('express');
 const cors = require('cors');
 const axios = require('axios');
 const cheerio = require('cheerio');
-const { PythonShell } = require('python-shell');
+const { spawn } = require('child_process');
+const path = require('path');
+const readline = require('readline');
 const rateLimit = require('express-rate-limit');
 const NodeCache = require('node-cache');
 require('dotenv').config();
@@ -30,29 +32,158 @@ const HOST = process.env.LLM_HOST || "";
 const PORT_LLM = process.env.LLM_PORT || "1";
 const API_KEY = process.env.LLM_API_KEY || "";
 
+// Long-lived Python worker (learning-plan-recommender/src/recommender/worker.py).
+// Requests and responses are newline-delimited JSON matched by id, so one process
+// keeps the LLM client, response cache and catalog index warm for every request.
+class PythonWorker {
+  constructor({ pythonPath, cwd, args = [], timeoutMs = 300000 }) {
+    this.pythonPath = pythonPath;
+    this.cwd = cwd;
+    this.args = args;
+    this.timeoutMs = timeoutMs;
+    this.nextId = 1;
+    this.pending = new Map();
+    this.process = null;
+  }
+
+  start() {
+    const proc = spawn(this.pythonPath, ['-m', 'src.recommender.worker', ...this.args], {
+      cwd: this.cwd,
+      stdio: ['pipe', 'pipe', 'inherit']
+    });
+    readline.createInterface({ input: proc.stdout }).on('line', line => this.handleLine(line));
+    proc.on('error', err => console.error('Python worker error:', err));
+    // EPIPE when the worker dies before a write lands; without a handler it would crash the server
+    proc.stdin.on('error', err => {
+      console.error('Python worker stdin error:', err);
+      this.rejectAll(new Error(`Python worker stdin error: ${err.message}`));
+    });
+    proc.on('exit', (code, signal) => {
+      console.error(`Python worker exited (code ${code}, signal ${signal})`);
+      if (this.process === proc) {
+        this.process = null;  // restarted on the next request
+      }
+      this.rejectAll(new Error('Python worker exited'));
+    });
+    this.process = proc;
+  }
+
+  rejectAll(error) {
+    for (const [id, entry] of this.pending) {
+      clearTimeout(entry.timer);
+      entry.reject(error);
+      this.pending.delete(id);
+    }
+  }
+
+  handleLine(line) {
+    let message;
+    try {
+      message = JSON.parse(line);
+    } catch (err) {
+      console.error('Invalid line from Python worker:', line);
+      return;
+    }
+    const entry = this.pending.get(message.id);
+    if (!entry) {
+      return;  // the ready event, or a request that already timed out
+    }
+    if (message.chunk !== undefined) {
+      if (entry.onChunk) {
+        entry.onChunk(message.chunk);
+      }
+      return;
+    }
+    clearTimeout(entry.timer);
+    this.pending.delete(message.id);
+    if (message.error) {
+      const error = new Error(message.error.message);
+      error.type = message.error.type;
+      entry.reject(error);
+    } else {
+      entry.resolve(message.result);
+    }
+  }
+
+  request(method, params, { onChunk } = {}) {
+    if (!this.process) {
+      this.start();
+    }
+    const id = this.nextId++;
+    return new Promise((resolve, reject) => {
+      const timer = setTimeout(() => {
+        this.pending.delete(id);
+        this.cancel(id);  // otherwise the worker keeps generating the abandoned plan
+        reject(new Error(`Python worker request ${id} timed out`));
+      }, this.timeoutMs);
+      this.pending.set(id, { resolve, reject, timer, onChunk });
+      this.send({ id, method, params }, err => {
+        if (err && this.pending.has(id)) {
+          clearTimeout(timer);
+          this.pending.delete(id);
+          reject(new Error(`Failed to send request to Python worker: ${err.message}`));
+        }
+      });
+    });
+  }
+
+  // Ask the worker to stop a request; its response (a "Cancelled" error) is ignored
+  cancel(id) {
+    this.send({ id: this.nextId++, method: 'cancel', params: { id } });
+  }
+
+  send(message, callback = () => {}) {
+    const stdin = this.process && this.process.stdin;
+    if (!stdin || !stdin.writable) {
+      callback(new Error('Python worker is not running'));
+      return;
+    }
+    stdin.write(JSON.stringify(message) + '\n', callback);
+  }
+}
+
+const pythonWorker = new PythonWorker({
+  pythonPath: process.env.PYTHON_PATH || 'python3',
+  cwd: process.env.RECOMMENDER_DIR || path.join(__dirname, '../learning-plan-recommender'),
+  args: ['--host', HOST, '--port', PORT_LLM, '--api-key', API_KEY]
+});
+
 // LLM endpoint
 app.post('/api/llm', async (req, res) => {
   const { message, history } = req.body;
   
   try {
-    // Run Python script with message
-    let options = {
-      mode: 'text',
-      pythonPath: 'python3',
-      scriptPath: '../LLM-Local-Deployment/',
-      args: [HOST, PORT_LLM, API_KEY, message, JSON.stringify(history)]
-    };
-    
-    PythonShell.run('llm_wrapper.py', options).then(results => {
-      const response = JSON.parse(results[0]);
-      res.json(response);
-    }).catch(err => {
-      console.error('Python script error:', err);
-      res.status(500).json({ error: 'Failed to process LLM request', details: err.message });
-    });
+    const response = await pythonWorker.request('query_llm', { message, history: history || [] });
+    res.json(response);
+  } catch (error) {
+    console.error('Python worker error:', error);
+    res.status(500).json({ error: 'Failed to process LLM request', details: error.message });
+  }
+});
+
+// Learning plan endpoint; ?stream=1 sends the plan as newline-delimited JSON chunks
+app.post('/api/plan', async (req, res) => {
+  const { student, targetCourse, generator } = req.body;
+  const params = { student, target_course: targetCourse, generator: generator || 'rag' };
+  
+  try {
+    if (req.query.stream) {
+      res.setHeader('Content-Type', 'application/x-ndjson');
+      const result = await pythonWorker.request('generate_plan', { ...params, stream: true }, {
+        onChunk: chunk => res.write(JSON.stringify({ chunk }) + '\n')
+      });
+      res.end(JSON.stringify({ done: true, priorCourses: result.prior_courses }) + '\n');
+    } else {
+      const result = await pythonWorker.request('generate_plan', params);
+      res.json({ plan: result.plan, priorCourses: result.prior_courses });
+    }
   } catch (error) {
-    console.error('Error:', error);
-    res.status(500).json({ error: 'Failed to process LLM request' });
+    console.error('Python worker error:', error);
+    if (res.headersSent) {
+      res.end(JSON.stringify({ error: error.message }) + '\n');
+    } else {
+      res.status(500).json({ error: 'Failed to generate learning plan', details: error.message });
+    }
   }
 });
 
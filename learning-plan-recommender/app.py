@@ -1,16 +1,61 @@
+import time
+STARTED = time.perf_counter()  # for --startup-report
+
+import argparse
+import importlib
 import os
 from dotenv import load_dotenv
-from src.recommender.plan_generator import LearningPlanGenerator as BasicPlanGenerator
-from src.recommender.plan_generator_rag import LearningPlanGenerator as RagPlanGenerator
 from src.models.student import Student
 from src.models.course_database import CourseDatabase
+from src.models.prerequisite_graph import structural_plan
+from src.models.course_name_index import CourseNameIndex
+from src.recommender.batch_runner import BatchPlanRunner
+from src.recommender.lazy_import import preload_modules
+from src.recommender.telemetry import METRICS, serve_metrics
+from config.config import Config
+
+IMPORTS_DONE = time.perf_counter()
 
 # Load environment variables
 load_dotenv(dotenv_path='../backend/.env')
 
-def main():
+# Plan generator modules by name: four LLM calls without / with catalog retrieval, or two with retrieval
+PLAN_GENERATORS = {
+    "basic": "src.recommender.plan_generator",
+    "rag": "src.recommender.plan_generator_rag",
+    "fast": "src.recommender.plan_generator_fast",
+}
+
+def create_plan_generator(kind=None):
+    """
+    Create the plan generator used by the CLI.
+    
+    The generator modules (and through them openai and PyMuPDF) are imported here
+    rather than at startup, so --help and --prerequisites-only stay fast. The RAG
+    and fast generators load the catalog in the background (Config.CATALOG_LOAD_MODE).
+    
+    Args:
+        kind: "basic", "rag" or "fast" (defaults to Config.PLAN_GENERATOR)
+    """
+    generator_module = importlib.import_module(PLAN_GENERATORS[kind or Config.PLAN_GENERATOR])
+    from src.recommender.llm_router import parse_endpoints
+    return generator_module.LearningPlanGenerator(
+        host=os.getenv("LLM_HOST"),
+        port=os.getenv("LLM_PORT"),
+        api_key=os.getenv("LLM_API_KEY"),
+        # Several comma-separated host:port servers are load-balanced by the generator's router
+        endpoints=parse_endpoints(os.getenv("LLM_ENDPOINTS", ""), os.getenv("LLM_API_KEY")) or None
+    )
+
+def main(prerequisites_only=False, trace_file=None, generator=None):
     print("\n===== Learning Plan Recommender System =====\n")
     
+    # Start loading the catalog and the LLM client library while the user types
+    plan_generator = None
+    if not prerequisites_only:
+        preload_modules("openai")
+        plan_generator = create_plan_generator(generator)
+    
     # Get student information
     print("Please enter your academic background:")
     prior_courses = input("Prior courses taken (comma-separated): ").strip()
@@ -29,7 +74,7 @@ def main():
     
     # Create student object
     student = Student(
-        prior_courses=prior_courses.split(",") if prior_courses else [],
+        prior_courses=[course.strip() for course in prior_courses.split(",") if course.strip()],
         department=department,
         degree_level=degree_level
     )
@@ -40,26 +85,101 @@ def main():
     # Initialize course database with example courses
     course_db = CourseDatabase()
     
-    # Initialize learning plan generator
-    # plan_generator = BasicPlanGenerator(
-    #     host=os.getenv("LLM_HOST"),
-    #     port=os.getenv("LLM_PORT"),
-    #     api_key=os.getenv("LLM_API_KEY")
-    # )
+    # Prerequisite sequencing is answered from the catalog graph, no LLM needed
+    if prerequisites_only:
+        student.prior_courses = CourseNameIndex.from_course_dbs(course_db).canonicalize(student.prior_courses)
+        plan = structural_plan(student, target_course, course_db)
+        print("\n" + (plan or f"{target_course} was not found in the course catalog."))
+        return
     
-    plan_generator = RagPlanGenerator(
-        host=os.getenv("LLM_HOST"),
-        port=os.getenv("LLM_PORT"),
-        api_key=os.getenv("LLM_API_KEY")
-    )
+    # Map free-text prior courses to catalog codes so equivalent profiles produce the same prompts
+    name_index = CourseNameIndex.from_course_dbs(course_db, getattr(plan_generator, "course_store", None))
+    student.prior_courses = name_index.canonicalize(student.prior_courses)
     
-    # Generate learning plan
+    # Generate learning plan, streaming the final plan to the terminal as it arrives
     print("\nGenerating your personalized learning plan...")
-    learning_plan = plan_generator.generate_plan(student, target_course, course_db) # RAG
-   
-    # Display the learning plan
-    print("\n===== Your Personalized Learning Plan =====\n")
-    print(learning_plan)
+    header_printed = False
+    for chunk in plan_generator.generate_plan_stream(student, target_course, course_db):
+        if not header_printed:
+            # Display the learning plan
+            print("\n===== Your Personalized Learning Plan =====\n")
+            header_printed = True
+        print(chunk, end="", flush=True)
+    print()
+    
+    if trace_file and plan_generator.last_trace is not None:
+        with open(trace_file, "w", encoding="utf-8") as f:
+            f.write(plan_generator.last_trace.to_json())
+        print(f"\nTrace written to {trace_file}")
+
+def run_batch(args):
+    """Generate plans for every student in a CSV/JSONL file and write them to a JSONL file."""
+    plan_generator = create_plan_generator(args.generator)
+    course_db = CourseDatabase()
+    name_index = CourseNameIndex.from_course_dbs(course_db, getattr(plan_generator, "course_store", None))
+    runner = BatchPlanRunner(plan_generator, course_db, workers=args.workers, name_index=name_index)
+    
+    print(f"\nGenerating learning plans for {args.batch} with {args.workers} workers...")
+    summary = runner.run(args.batch, args.output)
+    
+    print("\n===== Batch Summary =====\n")
+    print(f"Plans written: {summary['ok']} ok, {summary['errors']} errors, {summary['skipped']} already done")
+    print(f"Throughput: {summary['throughput_per_second']:.2f} plans/s over {summary['elapsed_seconds']:.1f}s")
+    print(f"Latency p50/p95/p99: {summary['latency_p50']:.2f}s / {summary['latency_p95']:.2f}s / {summary['latency_p99']:.2f}s")
+
+def startup_report():
+    """Print how long each part of startup takes, without prompting or calling the LLM."""
+    phases = [("app imports", IMPORTS_DONE - STARTED)]
+    
+    started = time.perf_counter()
+    plan_generator = create_plan_generator()
+    phases.append(("create plan generator", time.perf_counter() - started))
+    
+    started = time.perf_counter()
+    load_seconds = plan_generator.wait_for_catalog() if hasattr(plan_generator, "wait_for_catalog") else None
+    phases.append(("wait for catalog", time.perf_counter() - started))
+    if load_seconds is not None:
+        phases.append(("  catalog load (text, index, course store)", load_seconds))
+    
+    started = time.perf_counter()
+    import openai  # noqa: F401  (paid on the first LLM request otherwise)
+    phases.append(("import openai", time.perf_counter() - started))
+    phases.append(("total", time.perf_counter() - STARTED))
+    
+    print("\n===== Startup Report =====\n")
+    for name, seconds in phases:
+        print(f"{name:<44} {seconds * 1000:>9.1f} ms")
+    print("\nFor per-module import times run: python -X importtime app.py --startup-report")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Learning Plan Recommender System")
+    parser.add_argument("--batch", metavar="INPUT", help="CSV or JSONL file of students and target courses")
+    parser.add_argument("--output", default="learning_plans.jsonl", help="JSONL file results are appended to (also used to resume)")
+    parser.add_argument("--generator", choices=sorted(PLAN_GENERATORS),
+                        help="Plan generator (default: Config.PLAN_GENERATOR); fast makes two LLM calls instead of four")
+    parser.add_argument("--prerequisites-only", action="store_true", help="Only list the missing prerequisites in order, without calling the LLM")
+    parser.add_argument("--workers", type=int, default=4, help="Number of plans generated concurrently")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on this port (/metrics and /metrics.json)")
+    parser.add_argument("--metrics-dump", metavar="PATH", help="Write the metrics as JSON to this file on exit")
+    parser.add_argument("--trace-file", metavar="PATH", help="Write the per-stage trace of the generated plan as JSON")
+    parser.add_argument("--profile", action="store_true", help="Capture a cProfile of every plan into Config.PROFILE_DIR")
+    parser.add_argument("--startup-report", action="store_true", help="Report import and catalog loading times, then exit")
+    return parser.parse_args()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    args = parse_args()
+    if args.profile:
+        Config.PROFILE_SAMPLE_RATE = 1.0
+    if args.metrics_port:
+        serve_metrics(args.metrics_port)
+        print(f"Serving metrics on http://127.0.0.1:{args.metrics_port}/metrics")
+    try:
+        if args.startup_report:
+            startup_report()
+        elif args.batch:
+            run_batch(args)
+        else:
+            main(prerequisites_only=args.prerequisites_only, trace_file=args.trace_file, generator=args.generator)
+    finally:
+        if args.metrics_dump:
+            METRICS.dump(args.metrics_dump)
\ No newline at end of file
@@ -0,0 +1,320 @@
+"""
+Offline micro-benchmarks for the CPU-side hot paths.
+
+Run from the learning-plan-recommender directory:
+
+    python -m benchmarks.run_benchmarks --output bench.json
+    python -m benchmarks.run_benchmarks --baseline bench.json   # exits 1 on regressions
+
+No LLM or network access is needed: the catalog is a synthetic PDF and no
+LLM calls are made. The startup.* benchmarks time imports in fresh interpreters.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic_catalog import gap_analysis_text, synthetic_courses, write_catalog_pdf
+from src.models.catalog_course_database import CatalogCourseDatabase
+from src.models.course_database import CourseDatabase
+from src.models.course_name_index import CourseNameIndex
+from src.models.prerequisite_graph import PrerequisiteGraph
+from src.models.student import Student
+from src.recommender.catalog_registry import CatalogRegistry
+from src.recommender.plan_generator_rag import LearningPlanGenerator
+from src.recommender.response_cache import ResponseCache
+
+SEARCH_QUERIES = ["machine learning", "linear algebra", "CSCI 356", "neural networks", "Deep Learning", "databases"]
+
+
+def time_call(func, repeat=7, min_seconds=0.05):
+    """
+    Time func and return per-call statistics in microseconds.
+
+    Each of the repeat samples runs func enough times to take at least
+    min_seconds, so fast functions are not dominated by timer resolution.
+    """
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_seconds or number >= 1 << 20:
+            break
+        number *= 2 if elapsed == 0 else max(2, int(min_seconds / elapsed) + 1)
+
+    samples = [elapsed / number]
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - started) / number)
+
+    samples.sort()
+    return {
+        "median_us": statistics.median(samples) * 1e6,
+        "min_us": samples[0] * 1e6,
+        "max_us": samples[-1] * 1e6,
+        "calls_per_sample": number,
+        "samples": len(samples),
+    }
+
+
+def time_once(func, repeat=3):
+    """Time a slow, stateful operation (setup runs inside func) a few times."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return {
+        "median_us": statistics.median(samples) * 1e6,
+        "min_us": samples[0] * 1e6,
+        "max_us": samples[-1] * 1e6,
+        "calls_per_sample": 1,
+        "samples": len(samples),
+    }
+
+
+def benchmark_catalog(work_dir, pages, results):
+    """Catalog loading, retrieval and prompt building on a synthetic catalog PDF."""
+    catalog_path = os.path.join(work_dir, "catalog.pdf")
+    write_catalog_pdf(catalog_path, pages=pages)
+    cache_dir = os.path.join(work_dir, "cache")
+
+    generator = LearningPlanGenerator(
+        "localhost", "5000", "benchmark", catalog_path=catalog_path, cache_dir=cache_dir,
+        response_cache=ResponseCache(),
+    )
+
+    def load_cold():
+        shutil.rmtree(generator.cache_dir, ignore_errors=True)
+        generator._load_catalog_text()
+
+    results[f"catalog.load_text.cold.{pages}p"] = time_once(load_cold)
+    generator._load_catalog_text()  # repopulate the text cache
+    results[f"catalog.load_text.warm.{pages}p"] = time_call(generator._load_catalog_text, repeat=5)
+
+    for query in SEARCH_QUERIES[:3]:
+        results[f"catalog.search.bm25.{query}"] = time_call(lambda: generator.search_catalog(query))
+    results["catalog.search_batch.bm25"] = time_call(lambda: generator.search_catalog_batch(SEARCH_QUERIES))
+
+    gap_analysis = gap_analysis_text()
+    results["catalog.retrieve_information"] = time_call(
+        lambda: generator._retrieve_catalog_information(gap_analysis, "Deep Learning")
+    )
+
+    student = Student(
+        prior_courses=["CSCI 256: Programming in Python", "Calculus I", "Intro to Statistics"],
+        department="Computer Science", degree_level="Graduate",
+    )
+    course_db = CourseDatabase()
+    long_stage_output = gap_analysis * 20  # over budget, so the compaction path is exercised
+    catalog_data = generator._retrieve_catalog_information(gap_analysis, "Deep Learning")
+    prompts = {
+        "knowledge_assessment": lambda: generator._create_knowledge_assessment_prompt(student, "Deep Learning"),
+        "gap_analysis": lambda: generator._create_gap_analysis_prompt(student, "Deep Learning", gap_analysis, course_db),
+        "gap_analysis.over_budget": lambda: generator._create_gap_analysis_prompt(student, "Deep Learning", long_stage_output, course_db),
+        "course_selection": lambda: generator._create_course_selection_prompt(student, "Deep Learning", gap_analysis, gap_analysis, course_db),
+        "rag_course_selection": lambda: generator._create_rag_course_selection_prompt(
+            student, "Deep Learning", gap_analysis, gap_analysis, course_db, catalog_data
+        ),
+        "final_plan": lambda: generator._create_final_plan_prompt(student, "Deep Learning", gap_analysis, gap_analysis, gap_analysis),
+        "final_plan.over_budget": lambda: generator._create_final_plan_prompt(
+            student, "Deep Learning", long_stage_output, long_stage_output, long_stage_output
+        ),
+    }
+    for name, build in prompts.items():
+        results[f"prompt.{name}"] = time_call(build)
+
+    generator.course_store.close()
+
+
+def benchmark_course_database(course_count, results):
+    """Course lookups, prerequisite planning and name resolution over a large course list."""
+    courses = synthetic_courses(course_count, seed=1)
+    course_db = CourseDatabase(courses)
+    codes = [course["code"] for course in courses]
+    probe_codes = codes[::max(1, course_count // 1000)]
+
+    results[f"course_db.get_course_by_code.{course_count}"] = time_call(
+        lambda: [course_db.get_course_by_code(code.lower()) for code in probe_codes]
+    )
+    results[f"course_db.get_course_by_code.miss.{course_count}"] = time_call(lambda: course_db.get_course_by_code("NOPE 999"))
+    results[f"course_db.get_courses_as_text.{course_count}"] = time_call(course_db.get_courses_as_text)
+    results[f"course_db.find_courses.{course_count}"] = time_call(lambda: course_db.find_courses("CSCI", 400))
+    results[f"course_db.build.{course_count}"] = time_once(lambda: CourseDatabase(courses))
+
+    results[f"prerequisite_graph.build.{course_count}"] = time_once(lambda: PrerequisiteGraph(courses))
+    graph = course_db.get_prerequisite_graph()
+    target, completed = codes[-1], codes[:50]
+    results[f"prerequisite_graph.missing.{course_count}"] = time_call(lambda: graph.missing_prerequisites(target, completed))
+
+    name_index = CourseNameIndex(courses)
+    names = [course["name"].lower().replace("introduction", "intro") for course in courses[:200]]
+    results[f"course_name_index.resolve_uncached.{course_count}"] = time_call(
+        lambda: (name_index.clear_cache(), name_index.resolve_many(names)), repeat=3
+    )
+    results[f"course_name_index.resolve_memoized.{course_count}"] = time_call(lambda: name_index.resolve_many(names))
+
+    store = CatalogCourseDatabase()
+    store.add_courses(courses)
+    results[f"catalog_store.get_course_by_code.{course_count}"] = time_call(
+        lambda: [store.get_course_by_code(code) for code in probe_codes]
+    )
+    store.close()
+
+
+def benchmark_catalog_registry(work_dir, pages, results, catalogs=4):
+    """Indexing a directory of catalog PDFs: full build, no-op refresh and re-indexing one updated catalog."""
+    catalog_dir = os.path.join(work_dir, "catalogs")
+    os.makedirs(catalog_dir, exist_ok=True)
+    for seed in range(catalogs):
+        write_catalog_pdf(os.path.join(catalog_dir, f"college{seed}_2025.pdf"), pages=pages, seed=seed)
+
+    def build(processes):
+        cache_dir = os.path.join(work_dir, f"registry_cache_{processes}")
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        registry = CatalogRegistry(catalog_dir, cache_dir, processes=processes)
+        registry.refresh()
+        return registry
+
+    results[f"catalog_registry.build.serial.{catalogs}x{pages}p"] = time_once(lambda: build(1), repeat=1)
+    results[f"catalog_registry.build.parallel.{catalogs}x{pages}p"] = time_once(lambda: build(os.cpu_count() or 1), repeat=1)
+    registry = build(os.cpu_count() or 1)
+    results[f"catalog_registry.refresh.unchanged.{catalogs}x{pages}p"] = time_call(registry.refresh, repeat=3)
+
+    # New editions are written up front so only the refresh itself is timed
+    editions = []
+    for seed in range(catalogs, catalogs + 3):
+        editions.append(os.path.join(work_dir, f"edition{seed}.pdf"))
+        write_catalog_pdf(editions[-1], pages=pages, seed=seed)
+    editions = iter(editions)
+    results[f"catalog_registry.refresh.one_updated.{catalogs}x{pages}p"] = time_once(
+        lambda: (shutil.copyfile(next(editions), os.path.join(catalog_dir, "college0_2025.pdf")), registry.refresh())
+    )
+    results["catalog_registry.search.filtered"] = time_call(
+        lambda: registry.search("machine learning", catalogs="college1", years=2025)
+    )
+
+
+def benchmark_startup(work_dir, results):
+    """Fresh-interpreter import times and warm catalog loading, i.e. the fixed cost of every launch."""
+    project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    def run_python(code):
+        subprocess.run([sys.executable, "-c", code], cwd=project_dir, check=True, capture_output=True)
+
+    results["startup.python"] = time_once(lambda: run_python("pass"), repeat=5)
+    results["startup.import_app"] = time_once(lambda: run_python("import app"), repeat=5)
+    results["startup.import_plan_generator_rag"] = time_once(
+        lambda: run_python("import src.recommender.plan_generator_rag"), repeat=5
+    )
+
+    catalog_path = os.path.join(work_dir, "startup_catalog.pdf")
+    write_catalog_pdf(catalog_path, pages=20)
+    cache_dir = os.path.join(work_dir, "startup_cache")
+
+    def create_generator():
+        generator = LearningPlanGenerator(
+            "localhost", "5000", "benchmark", catalog_path=catalog_path, cache_dir=cache_dir,
+            response_cache=ResponseCache(), catalog_load="eager",
+        )
+        generator.course_store.close()
+
+    create_generator()  # populate the text, index and course store caches
+    results["startup.catalog_load.warm"] = time_once(create_generator, repeat=5)
+
+
+def compare_results(results, baseline, tolerance):
+    """
+    Compare median timings against a baseline run.
+
+    Args:
+        results: Benchmark name -> stats from this run
+        baseline: Benchmark name -> stats from the baseline run
+        tolerance: Allowed slowdown, e.g. 0.25 for 25%
+
+    Returns:
+        list: (name, baseline_us, current_us, ratio, regressed) for benchmarks present in both runs
+    """
+    rows = []
+    for name in sorted(results):
+        if name not in baseline:
+            continue
+        baseline_us = baseline[name]["median_us"]
+        current_us = results[name]["median_us"]
+        ratio = current_us / baseline_us if baseline_us else float("inf")
+        rows.append((name, baseline_us, current_us, ratio, ratio > 1 + tolerance))
+    return rows
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for catalog retrieval and prompt building")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed median slowdown before failing (0.25 = 25%%)")
+    parser.add_argument("--pages", type=int, default=300, help="Pages in the synthetic catalog PDF")
+    parser.add_argument("--courses", type=int, default=20000, help="Courses in the synthetic course database")
+    parser.add_argument("--quick", action="store_true", help="Small inputs for a fast smoke run")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.quick:
+        args.pages, args.courses = 20, 1000
+
+    results = {}
+    work_dir = tempfile.mkdtemp(prefix="recommender-bench-")
+    try:
+        benchmark_catalog(work_dir, args.pages, results)
+        benchmark_catalog_registry(work_dir, args.pages, results)
+        benchmark_course_database(args.courses, results)
+        benchmark_startup(work_dir, results)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "pages": args.pages,
+            "courses": args.courses,
+        },
+        "results": results,
+    }
+    for name, stats in results.items():
+        print(f"{name:<60} {stats['median_us']:>14.1f} us")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        rows = compare_results(results, baseline, args.tolerance)
+        print(f"\n{'benchmark':<60} {'baseline':>12} {'current':>12} {'ratio':>7}")
+        for name, baseline_us, current_us, ratio, regressed in rows:
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{name:<60} {baseline_us:>12.1f} {current_us:>12.1f} {ratio:>7.2f}{flag}")
+        regressions = [row for row in rows if row[4]]
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) slower than baseline by more than {args.tolerance:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import random
+
+import fitz  # PyMuPDF, used to write the synthetic catalog PDF
+
+SUBJECTS = ["CSCI", "ENGR", "MATH", "STAT", "PHYS", "EE", "ME", "CHE", "CE", "BMED"]
+TOPICS = [
+    "Machine Learning", "Deep Learning", "Data Structures", "Algorithms", "Linear Algebra",
+    "Probability", "Statistics", "Databases", "Operating Systems", "Computer Networks",
+    "Computer Vision", "Natural Language Processing", "Signal Processing", "Control Systems",
+    "Thermodynamics", "Fluid Mechanics", "Circuit Analysis", "Numerical Methods",
+    "Optimization", "Information Retrieval", "Security", "Distributed Systems",
+]
+LEVELS = ["Introduction to", "Fundamentals of", "Advanced", "Topics in", "Applied", "Seminar in"]
+FILLER = (
+    "Students study the theory and practice of {topic}, including problem formulation, "
+    "analysis, implementation and evaluation. Emphasis on {other} and on written and oral "
+    "communication of technical results. Laboratory and project work required."
+)
+
+GAP_ANALYSIS = """
+**Knowledge Gaps for {target}**
+
+1. Mathematical prerequisites: the student has not taken Linear Algebra or Probability,
+   which the course uses for backpropagation and loss functions. MATH 240 and STAT 310 cover these.
+2. Programming skills and frameworks: some Python programming, but no data structures
+   course (CSCI 356) and no experience with numerical libraries.
+3. Theoretical foundations: machine learning basics (CSCI 632) are missing; neural networks
+   and optimization are introduced there. Statistics background is limited.
+4. Practical experience: no projects in computer vision or natural language processing.
+   Recommend a course in data science before deep learning.
+"""
+
+
+def synthetic_courses(count, seed=0):
+    """
+    Generate course dicts shaped like CourseDatabase entries.
+
+    Prerequisites only point at lower-numbered courses, so the graph is acyclic
+    and chains are several levels deep like a real catalog.
+    """
+    rng = random.Random(seed)
+    courses = []
+    for i in range(count):
+        subject = SUBJECTS[i % len(SUBJECTS)]
+        number = 100 + (i // len(SUBJECTS)) % 900
+        suffix = "" if i < len(SUBJECTS) * 900 else chr(ord("A") + i // (len(SUBJECTS) * 900) - 1)
+        topic = rng.choice(TOPICS)
+        prerequisites = []
+        if i >= len(SUBJECTS):
+            prerequisites = [courses[rng.randrange(max(0, i - 200), i)]["code"] for _ in range(rng.randint(0, 3))]
+        courses.append({
+            "code": f"{subject} {number}{suffix}",
+            "name": f"{rng.choice(LEVELS)} {topic}",
+            "description": FILLER.format(topic=topic.lower(), other=rng.choice(TOPICS).lower()),
+            "prerequisites": sorted(set(prerequisites)),
+        })
+    return courses
+
+
+def catalog_entry(course):
+    """Render a course the way the engineering catalog does."""
+    entry = f"{course['code']}. {course['name']}. (3 hrs.)\n{course['description']}\n"
+    if course["prerequisites"]:
+        entry += f"Prerequisite: {', '.join(course['prerequisites'])}.\n"
+    return entry
+
+
+def write_catalog_pdf(path, pages=300, courses_per_page=8, seed=0):
+    """
+    Write a synthetic multi-page catalog PDF.
+
+    Returns:
+        list: The courses written, in page order
+    """
+    courses = synthetic_courses(pages * courses_per_page, seed)
+    document = fitz.open()
+    for page_number in range(pages):
+        page = document.new_page()
+        page_courses = courses[page_number * courses_per_page:(page_number + 1) * courses_per_page]
+        text = f"School of Engineering - Course Descriptions - page {page_number + 1}\n\n"
+        text += "\n".join(catalog_entry(course) for course in page_courses)
+        page.insert_textbox(fitz.Rect(36, 36, 576, 756), text, fontsize=7)
+    document.save(path)
+    document.close()
+    return courses
+
+
+def gap_analysis_text(target_course="Deep Learning"):
+    """A gap analysis shaped like real LLM output, used as retrieval input."""
+    return GAP_ANALYSIS.format(target=target_course)
@@ -13,4 +13,33 @@ class Config:
     DEFAULT_COURSE = "Deep Learning"
     MAX_HISTORY_LENGTH = 10  # Maximum number of messages to keep in history for LLM queries
     TEMPERATURE = 0.6  # Controls randomness in LLM responses
-    TOP_P = 0.95  # Controls diversity via nucleus sampling
\ No newline at end of file
+    TOP_P = 0.95  # Controls diversity via nucleus sampling
+    CACHE_DIR = os.getenv("RECOMMENDER_CACHE_DIR", ".cache")  # Directory for persisted catalog indexes and caches
+    CATALOG_PATH = os.getenv("CATALOG_PATH", "../engineering-course-catalog/engineering_catalog.pdf")  # Catalog PDF, or a directory of catalog PDFs indexed by CatalogRegistry
+    CATALOG_FILTER = os.getenv("CATALOG_FILTER", "")  # Comma-separated catalog names or ids to use from a catalog directory (empty = all)
+    CATALOG_YEARS = os.getenv("CATALOG_YEARS", "")  # Comma-separated catalog years to use from a catalog directory (empty = all)
+    CATALOG_EXTRACT_PROCESSES = int(os.getenv("CATALOG_EXTRACT_PROCESSES", str(os.cpu_count() or 1)))  # Processes extracting PDF pages when a catalog directory is re-indexed
+    CATALOG_SEARCH_TOP_K = 5  # Number of ranked catalog chunks returned per search
+    CATALOG_RETRIEVER = os.getenv("CATALOG_RETRIEVER", "bm25")  # Catalog search backend: "bm25" or "semantic"
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))  # Maximum in-flight LLM requests per async client
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"  # Reuse responses for identical prompts
+    LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))  # Lifetime of cached LLM responses
+    LLM_CACHE_MAX_DISK_BYTES = int(os.getenv("LLM_CACHE_MAX_DISK_BYTES", str(256 * 1024 * 1024)))  # Size budget of the on-disk response cache
+    MAX_STAGE_INPUT_TOKENS = int(os.getenv("MAX_STAGE_INPUT_TOKENS", "3000"))  # Input token budget for each stage prompt
+    CATALOG_CONTEXT_TOKENS = int(os.getenv("CATALOG_CONTEXT_TOKENS", "1000"))  # Token budget for retrieved catalog excerpts
+    CATALOG_MMR_LAMBDA = float(os.getenv("CATALOG_MMR_LAMBDA", "0.7"))  # Relevance vs. diversity trade-off when selecting catalog excerpts (1.0 = relevance only)
+    PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0.0"))  # Fraction of generate_plan calls captured with cProfile
+    PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(CACHE_DIR, "profiles"))  # Where sampled .prof files are written
+    CATALOG_LOAD_MODE = os.getenv("CATALOG_LOAD_MODE", "background")  # When the RAG generator loads the catalog: "eager", "background" or "lazy"
+    POOL_PROCESSES = int(os.getenv("POOL_PROCESSES", str(os.cpu_count() or 1)))  # Worker processes in the plan-serving pool
+    POOL_THREADS_PER_WORKER = int(os.getenv("POOL_THREADS_PER_WORKER", "4"))  # Plans each pool worker generates concurrently
+    POOL_MAX_TASKS_PER_WORKER = int(os.getenv("POOL_MAX_TASKS_PER_WORKER", "500"))  # Plans before a pool worker is recycled (0 = never)
+    POOL_TASK_TIMEOUT_SECONDS = float(os.getenv("POOL_TASK_TIMEOUT_SECONDS", "300"))  # A plan running longer gets its worker replaced (0 = no limit)
+    LLM_ENDPOINTS = os.getenv("LLM_ENDPOINTS", "")  # Comma-separated host:port list of OpenAI-compatible servers to route between (defaults to LLM_HOST:LLM_PORT)
+    LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "120"))  # Deadline for one LLM call, retries included
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))  # Retries of a failed LLM call (connection errors, timeouts, 429/5xx)
+    LLM_RETRY_BACKOFF_SECONDS = float(os.getenv("LLM_RETRY_BACKOFF_SECONDS", "0.25"))  # Base of the jittered exponential backoff between retries
+    LLM_HEDGE_AFTER_SECONDS = float(os.getenv("LLM_HEDGE_AFTER_SECONDS", "0"))  # Send a second copy of a slow call to another endpoint after this long (0 = off)
+    LLM_EJECT_AFTER_FAILURES = int(os.getenv("LLM_EJECT_AFTER_FAILURES", "3"))  # Consecutive failures before an endpoint is taken out of rotation
+    LLM_EJECT_SECONDS = float(os.getenv("LLM_EJECT_SECONDS", "30"))  # How long an ejected endpoint stays out of rotation
+    PLAN_GENERATOR = os.getenv("PLAN_GENERATOR", "rag")  # Generator used by app.py: "basic", "rag" or "fast" (two LLM calls with JSON stage outputs)
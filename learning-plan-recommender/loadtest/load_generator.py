@@ -0,0 +1,248 @@
+"""
+Drive the plan generators with many concurrent synthetic students.
+
+By default an in-process stub server (loadtest.stub_server) stands in for the
+LLM, and the RAG generator runs against a synthetic catalog PDF:
+
+    python -m loadtest.load_generator --students 200 --concurrency 32
+    python -m loadtest.load_generator --host 127.0.0.1 --port 8001 --mode threads --output load.json
+
+Reports throughput, end-to-end and per-stage latency percentiles, error
+counts and the number of connections the server saw.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.synthetic_catalog import write_catalog_pdf
+from loadtest.stub_server import StubServer, StubSettings
+from src.models.course_database import CourseDatabase
+from src.models.student import Student
+from src.recommender.batch_runner import percentile
+from src.recommender.response_cache import ResponseCache
+
+DEPARTMENTS = ["Computer Science", "Electrical Engineering", "Mathematics", "Mechanical Engineering", "Physics"]
+TARGET_COURSES = ["Deep Learning", "Machine Learning", "Computer Vision", "Natural Language Processing", "Data Mining"]
+
+
+def synthetic_students(count, course_db, seed=0):
+    """Yield (student, target_course) pairs with varied backgrounds."""
+    rng = random.Random(seed)
+    names = [course["name"] for course in course_db.get_all_courses()]
+    for _ in range(count):
+        student = Student(
+            prior_courses=rng.sample(names, rng.randint(0, 4)),
+            department=rng.choice(DEPARTMENTS),
+            degree_level=rng.choice(["Undergraduate", "Graduate"]),
+        )
+        yield student, rng.choice(TARGET_COURSES)
+
+
+def latency_summary(values):
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": values[-1] if values else 0.0,
+    }
+
+
+def fetch_server_stats(host, port):
+    """Read the stub server's /stats counters; None for servers without that endpoint."""
+    try:
+        with urllib.request.urlopen(f"http://{host}:{port}/stats", timeout=5) as response:
+            return json.loads(response.read())
+    except (OSError, ValueError):
+        return None
+
+
+class LoadTest:
+    """Run one load test and collect per-plan latencies, per-stage latencies and errors."""
+
+    def __init__(self, generator, course_db, concurrency, bypass_cache=True):
+        self.generator = generator
+        self.course_db = course_db
+        self.concurrency = concurrency
+        self.bypass_cache = bypass_cache
+        self.latencies = []
+        self.stage_latencies = {}
+        self.errors = {}
+        self.token_totals = {}
+
+    def _record_error(self, error):
+        name = type(error).__name__
+        self.errors[name] = self.errors.get(name, 0) + 1
+
+    def _record_stages(self, run):
+        for name, timing in run.timings.items():
+            self.stage_latencies.setdefault(name, []).append(timing["duration"])
+
+    def _record_trace(self, trace):
+        for name, value in trace.totals.items():
+            self.token_totals[name] = self.token_totals.get(name, 0) + value
+
+    async def run_async(self, students):
+        """All plans on one event loop through generate_plan_async and the shared AsyncLLMClient."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def one(student, target_course):
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    await self.generator.generate_plan_async(student, target_course, self.course_db, bypass_cache=self.bypass_cache)
+                    # last_run / last_trace are kept per asyncio task, so these are this plan's
+                    run = getattr(self.generator, "last_run", None)
+                    if run is not None:
+                        self._record_stages(run)
+                    trace = getattr(self.generator, "last_trace", None)
+                    if trace is not None:
+                        self._record_trace(trace)
+                except Exception as e:
+                    self._record_error(e)
+                    return
+                self.latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(one(student, target) for student, target in students))
+
+    def run_threads(self, students):
+        """Plans on a thread pool through the blocking generate_plan and pooled LLMClient."""
+        def one(student, target_course):
+            started = time.perf_counter()
+            try:
+                self.generator.generate_plan(student, target_course, self.course_db, bypass_cache=self.bypass_cache)
+            except Exception as e:
+                return e, None, None, None
+            # last_run / last_trace are kept per thread, so these are this plan's
+            run = getattr(self.generator, "last_run", None)
+            trace = getattr(self.generator, "last_trace", None)
+            return None, time.perf_counter() - started, run, trace
+
+        with ThreadPoolExecutor(self.concurrency) as executor:
+            for error, latency, run, trace in executor.map(lambda pair: one(*pair), students):
+                if error is not None:
+                    self._record_error(error)
+                    continue
+                if run is not None:
+                    self._record_stages(run)
+                if trace is not None:
+                    self._record_trace(trace)
+                self.latencies.append(latency)
+
+
+def build_generator(args, work_dir):
+    if args.generator == "basic":
+        from src.recommender.plan_generator import LearningPlanGenerator
+        return LearningPlanGenerator(args.host, args.port, "loadtest", max_concurrency=args.concurrency, response_cache=ResponseCache())
+
+    if args.generator == "fast":
+        from src.recommender.plan_generator_fast import LearningPlanGenerator
+    else:
+        from src.recommender.plan_generator_rag import LearningPlanGenerator
+    catalog_path = args.catalog
+    if catalog_path is None:
+        catalog_path = os.path.join(work_dir, "catalog.pdf")
+        write_catalog_pdf(catalog_path, pages=args.pages)
+    return LearningPlanGenerator(
+        args.host, args.port, "loadtest", catalog_path=catalog_path, cache_dir=os.path.join(work_dir, "cache"),
+        max_concurrency=args.concurrency, response_cache=ResponseCache(),
+    )
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load test the plan generators against an OpenAI-compatible server")
+    parser.add_argument("--host", default="127.0.0.1", help="LLM server host (ignored unless --port is given)")
+    parser.add_argument("--port", type=int, help="LLM server port; without it an in-process stub server is started")
+    parser.add_argument("--generator", choices=["rag", "basic", "fast"], default="rag")
+    parser.add_argument("--mode", choices=["async", "threads"], default="async",
+                        help="async: generate_plan_async on one event loop; threads: blocking generate_plan on a thread pool")
+    parser.add_argument("--students", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--use-cache", action="store_true", help="Allow LLM response cache hits (bypassed by default)")
+    parser.add_argument("--catalog", help="Catalog PDF for the RAG generator (default: a synthetic catalog)")
+    parser.add_argument("--pages", type=int, default=50, help="Pages in the synthetic catalog")
+    parser.add_argument("--first-token-ms", type=float, default=100.0, help="Stub: latency before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0, help="Stub: generation speed per request")
+    parser.add_argument("--completion-tokens", type=int, default=150, help="Stub: tokens in every completion")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Stub: fraction of requests that fail")
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    server = None
+    if args.port is None:
+        settings = StubSettings(args.first_token_ms, args.tokens_per_second, args.completion_tokens, args.error_rate, seed=0)
+        server = StubServer(("127.0.0.1", 0), settings)
+        server.start_background()
+        args.host, args.port = "127.0.0.1", server.port
+        print(f"Started stub LLM server on port {server.port}")
+
+    work_dir = tempfile.mkdtemp(prefix="recommender-load-")
+    try:
+        generator = build_generator(args, work_dir)
+        course_db = CourseDatabase()
+        students = list(synthetic_students(args.students, course_db))
+        load_test = LoadTest(generator, course_db, args.concurrency, bypass_cache=not args.use_cache)
+
+        print(f"Generating {args.students} plans ({args.generator}, {args.mode}, concurrency {args.concurrency})...")
+        started = time.perf_counter()
+        if args.mode == "async":
+            asyncio.run(load_test.run_async(students))
+        else:
+            load_test.run_threads(students)
+        elapsed = time.perf_counter() - started
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "generator": args.generator,
+        "mode": args.mode,
+        "students": args.students,
+        "concurrency": args.concurrency,
+        "ok": len(load_test.latencies),
+        "errors": load_test.errors,
+        "elapsed_seconds": elapsed,
+        "throughput_per_second": len(load_test.latencies) / elapsed if elapsed > 0 else 0.0,
+        "latency": latency_summary(load_test.latencies),
+        "stages": {name: latency_summary(values) for name, values in load_test.stage_latencies.items()},
+        "llm_totals": load_test.token_totals,
+        "server": fetch_server_stats(args.host, args.port),
+    }
+    if server is not None:
+        server.shutdown()
+        server.server_close()
+
+    print(f"\nPlans: {report['ok']} ok, {sum(report['errors'].values())} failed {report['errors'] or ''}")
+    print(f"Throughput: {report['throughput_per_second']:.2f} plans/s over {elapsed:.1f}s")
+    print(f"{'':<24} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for name, summary in [("plan", report["latency"])] + sorted(report["stages"].items()):
+        print(f"{name:<24} {summary['p50']:>7.3f}s {summary['p95']:>7.3f}s {summary['p99']:>7.3f}s")
+    if load_test.token_totals:
+        totals = load_test.token_totals
+        print(f"LLM calls: {totals['llm_calls']} ({totals['cache_hits']} cache hits), "
+              f"{totals['prompt_tokens']} prompt / {totals['completion_tokens']} completion tokens")
+    if report["server"]:
+        stats = report["server"]
+        print(f"Server: {stats['requests']} requests, {stats['errors']} errors, "
+              f"{stats['connections_opened']} connections opened (max {stats['max_active_connections']} open, "
+              f"max {stats['max_active_requests']} requests in flight)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
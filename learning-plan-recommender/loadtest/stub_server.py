@@ -0,0 +1,260 @@
+"""
+A local stand-in for the OpenAI-compatible LLM server.
+
+Implements GET /v1/models and POST /v1/chat/completions (streaming and
+non-streaming) with configurable latency, token rate and error rate, plus
+GET /stats with request, token and connection counters. Run from the
+learning-plan-recommender directory:
+
+    python -m loadtest.stub_server --port 8001 --first-token-ms 150 --tokens-per-second 80
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MODEL_NAME = "stub-model"
+
+# Stage outputs mention topics and course codes so catalog retrieval does real work
+RESPONSE_LINES = [
+    "**Knowledge Gaps**",
+    "- Mathematical prerequisites: linear algebra and probability (MATH 240, STAT 310).",
+    "- Programming skills: Python programming and data structures (CSCI 356).",
+    "- Theoretical foundations: machine learning basics (CSCI 632) and statistics.",
+    "- Neural networks and optimization are needed before deep learning.",
+    "- Practical experience with computer vision or natural language processing projects.",
+    "**Recommended Courses**",
+    "1. CSCI 443 Advanced Data Science - essential, covers data science methodology.",
+    "2. CSCI 632 Machine Learning - essential prerequisite for the target course.",
+    "3. CSCI 581 Computer Vision - optional, applied deep learning practice.",
+]
+
+
+class StubSettings:
+    """Latency, throughput and failure behaviour of the stub."""
+
+    def __init__(self, first_token_ms=100.0, tokens_per_second=100.0, completion_tokens=200,
+                 error_rate=0.0, jitter=0.1, seed=None):
+        self.first_token_ms = first_token_ms
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.error_rate = error_rate
+        self.jitter = jitter
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+
+    def sample(self):
+        """Return (is_error, first_token_seconds, seconds_per_token) for one request."""
+        with self.random_lock:
+            is_error = self.random.random() < self.error_rate
+            scale = 1.0 + self.random.uniform(-self.jitter, self.jitter)
+        per_token = 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+        return is_error, self.first_token_ms / 1000.0 * scale, per_token * scale
+
+
+class StubStats:
+    """Thread-safe request, token and connection counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.values = {
+            "requests": 0, "streamed_requests": 0, "errors": 0,
+            "prompt_tokens": 0, "completion_tokens": 0,
+            "connections_opened": 0, "active_connections": 0, "max_active_connections": 0,
+            "active_requests": 0, "max_active_requests": 0,
+        }
+
+    def add(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                self.values[name] += delta
+            self.values["max_active_connections"] = max(self.values["max_active_connections"], self.values["active_connections"])
+            self.values["max_active_requests"] = max(self.values["max_active_requests"], self.values["active_requests"])
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.values)
+
+
+def completion_words(prompt, count):
+    """Deterministic response text for a prompt, as a list of count words."""
+    offset = int(hashlib.sha1(prompt.encode("utf-8")).hexdigest(), 16) % len(RESPONSE_LINES)
+    words = []
+    line = offset
+    while len(words) < count:
+        words.extend(RESPONSE_LINES[line % len(RESPONSE_LINES)].split())
+        words.append("\n")
+        line += 1
+    return words[:count]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection counts reflect client pooling
+
+    def setup(self):
+        super().setup()
+        self.server.stats.add(connections_opened=1, active_connections=1)
+
+    def finish(self):
+        try:
+            super().finish()
+        finally:
+            self.server.stats.add(active_connections=-1)
+
+    def log_message(self, format, *args):
+        pass  # one line per request would swamp a load test
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/v1/models":
+            self._send_json(200, {"object": "list", "data": [{"id": MODEL_NAME, "object": "model", "owned_by": "stub"}]})
+        elif self.path.rstrip("/") == "/stats":
+            self._send_json(200, self.server.stats.snapshot())
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "not_found"}})
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "not_found"}})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": {"message": "Invalid JSON body", "type": "invalid_request_error"}})
+            return
+
+        stats = self.server.stats
+        stats.add(requests=1, active_requests=1)
+        try:
+            self._complete(request)
+        finally:
+            stats.add(active_requests=-1)
+
+    def _complete(self, request):
+        settings, stats = self.server.settings, self.server.stats
+        is_error, first_token_seconds, seconds_per_token = settings.sample()
+        prompt = "\n".join(str(message.get("content", "")) for message in request.get("messages", []))
+        prompt_tokens = max(1, len(prompt) // 4)
+        stats.add(prompt_tokens=prompt_tokens)
+
+        time.sleep(first_token_seconds)
+        if is_error:
+            stats.add(errors=1)
+            self._send_json(500, {"error": {"message": "Injected stub failure", "type": "server_error"}})
+            return
+
+        words = completion_words(prompt, settings.completion_tokens)
+        completion_id = f"chatcmpl-{hashlib.sha1(prompt.encode('utf-8')).hexdigest()[:12]}"
+        if request.get("stream"):
+            stats.add(streamed_requests=1)
+            self._stream(completion_id, words, seconds_per_token)
+        else:
+            time.sleep(seconds_per_token * len(words))
+            self._send_json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": MODEL_NAME,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": self._join(words)},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(words),
+                          "total_tokens": prompt_tokens + len(words)},
+            })
+        stats.add(completion_tokens=len(words))
+
+    def _stream(self, completion_id, words, seconds_per_token):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def chunk(delta, finish_reason=None):
+            event = {
+                "id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                "model": MODEL_NAME, "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            self._write_chunk(f"data: {json.dumps(event)}\n\n")
+
+        chunk({"role": "assistant", "content": ""})
+        for i, word in enumerate(words):
+            time.sleep(seconds_per_token)
+            chunk({"content": word if word == "\n" or i == 0 else f" {word}"})
+        chunk({}, finish_reason="stop")
+        self._write_chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _write_chunk(self, text):
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    @staticmethod
+    def _join(words):
+        return " ".join(words).replace(" \n ", "\n").strip()
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class StubServer(ThreadingHTTPServer):
+    """Threaded HTTP server carrying the stub settings and counters."""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, address, settings=None):
+        super().__init__(address, StubHandler)
+        self.settings = settings or StubSettings()
+        self.stats = StubStats()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start_background(self):
+        """Serve from a daemon thread (port 0 picks a free port); returns the thread."""
+        thread = threading.Thread(target=self.serve_forever, name="stub-llm-server", daemon=True)
+        thread.start()
+        return thread
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub LLM server for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--first-token-ms", type=float, default=100.0, help="Latency before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=100.0, help="Generation speed per request")
+    parser.add_argument("--completion-tokens", type=int, default=200, help="Tokens in every completion")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Relative +/- jitter applied to latencies")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    settings = StubSettings(args.first_token_ms, args.tokens_per_second, args.completion_tokens, args.error_rate, args.jitter)
+    server = StubServer((args.host, args.port), settings)
+    print(f"Stub LLM server listening on http://{args.host}:{server.port}/v1 (model {MODEL_NAME})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
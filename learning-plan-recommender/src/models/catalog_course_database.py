@@ -0,0 +1,186 @@
+import os
+import sqlite3
+import threading
+
+from src.models.prerequisite_graph import PrerequisiteGraph
+from src.recommender.catalog_index import text_fingerprint
+from src.recommender.course_extractor import extract_course_records, normalize_course_code
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS courses (
+    code_key TEXT PRIMARY KEY,
+    code TEXT NOT NULL,
+    name TEXT NOT NULL,
+    credits TEXT,
+    description TEXT,
+    page INTEGER
+);
+CREATE TABLE IF NOT EXISTS prerequisites (
+    course_key TEXT NOT NULL,
+    prereq_key TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (course_key, prereq_key)
+);
+CREATE INDEX IF NOT EXISTS idx_prerequisites_prereq ON prerequisites (prereq_key);
+"""
+
+
+def format_course_record(course, max_description_chars=200):
+    """Render a course record as one compact prompt line."""
+    parts = [course["code"], course["name"]]
+    if course.get("credits"):
+        parts.append(f"{course['credits']} cr")
+    if course.get("prerequisites"):
+        parts.append("Prereqs: " + ", ".join(course["prerequisites"]))
+    if course.get("page") is not None:
+        parts.append(f"p.{course['page'] + 1}")
+
+    description = course.get("description") or ""
+    if len(description) > max_description_chars:
+        description = description[:max_description_chars].rsplit(" ", 1)[0] + "..."
+    if description:
+        parts.append(description)
+    return " | ".join(parts)
+
+
+class CatalogCourseDatabase:
+    """
+    SQLite-backed store of course records extracted from the catalog.
+
+    Exposes the same methods as CourseDatabase, plus indexed prerequisite queries.
+    Codes are matched through a normalized primary key, so lookups are B-tree
+    searches rather than scans over the catalog text.
+    """
+
+    def __init__(self, db_path=":memory:"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._prerequisite_graph = None
+        self._courses_text = None  # memoized get_courses_as_text(), reset by add_courses()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(SCHEMA)
+
+    @classmethod
+    def from_catalog(cls, catalog_text, page_offsets=None, db_path=":memory:"):
+        """Extract course records from catalog text into a new store."""
+        store = cls(db_path)
+        store.add_courses(extract_course_records(catalog_text, page_offsets))
+        return store
+
+    @classmethod
+    def load_or_build(cls, catalog_text, page_offsets=None, cache_dir=None):
+        """
+        Open the store for this catalog from cache_dir, extracting it first if needed.
+
+        Args:
+            catalog_text: The full catalog text
+            page_offsets: Start offset of every page in catalog_text
+            cache_dir: Directory for persisted stores (in-memory store if None)
+
+        Returns:
+            CatalogCourseDatabase: The course store for catalog_text
+        """
+        if not cache_dir:
+            return cls.from_catalog(catalog_text, page_offsets)
+
+        path = os.path.join(cache_dir, f"catalog_courses_{text_fingerprint(catalog_text)}.sqlite")
+        if os.path.exists(path):
+            return cls(path)
+
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        store = cls.from_catalog(catalog_text, page_offsets, tmp_path)
+        store.close()
+        os.replace(tmp_path, path)
+        return cls(path)
+
+    def add_courses(self, courses):
+        """Insert or replace course records (dicts shaped like CourseDatabase entries)."""
+        with self._lock, self._conn:
+            for course in courses:
+                code_key = normalize_course_code(course["code"])
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO courses (code_key, code, name, credits, description, page) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (code_key, course["code"], course["name"], course.get("credits", ""),
+                     course.get("description", ""), course.get("page")),
+                )
+                self._conn.execute("DELETE FROM prerequisites WHERE course_key = ?", (code_key,))
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO prerequisites (course_key, prereq_key, position) VALUES (?, ?, ?)",
+                    [(code_key, normalize_course_code(prereq), i)
+                     for i, prereq in enumerate(course.get("prerequisites", []))],
+                )
+            self._prerequisite_graph = None
+            self._courses_text = None
+
+    def get_all_courses(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM courses ORDER BY code_key").fetchall()
+            prereqs = self._prerequisite_map()
+        return [self._row_to_course(row, prereqs.get(row["code_key"], [])) for row in rows]
+
+    def get_course_by_code(self, code):
+        code_key = normalize_course_code(code)
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM courses WHERE code_key = ?", (code_key,)).fetchone()
+            if row is None:
+                return None
+            return self._row_to_course(row, self._prerequisites_of(code_key))
+
+    def get_courses_as_text(self):
+        with self._lock:
+            if self._courses_text is None:
+                rows = self._conn.execute("SELECT code, name FROM courses ORDER BY code_key").fetchall()
+                self._courses_text = "\n".join([f"{row['code']}: {row['name']}" for row in rows])
+            return self._courses_text
+
+    def get_prerequisites(self, code):
+        """Return the normalized codes of the direct prerequisites of a course."""
+        with self._lock:
+            return self._prerequisites_of(normalize_course_code(code))
+
+    def get_courses_requiring(self, code):
+        """Return the normalized codes of courses that list this course as a prerequisite."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT course_key FROM prerequisites WHERE prereq_key = ? ORDER BY course_key",
+                (normalize_course_code(code),),
+            ).fetchall()
+        return [row["course_key"] for row in rows]
+
+    def get_prerequisite_graph(self):
+        """Return the prerequisite graph for the stored courses, building it on first use."""
+        graph = self._prerequisite_graph
+        if graph is None:
+            graph = self._prerequisite_graph = PrerequisiteGraph(self.get_all_courses())
+        return graph
+
+    def close(self):
+        self._conn.close()
+
+    def _prerequisites_of(self, code_key):
+        rows = self._conn.execute(
+            "SELECT prereq_key FROM prerequisites WHERE course_key = ? ORDER BY position", (code_key,)
+        ).fetchall()
+        return [row["prereq_key"] for row in rows]
+
+    def _prerequisite_map(self):
+        prereqs = {}
+        for row in self._conn.execute("SELECT course_key, prereq_key FROM prerequisites ORDER BY course_key, position"):
+            prereqs.setdefault(row["course_key"], []).append(row["prereq_key"])
+        return prereqs
+
+    @staticmethod
+    def _row_to_course(row, prerequisites):
+        return {
+            "code": row["code"],
+            "name": row["name"],
+            "description": row["description"],
+            "prerequisites": prerequisites,
+            "credits": row["credits"],
+            "page": row["page"],
+        }
@@ -1,15 +1,89 @@
+import sys
+
+from src.recommender.course_extractor import COURSE_CODE_PATTERN
+
+
 class Course:
-    def __init__(self, name, description, prerequisites):
+    """
+    Compact, read-only course record.
+
+    Attributes live in __slots__ instead of a per-instance dict, codes are
+    interned so the many repeats of a code (in prerequisite lists, indexes and
+    students' prior courses) share one string, and prerequisites are a tuple.
+    Courses also support read-only mapping access (course["code"],
+    course.get("credits")), so code written against course dicts keeps working.
+    """
+
+    __slots__ = ("code", "name", "description", "prerequisites", "credits", "page", "key", "department", "level")
+
+    FIELDS = ("code", "name", "description", "prerequisites", "credits", "page")
+
+    def __init__(self, name, description, prerequisites, code="", credits="", page=None):
+        self.code = sys.intern(code)
         self.name = name
         self.description = description
-        self.prerequisites = prerequisites
+        self.prerequisites = tuple(sys.intern(prereq) for prereq in prerequisites or ())
+        self.credits = credits or ""
+        self.page = page
+        # Normalized code (as normalize_course_code), subject and hundreds level, e.g.
+        # "CSCI 632", "CSCI" and 600 for "Csci 632"
+        match = COURSE_CODE_PATTERN.search(code.upper())
+        if match:
+            self.key = sys.intern(f"{match.group(1)} {match.group(2)}")
+            self.department = sys.intern(match.group(1))
+            self.level = int(match.group(2)[0]) * 100
+        else:
+            self.key = sys.intern(code.strip().upper())
+            self.department = ""
+            self.level = 0
+
+    @classmethod
+    def from_dict(cls, course):
+        """Build a Course from a course dict (or return it unchanged if it already is one)."""
+        if isinstance(course, cls):
+            return course
+        return cls(
+            course.get("name", ""), course.get("description", ""), course.get("prerequisites", ()),
+            code=course.get("code", ""), credits=course.get("credits", ""), page=course.get("page"),
+        )
 
     def get_course_info(self):
         return {
             "name": self.name,
             "description": self.description,
-            "prerequisites": self.prerequisites
+            "prerequisites": list(self.prerequisites)
         }
 
+    def to_dict(self):
+        """Return a mutable dict copy with the keys of a course dict."""
+        info = {field: getattr(self, field) for field in self.FIELDS}
+        info["prerequisites"] = list(self.prerequisites)
+        return info
+
     def has_prerequisites(self, completed_courses):
-        return all(prereq in completed_courses for prereq in self.prerequisites)
\ No newline at end of file
+        completed = set(completed_courses)
+        return all(prereq in completed for prereq in self.prerequisites)
+
+    def __getitem__(self, key):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.FIELDS else default
+
+    def __contains__(self, key):
+        return key in self.FIELDS
+
+    def keys(self):
+        return self.FIELDS
+
+    def __eq__(self, other):
+        if isinstance(other, Course):
+            return all(getattr(self, field) == getattr(other, field) for field in self.FIELDS)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Course({self.code!r}, {self.name!r})"
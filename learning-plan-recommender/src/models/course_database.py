@@ -1,30 +1,180 @@
+import threading
+from array import array
+
+from src.models.course import Course
+from src.models.prerequisite_graph import PrerequisiteGraph
+from src.recommender.course_extractor import normalize_course_code
+
+DEFAULT_COURSES = [
+    {"code": "Csci 256", "name": "Programming in Python", "description": "Introduction to Python programming language", "prerequisites": []},
+    {"code": "Csci 343", "name": "Fundamentals of Data Science", "description": "Basics of data science methodologies", "prerequisites": ["Csci 256"]},
+    {"code": "CSci 356", "name": "Data Structures in Python", "description": "Implementation of data structures using Python", "prerequisites": ["Csci 256"]},
+    {"code": "CSci 433", "name": "Algorithm and Data Structure Analysis", "description": "Analysis of algorithms and data structures", "prerequisites": ["CSci 356"]},
+    {"code": "Csci 443", "name": "Advanced Data Science", "description": "Advanced topics in data science", "prerequisites": ["Csci 343", "CSci 356"]},
+    {"code": "Csci 475", "name": "Introduction to Database Systems", "description": "Fundamentals of database design and management", "prerequisites": ["CSci 356"]},
+    {"code": "CSci 345", "name": "Information Storage and Retrieval", "description": "Methods for storing and retrieving information", "prerequisites": ["Csci 256"]},
+    {"code": "CSci 444", "name": "Information Visualization", "description": "Techniques for visualizing data and information", "prerequisites": ["Csci 343"]},
+    {"code": "CSci 517", "name": "Natural Language Processing", "description": "Processing and analyzing natural language data", "prerequisites": ["Csci 632"]},
+    {"code": "CSci 543", "name": "Data Mining", "description": "Techniques for extracting patterns from data", "prerequisites": ["Csci 443"]},
+    {"code": "Csci 632", "name": "Machine Learning", "description": "Algorithms that learn from data", "prerequisites": ["Csci 443"]},
+    {"code": "Csci 581", "name": "Special Topics in Computer Science (Computer Vision)", "description": "Computer vision algorithms and applications", "prerequisites": ["Csci 632"]},
+    {"code": "CSci 492", "name": "Special Topics in Data Science (Deep Learning - Undergraduate)", "description": "Deep learning for undergraduates", "prerequisites": ["Csci 632"]},
+    {"code": "Engr 691", "name": "Special Topics in Engineering Science (Deep Learning - Graduate)", "description": "Advanced deep learning for graduates", "prerequisites": ["Csci 632"]}
+]
+
+
+def _level_key(level):
+    """Normalize a course level given as 4, 400 or 432 to 400."""
+    level = int(level)
+    return level * 100 if level < 10 else level - level % 100
+
+
 class CourseDatabase:
-    def __init__(self):
-        self.courses = [
-            {"code": "Csci 256", "name": "Programming in Python", "description": "Introduction to Python programming language", "prerequisites": []},
-            {"code": "Csci 343", "name": "Fundamentals of Data Science", "description": "Basics of data science methodologies", "prerequisites": ["Csci 256"]},
-            {"code": "CSci 356", "name": "Data Structures in Python", "description": "Implementation of data structures using Python", "prerequisites": ["Csci 256"]},
-            {"code": "CSci 433", "name": "Algorithm and Data Structure Analysis", "description": "Analysis of algorithms and data structures", "prerequisites": ["CSci 356"]},
-            {"code": "Csci 443", "name": "Advanced Data Science", "description": "Advanced topics in data science", "prerequisites": ["Csci 343", "CSci 356"]},
-            {"code": "Csci 475", "name": "Introduction to Database Systems", "description": "Fundamentals of database design and management", "prerequisites": ["CSci 356"]},
-            {"code": "CSci 345", "name": "Information Storage and Retrieval", "description": "Methods for storing and retrieving information", "prerequisites": ["Csci 256"]},
-            {"code": "CSci 444", "name": "Information Visualization", "description": "Techniques for visualizing data and information", "prerequisites": ["Csci 343"]},
-            {"code": "CSci 517", "name": "Natural Language Processing", "description": "Processing and analyzing natural language data", "prerequisites": ["Csci 632"]},
-            {"code": "CSci 543", "name": "Data Mining", "description": "Techniques for extracting patterns from data", "prerequisites": ["Csci 443"]},
-            {"code": "Csci 632", "name": "Machine Learning", "description": "Algorithms that learn from data", "prerequisites": ["Csci 443"]},
-            {"code": "Csci 581", "name": "Special Topics in Computer Science (Computer Vision)", "description": "Computer vision algorithms and applications", "prerequisites": ["Csci 632"]},
-            {"code": "CSci 492", "name": "Special Topics in Data Science (Deep Learning - Undergraduate)", "description": "Deep learning for undergraduates", "prerequisites": ["Csci 632"]},
-            {"code": "Engr 691", "name": "Special Topics in Engineering Science (Deep Learning - Graduate)", "description": "Advanced deep learning for graduates", "prerequisites": ["Csci 632"]}
-        ]
-    
+    """
+    In-memory course list with indexes for large catalogs.
+
+    Courses are stored as compact Course objects in one list. Lookups go through
+    indexes built from it: dicts from lowercased code to course and from
+    normalized code to list position, and arrays of positions per department
+    (code subject) and per level (hundreds digit of the code number). The rendered course list used in
+    prompts and the prerequisite graph are memoized; add_courses() and
+    remove_course() invalidate them and bump version.
+    """
+
+    def __init__(self, courses=None):
+        """
+        Args:
+            courses: Course objects or course dicts (defaults to DEFAULT_COURSES)
+        """
+        self._lock = threading.Lock()
+        self._courses = []
+        self._by_code = {}  # lowercased code -> course, the fast path of get_course_by_code
+        self._by_code_key = {}  # normalized code -> position; identifies a course and catches other spellings
+        self.version = 0
+        self._invalidate()
+        self.add_courses(DEFAULT_COURSES if courses is None else courses)
+
+    @property
+    def courses(self):
+        return tuple(self._courses)
+
+    @courses.setter
+    def courses(self, courses):
+        with self._lock:
+            self._courses = []
+            self._by_code = {}
+            self._by_code_key = {}
+            self._invalidate()
+        self.add_courses(courses)
+
     def get_all_courses(self):
-        return self.courses
-    
+        return tuple(self._courses)
+
     def get_course_by_code(self, code):
-        for course in self.courses:
-            if course["code"].lower() == code.lower():
-                return course
-        return None
-    
+        course = self._by_code.get(code.lower())
+        if course is None:
+            position = self._by_code_key.get(normalize_course_code(code))
+            if position is not None:
+                course = self._courses[position]
+        return course
+
     def get_courses_as_text(self):
-        return "\n".join([f"{c['code']}: {c['name']}" for c in self.courses])
\ No newline at end of file
+        text = self._text
+        if text is None:
+            with self._lock:
+                if self._text is None:
+                    self._text = "\n".join([f"{c.code}: {c.name}" for c in self._courses])
+                text = self._text
+        return text
+
+    def get_courses_by_department(self, department):
+        """Return the courses whose code has this subject, e.g. "CSCI" (any casing)."""
+        positions = self._department_index().get(department.strip().upper())
+        return [self._courses[i] for i in positions] if positions else []
+
+    def get_courses_by_level(self, level):
+        """Return the courses at a level, e.g. 400 (or 4) for codes numbered 400-499."""
+        positions = self._level_index().get(_level_key(level))
+        return [self._courses[i] for i in positions] if positions else []
+
+    def find_courses(self, department=None, level=None):
+        """Return the courses matching a department and/or a level, in catalog order."""
+        if department is None and level is None:
+            return list(self._courses)
+        if department is None:
+            return self.get_courses_by_level(level)
+        courses = self.get_courses_by_department(department)
+        if level is None:
+            return courses
+        level = _level_key(level)
+        return [course for course in courses if course.level == level]
+
+    def add_courses(self, courses):
+        """Insert or replace courses (Course objects or course dicts), keyed by code."""
+        with self._lock:
+            for course in courses:
+                course = Course.from_dict(course)
+                position = self._by_code_key.get(course.key)
+                if position is None:
+                    self._by_code_key[course.key] = len(self._courses)
+                    self._courses.append(course)
+                else:
+                    self._by_code.pop(self._courses[position].code.lower(), None)
+                    self._courses[position] = course
+                self._by_code[course.code.lower()] = course
+            self._invalidate()
+
+    def remove_course(self, code):
+        """
+        Remove a course.
+
+        Returns:
+            bool: Whether the course was found
+        """
+        with self._lock:
+            position = self._by_code_key.get(normalize_course_code(code))
+            if position is None:
+                return False
+            del self._courses[position]
+            self._by_code = {c.code.lower(): c for c in self._courses}
+            self._by_code_key = {c.key: i for i, c in enumerate(self._courses)}
+            self._invalidate()
+            return True
+
+    def get_prerequisite_graph(self):
+        """Return the prerequisite graph for these courses, building it on first use."""
+        graph = self._prerequisite_graph
+        if graph is None:
+            with self._lock:
+                if self._prerequisite_graph is None:
+                    self._prerequisite_graph = PrerequisiteGraph(self._courses)
+                graph = self._prerequisite_graph
+        return graph
+
+    def _invalidate(self):
+        """Drop everything derived from the course list (called with the lock held)."""
+        self._text = None
+        self._prerequisite_graph = None
+        self._departments = None
+        self._levels = None
+        self.version += 1
+
+    def _department_index(self):
+        index = self._departments
+        if index is None:
+            with self._lock:
+                index = {}
+                for i, course in enumerate(self._courses):
+                    index.setdefault(course.department, array("I")).append(i)
+                self._departments = index
+        return index
+
+    def _level_index(self):
+        index = self._levels
+        if index is None:
+            with self._lock:
+                index = {}
+                for i, course in enumerate(self._courses):
+                    index.setdefault(course.level, array("I")).append(i)
+                self._levels = index
+        return index
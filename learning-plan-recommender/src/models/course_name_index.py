@@ -0,0 +1,305 @@
+import heapq
+import re
+import threading
+
+from src.recommender.course_extractor import COURSE_CODE_PATTERN, normalize_course_code
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+STOP_WORDS = frozenset(["a", "an", "and", "for", "in", "of", "on", "the", "to", "with"])
+
+# Words that do not tell courses apart ("Introduction to Programming" names "Programming in Python")
+GENERIC_WORDS = frozenset(["introduction", "fundamentals", "principles", "foundations", "basics", "special", "topics"])
+
+# Default confidence below which a fuzzy match is rejected
+MIN_CONFIDENCE = 0.7
+# A fuzzy match needs both trigram overlap and edit similarity at least this high,
+# unless every word of the catalog name appears in the query
+MIN_AGREEMENT = 0.75
+
+# Common abbreviations in free-text course names, expanded before matching
+DEFAULT_ALIASES = {
+    "intro": "introduction",
+    "prog": "programming",
+    "algo": "algorithms",
+    "algos": "algorithms",
+    "ds": "data structures",
+    "db": "database",
+    "dbs": "database systems",
+    "ml": "machine learning",
+    "dl": "deep learning",
+    "nlp": "natural language processing",
+    "cv": "computer vision",
+    "ir": "information retrieval",
+    "viz": "visualization",
+    "stats": "statistics",
+    "adv": "advanced",
+}
+
+
+def levenshtein(a, b):
+    """
+    Edit distance between two strings using Myers' bit-parallel algorithm.
+
+    Each column of the DP matrix is held in a Python int, so the cost is one
+    handful of integer operations per character of b rather than len(a) steps.
+    """
+    if len(a) > len(b):
+        a, b = b, a
+    m = len(a)
+    if m == 0:
+        return len(b)
+
+    peq = {}
+    for i, char in enumerate(a):
+        peq[char] = peq.get(char, 0) | (1 << i)
+
+    mask = (1 << m) - 1
+    last = 1 << (m - 1)
+    pv, mv, score = mask, 0, m
+    for char in b:
+        eq = peq.get(char, 0)
+        xv = eq | mv
+        xh = ((((eq & pv) + pv) & mask) ^ pv) | eq
+        ph = (mv | ~(xh | pv)) & mask
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = (mh | ~(xv | ph)) & mask
+        mv = ph & xv
+    return score
+
+
+def stem(word):
+    """Crude plural stripping, so "algorithms" matches "algorithm": drop one trailing "s"."""
+    return word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+
+
+def trigrams(text):
+    """Character trigrams of text, padded so short words still produce some."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class CourseNameIndex:
+    """
+    Resolve free-text course names ("intro to data structures", "csci-356") to catalog codes.
+
+    Course codes, full titles, and the parenthesised topic of "Special Topics"
+    titles are normalized (lowercased, abbreviations expanded, stop words
+    dropped) and indexed by word and by character trigram. A lookup tries an
+    exact code, alias or title match first, then a course that is the only one
+    whose name contains every word of the query ("Data Structures",
+    "Algorithms"). Otherwise it scores the candidates sharing the most trigrams
+    by trigram overlap, edit distance and word coverage. A fuzzy candidate is
+    only eligible if trigram overlap and edit distance both agree it is close,
+    or if the query contains every word of its name, so a query that merely
+    shares a word with a title ("Computer Networks") is left unresolved.
+    Results are memoized, since batch inputs repeat the same names many times.
+    """
+
+    def __init__(self, courses, aliases=None, max_candidates=8, memo_size=65536):
+        """
+        Args:
+            courses: Course dicts with "code" and "name"
+            aliases: Optional mapping of free-text name -> course code, e.g. {"intro to programming": "Csci 256"}
+            max_candidates: Trigram candidates reranked by edit distance per lookup
+            memo_size: Number of resolved names remembered
+        """
+        self.max_candidates = max_candidates
+        self.memo_size = memo_size
+        self.courses = {}  # normalized code -> (code, name)
+        self.exact = {}  # normalized name -> normalized codes
+        self.keys = []  # (normalized name, normalized code, trigram count)
+        self.postings = {}  # trigram -> list of key ids
+        self.words = {}  # name word -> normalized codes of the names containing it
+        self.stems = {}  # stemmed name word -> normalized codes
+        self.word_counts = {}  # normalized code -> words in its shortest name
+        self._memo = {}
+        self._lock = threading.Lock()
+
+        for course in courses:
+            code_key = normalize_course_code(course["code"])
+            if code_key in self.courses:
+                continue
+            self.courses[code_key] = (course["code"], course.get("name", ""))
+            variants = self._name_variants(course.get("name", ""))
+            for variant in variants:
+                self._add_key(variant, code_key)
+            # A "Special Topics in ..." title is matched by word through its topic only
+            for variant in variants[1:] or variants:
+                self._add_words(variant, code_key)
+
+        for alias, code in (aliases or {}).items():
+            code_key = normalize_course_code(code)
+            if code_key in self.courses:
+                self.exact[self.normalize(alias)] = [code_key]
+
+    @classmethod
+    def from_course_dbs(cls, *course_dbs, aliases=None):
+        """Build an index over several course databases; the first one wins on duplicate codes."""
+        courses = []
+        for course_db in course_dbs:
+            if course_db is not None:
+                courses.extend(course_db.get_all_courses())
+        return cls(courses, aliases=aliases)
+
+    @staticmethod
+    def normalize(text):
+        """Lowercase, expand abbreviations and drop stop words: "Intro to DS" -> "introduction data structures"."""
+        words = []
+        for word in WORD_PATTERN.findall(text.lower()):
+            word = DEFAULT_ALIASES.get(word, word)
+            words.extend(w for w in word.split() if w not in STOP_WORDS)
+        return " ".join(words)
+
+    def _name_variants(self, name):
+        variants = [name]
+        # "Special Topics in Computer Science (Computer Vision)" is also known as "Computer Vision"
+        topic = re.search(r"\(([^)]+)\)", name)
+        if topic:
+            variants.append(re.sub(r"\s*-\s*(undergraduate|graduate)\s*$", "", topic.group(1), flags=re.IGNORECASE))
+        return [self.normalize(variant) for variant in variants if variant.strip()]
+
+    def _add_key(self, key, code_key):
+        if not key:
+            return
+        codes = self.exact.setdefault(key, [])
+        if code_key not in codes:
+            codes.append(code_key)
+        grams = trigrams(key)
+        key_id = len(self.keys)
+        self.keys.append((key, code_key, len(grams)))
+        for gram in grams:
+            self.postings.setdefault(gram, []).append(key_id)
+
+    def _add_words(self, key, code_key):
+        words = key.split()
+        if not words:
+            return
+        for word in words:
+            self.words.setdefault(word, set()).add(code_key)
+            self.stems.setdefault(stem(word), set()).add(code_key)
+        self.word_counts[code_key] = min(len(words), self.word_counts.get(code_key, len(words)))
+
+    def _unique_name_match(self, query_words):
+        """
+        The course whose name is the only one containing every (non-generic) query word.
+
+        Words are compared as typed first, then with plurals stripped. Returns
+        (normalized code, number of query words) or None if no name or several
+        names contain them.
+        """
+        for index, words in ((self.words, set(query_words)), (self.stems, {stem(word) for word in query_words})):
+            words -= GENERIC_WORDS
+            if not words:
+                return None
+            codes = set.intersection(*(index.get(word, set()) for word in words))
+            if codes:
+                return (next(iter(codes)), len(words)) if len(codes) == 1 else None
+        return None
+
+    def resolve(self, text, min_confidence=MIN_CONFIDENCE):
+        """
+        Resolve one free-text course name.
+
+        Args:
+            text: Course name or code as typed by a student
+            min_confidence: Matches scoring below this are rejected
+
+        Returns:
+            tuple or None: (code, name, confidence) with confidence in [0, 1], or None if nothing matches
+        """
+        memo_key = (text, min_confidence)
+        result = self._memo.get(memo_key, self)
+        if result is not self:
+            return result
+
+        result = self._resolve(text)
+        if result is not None and result[2] < min_confidence:
+            result = None
+        with self._lock:
+            if len(self._memo) >= self.memo_size:
+                self._memo.clear()
+            self._memo[memo_key] = result
+        return result
+
+    def resolve_many(self, texts, min_confidence=MIN_CONFIDENCE):
+        """Resolve a batch of names; duplicates are looked up once."""
+        resolved = {text: self.resolve(text, min_confidence) for text in set(texts)}
+        return [resolved[text] for text in texts]
+
+    def canonicalize(self, texts, min_confidence=MIN_CONFIDENCE):
+        """
+        Rewrite a student's course list in canonical form for prompts and cache keys.
+
+        Resolved names become "code: name"; unresolved names are kept as typed,
+        with whitespace stripped and collapsed. The result is de-duplicated and
+        sorted, so equivalent course lists produce identical output.
+        """
+        canonical = set()
+        for text, match in zip(texts, self.resolve_many(texts, min_confidence)):
+            if match is not None:
+                canonical.add(f"{match[0]}: {match[1]}")
+            elif text.strip():
+                canonical.add(" ".join(text.split()))
+        return sorted(canonical, key=str.lower)
+
+    def clear_cache(self):
+        """Forget memoized lookups, e.g. before timing uncached resolution."""
+        with self._lock:
+            self._memo.clear()
+
+    def _resolve(self, text):
+        if COURSE_CODE_PATTERN.search(text.upper()):
+            code_key = normalize_course_code(text)
+            if code_key in self.courses:
+                return self._result(code_key, 1.0)
+
+        query = self.normalize(text)
+        if not query:
+            return None
+        if query in self.exact:
+            # A title shared by several courses (e.g. a topic offered at two levels) is a coin flip
+            codes = self.exact[query]
+            return self._result(codes[0], round(1.0 / len(codes), 3))
+
+        unique = self._unique_name_match(query.split())
+        if unique is not None:
+            # Unambiguous; more confident the more of the course's name the query spells out
+            code_key, word_count = unique
+            return self._result(code_key, round(0.75 + 0.25 * min(1.0, word_count / self.word_counts[code_key]), 3))
+
+        query_grams = trigrams(query)
+        shared = {}
+        for gram in query_grams:
+            for key_id in self.postings.get(gram, ()):
+                shared[key_id] = shared.get(key_id, 0) + 1
+        if not shared:
+            return None
+
+        candidates = heapq.nlargest(self.max_candidates, shared, key=shared.get)
+        query_words = set(query.split())
+        best_key, best_score = None, 0.0
+        for key_id in candidates:
+            key, code_key, key_gram_count = self.keys[key_id]
+            dice = 2.0 * shared[key_id] / (len(query_grams) + key_gram_count)
+            edit = 1.0 - levenshtein(query, key) / max(len(query), len(key))
+            key_words = set(key.split())
+            covers_name = key_words <= query_words
+            if not covers_name and (dice < MIN_AGREEMENT or edit < MIN_AGREEMENT):
+                continue
+            coverage = 1.0 if covers_name else len(query_words & key_words) / len(query_words)
+            score = 0.5 * dice + 0.3 * edit + 0.2 * coverage
+            if score > best_score:
+                best_key, best_score = code_key, score
+        if best_key is None:
+            return None
+        return self._result(best_key, round(best_score, 3))
+
+    def _result(self, code_key, confidence):
+        code, name = self.courses[code_key]
+        return code, name, confidence
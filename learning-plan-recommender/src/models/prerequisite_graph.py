@@ -0,0 +1,224 @@
+from src.recommender.course_extractor import normalize_course_code
+
+
+class PrerequisiteGraph:
+    """
+    Precomputed prerequisite graph over a set of courses.
+
+    Courses are indexed by normalized code. Each course's transitive
+    prerequisites are stored as a bitset (a Python int with one bit per course),
+    computed once in topological order. "Which prerequisites is this student
+    missing for X" is then a few integer ANDs and ORs, and the result is sorted
+    by a precomputed topological rank so every course comes after its prerequisites.
+    """
+
+    def __init__(self, courses):
+        """
+        Args:
+            courses: Courses or course dicts with "code", "name" and "prerequisites" (as in CourseDatabase)
+        """
+        self.codes = []
+        self.names = {}
+        self.index = {}
+        self._by_name = None  # lowercased course name -> code, built on first completed_codes()
+        direct = []
+
+        def node(code):
+            key = normalize_course_code(code)
+            if key not in self.index:
+                self.index[key] = len(self.codes)
+                self.codes.append(code)
+                direct.append([])
+            return self.index[key]
+
+        for course in courses:
+            i = node(course["code"])
+            self.codes[i] = course["code"]
+            self.names[i] = course.get("name", "")
+            direct[i] = [node(prereq) for prereq in course.get("prerequisites", [])]
+
+        self.topo_order = self._topological_order(direct)
+        self.topo_rank = [0] * len(self.codes)
+        for rank, i in enumerate(self.topo_order):
+            self.topo_rank[i] = rank
+        self.closure = self._transitive_closure(direct)
+        # Courses that (transitively) require themselves; the catalog data is inconsistent for these
+        self.cyclic = [self.codes[i] for i, bits in enumerate(self.closure) if bits >> i & 1]
+
+    def _topological_order(self, direct):
+        """Kahn's algorithm; courses on or behind a cycle are appended at the end."""
+        dependents = [[] for _ in direct]
+        remaining = [len(prereqs) for prereqs in direct]
+        for i, prereqs in enumerate(direct):
+            for prereq in prereqs:
+                dependents[prereq].append(i)
+
+        order = [i for i, count in enumerate(remaining) if count == 0]
+        for i in order:
+            for dependent in dependents[i]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    order.append(dependent)
+
+        unordered = [i for i, count in enumerate(remaining) if count > 0]
+        self._unordered = len(unordered)
+        return order + unordered
+
+    def _transitive_closure(self, direct):
+        closure = [0] * len(direct)
+        for i in self.topo_order:
+            bits = 0
+            for prereq in direct[i]:
+                bits |= (1 << prereq) | closure[prereq]
+            closure[i] = bits
+
+        # Courses in a cycle need a fixpoint pass since no order satisfies them all
+        changed = self._unordered > 0
+        while changed:
+            changed = False
+            for i in self.topo_order:
+                bits = closure[i]
+                for prereq in direct[i]:
+                    bits |= (1 << prereq) | closure[prereq]
+                if bits != closure[i]:
+                    closure[i] = bits
+                    changed = True
+        return closure
+
+    def _codes_in(self, bits):
+        """Codes of the courses in a bitset, in topological order."""
+        # Scanning the binary string is linear in the number of courses; clearing the
+        # lowest bit one at a time copies the whole int for every member instead
+        digits = bin(bits)[:1:-1]  # lowest bit first
+        indices = []
+        i = digits.find("1")
+        while i >= 0:
+            indices.append(i)
+            i = digits.find("1", i + 1)
+        indices.sort(key=self.topo_rank.__getitem__)
+        return [self.codes[i] for i in indices]
+
+    def _completed_bits(self, completed_codes):
+        """Completed courses plus everything they require, as a bitset."""
+        bits = 0
+        for code in completed_codes:
+            i = self.index.get(normalize_course_code(code))
+            if i is not None:
+                bits |= (1 << i) | self.closure[i]
+        return bits
+
+    def has_course(self, code):
+        return normalize_course_code(code) in self.index
+
+    def completed_codes(self, prior_courses):
+        """Map a student's prior courses (codes or exact course names) to known course codes."""
+        by_name = self._by_name
+        if by_name is None:
+            by_name = self._by_name = {name.strip().lower(): self.codes[i] for i, name in self.names.items() if name}
+        codes = []
+        for course in prior_courses:
+            if self.has_course(course):
+                codes.append(self.codes[self.index[normalize_course_code(course)]])
+            elif course.strip().lower() in by_name:
+                codes.append(by_name[course.strip().lower()])
+        return codes
+
+    def prerequisite_chain(self, target_code):
+        """
+        All transitive prerequisites of a course, in a valid order to take them.
+
+        Returns:
+            list: Course codes, each after its own prerequisites (empty for unknown codes)
+        """
+        i = self.index.get(normalize_course_code(target_code))
+        if i is None:
+            return []
+        return self._codes_in(self.closure[i] & ~(1 << i))
+
+    def missing_prerequisites(self, target_code, completed_codes):
+        """
+        Prerequisites of target still needed given completed courses, in a valid order.
+
+        A completed course counts as satisfying its own prerequisites as well.
+
+        Args:
+            target_code: Code of the course the student wants to take
+            completed_codes: Codes of courses the student has completed
+
+        Returns:
+            list: Missing course codes, each after its own prerequisites
+        """
+        i = self.index.get(normalize_course_code(target_code))
+        if i is None:
+            return []
+        return self._codes_in(self.closure[i] & ~(1 << i) & ~self._completed_bits(completed_codes))
+
+    def find_courses(self, text, max_matches=3):
+        """
+        Resolve a target course given as a code or as (part of) a course name.
+
+        An exact name match wins; only when no name matches exactly are names
+        containing the text used, so a short target such as "Data" does not
+        pull in every course mentioning it.
+
+        Args:
+            text: Course code, course name or part of a name
+            max_matches: Most partial-name matches to return
+
+        Returns:
+            list: Matching course codes (empty if nothing matches)
+        """
+        if self.has_course(text):
+            return [self.codes[self.index[normalize_course_code(text)]]]
+        needle = text.strip().lower()
+        if not needle:
+            return []
+        exact = [self.codes[i] for i, name in self.names.items() if name.lower() == needle]
+        if exact:
+            return exact
+        return [self.codes[i] for i, name in self.names.items() if needle in name.lower()][:max_matches]
+
+    def describe_missing_prerequisites(self, target_course, completed_codes):
+        """
+        Render the missing prerequisite chain for a target as prompt-ready text.
+
+        Returns:
+            str: One line per matching target course, or "" if the target is not in the graph
+        """
+        lines = []
+        for code in self.find_courses(target_course):
+            missing = self.missing_prerequisites(code, completed_codes)
+            name = self.names.get(self.index[normalize_course_code(code)], "")
+            label = f"{code} ({name})" if name else code
+            if missing:
+                lines.append(f"- {label}: take {' -> '.join(missing)}")
+            else:
+                lines.append(f"- {label}: all prerequisites satisfied")
+        return "\n".join(lines)
+
+
+def describe_prerequisite_gaps(student, target_course, course_db):
+    """
+    Missing prerequisite chains for a student's target, for use in prompts.
+
+    Returns:
+        str: Prompt-ready lines, or "" if the course database has no graph or the target is unknown
+    """
+    get_graph = getattr(course_db, "get_prerequisite_graph", None)
+    if get_graph is None:
+        return ""
+    graph = get_graph()
+    return graph.describe_missing_prerequisites(target_course, graph.completed_codes(student.prior_courses))
+
+
+def structural_plan(student, target_course, course_db):
+    """
+    Answer "what do I need to take before X" from the prerequisite graph alone, without an LLM.
+
+    Returns:
+        str or None: The ordered course sequence, or None if the target is not in the catalog
+    """
+    gaps = describe_prerequisite_gaps(student, target_course, course_db)
+    if not gaps:
+        return None
+    return f"Prerequisite plan for {target_course} (courses in the order to take them):\n{gaps}"
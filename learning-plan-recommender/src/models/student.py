@@ -1,16 +1,31 @@
+import sys
+
+
 class Student:
+    # No per-instance dict; department, level and course strings are interned since
+    # batch jobs create many students that repeat the same few values
+    __slots__ = ("_prior_courses", "department", "degree_level")
+
     def __init__(self, prior_courses=None, department="", degree_level=""):
-        self.prior_courses = prior_courses if prior_courses else []
-        self.department = department
-        self.degree_level = degree_level
-    
+        self.prior_courses = prior_courses
+        self.department = sys.intern(str(department or ""))
+        self.degree_level = sys.intern(str(degree_level or ""))
+
+    @property
+    def prior_courses(self):
+        return self._prior_courses
+
+    @prior_courses.setter
+    def prior_courses(self, courses):
+        self._prior_courses = [sys.intern(str(course)) for course in courses] if courses else []
+
     def to_dict(self):
         return {
             "prior_courses": self.prior_courses,
             "department": self.department,
             "degree_level": self.degree_level
         }
-    
+
     def __str__(self):
         return (f"Student in {self.department} department, {self.degree_level} level, "
-                f"with prior courses: {', '.join(self.prior_courses)}")
\ No newline at end of file
+                f"with prior courses: {', '.join(self.prior_courses)}")
@@ -0,0 +1,218 @@
+import csv
+import json
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from src.models.student import Student
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list (0.0 for an empty list)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _normalize_row(row, position):
+    """
+    Validate one input row and normalize it.
+
+    Raises:
+        ValueError: If a field has the wrong type or target_course is missing
+    """
+    prior_courses = row.get("prior_courses") or []
+    if isinstance(prior_courses, str):
+        prior_courses = prior_courses.replace(";", ",").split(",")
+    if not isinstance(prior_courses, list) or not all(isinstance(course, str) for course in prior_courses):
+        raise ValueError("prior_courses must be a string or a list of strings")
+    for field in ("department", "degree_level", "target_course"):
+        if not isinstance(row.get(field) or "", str):
+            raise ValueError(f"{field} must be a string")
+    target_course = (row.get("target_course") or "").strip()
+    if not target_course:
+        raise ValueError("target_course is missing")
+    return {
+        "id": str(row.get("id") or position),
+        "prior_courses": [course.strip() for course in prior_courses if course.strip()],
+        "department": (row.get("department") or "").strip(),
+        "degree_level": (row.get("degree_level") or "").strip().capitalize(),
+        "target_course": target_course,
+    }
+
+
+def _read_jsonl(f):
+    """Yield the parsed rows of a JSONL file; a line that is not valid JSON yields a ValueError instead."""
+    for line_number, line in enumerate(f, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield ValueError(f"Invalid JSON on line {line_number}: {e}")
+
+
+def read_batch_rows(input_path):
+    """
+    Stream student rows from a CSV or JSONL file.
+
+    Each row needs department, degree_level and target_course; prior_courses may
+    be a list or a comma/semicolon separated string. Rows without an "id" are
+    numbered by their position so runs can be resumed. A row that fails
+    validation, or a JSONL line that does not parse, is yielded with an
+    "error" message instead of its fields, so it fails on its own without
+    stopping the batch.
+
+    Args:
+        input_path: Path to a .csv or .jsonl file
+
+    Yields:
+        dict: Normalized rows with id, prior_courses, department, degree_level, target_course
+            (or id, target_course and error for invalid rows)
+    """
+    is_csv = input_path.lower().endswith(".csv")
+    with open(input_path, "r", encoding="utf-8", newline="") as f:
+        rows = csv.DictReader(f) if is_csv else _read_jsonl(f)
+        for position, row in enumerate(rows, start=1):
+            if not isinstance(row, dict):
+                error = str(row) if isinstance(row, ValueError) else "Row must be a JSON object"
+                yield {"id": str(position), "target_course": "", "error": error}
+                continue
+            try:
+                yield _normalize_row(row, position)
+            except ValueError as e:
+                target_course = row.get("target_course")
+                yield {
+                    "id": str(row.get("id") or position),
+                    "target_course": target_course if isinstance(target_course, str) else "",
+                    "error": f"Invalid row: {e}",
+                }
+
+
+def load_completed_ids(output_path):
+    """Return the ids of rows already written successfully to a results file."""
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue  # a partially written last line from a crashed run
+            if result.get("status") == "ok":
+                completed.add(str(result["id"]))
+    return completed
+
+
+def _ends_with_newline(path):
+    """True if the file is empty or its last byte is a newline."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            return True
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+class BatchPlanRunner:
+    """
+    Generate learning plans for a file of students with bounded concurrency.
+
+    Results are appended to a JSONL file as each row finishes, so the output
+    doubles as a checkpoint: on restart, rows already written with status "ok"
+    are skipped and failed rows are retried. If a CourseNameIndex is given,
+    prior courses are canonicalized to catalog codes before generation.
+    """
+
+    def __init__(self, plan_generator, course_db, workers=4, name_index=None):
+        self.plan_generator = plan_generator
+        self.course_db = course_db
+        self.workers = max(1, workers)
+        self.name_index = name_index
+
+    def run(self, input_path, output_path, progress_every=50):
+        """
+        Run the batch.
+
+        Args:
+            input_path: CSV or JSONL file of students and target courses
+            output_path: JSONL file results are appended to
+            progress_every: Print a progress line after this many finished rows
+
+        Returns:
+            dict: Summary with counts, throughput and latency percentiles
+        """
+        completed = load_completed_ids(output_path)
+        latencies = []
+        counts = {"ok": 0, "error": 0, "skipped": 0}
+        started = time.perf_counter()
+
+        with open(output_path, "a", encoding="utf-8") as output, ThreadPoolExecutor(self.workers) as executor:
+            # Terminate a line left half-written by a crashed run before appending
+            if not _ends_with_newline(output_path):
+                output.write("\n")
+
+            # Results are recorded from this thread only, so the file needs no lock
+            def record(future):
+                result = future.result()
+                output.write(json.dumps(result) + "\n")
+                output.flush()
+                counts[result["status"]] += 1
+                latencies.append(result["latency_seconds"])
+                finished = counts["ok"] + counts["error"]
+                if progress_every and finished % progress_every == 0:
+                    print(f"{finished} plans written ({counts['error']} errors)")
+
+            pending = set()
+            for row in read_batch_rows(input_path):
+                if row["id"] in completed:
+                    counts["skipped"] += 1
+                    continue
+                # Keep at most two rows per worker in flight so huge inputs are streamed, not buffered
+                if len(pending) >= self.workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        record(future)
+                pending.add(executor.submit(self._generate_row, row))
+
+            for future in pending:
+                record(future)
+
+        elapsed = time.perf_counter() - started
+        latencies.sort()
+        processed = counts["ok"] + counts["error"]
+        return {
+            "processed": processed,
+            "ok": counts["ok"],
+            "errors": counts["error"],
+            "skipped": counts["skipped"],
+            "elapsed_seconds": elapsed,
+            "throughput_per_second": processed / elapsed if elapsed > 0 else 0.0,
+            "latency_p50": percentile(latencies, 50),
+            "latency_p95": percentile(latencies, 95),
+            "latency_p99": percentile(latencies, 99),
+        }
+
+    def _generate_row(self, row):
+        if "error" in row:
+            return {"id": row["id"], "status": "error", "target_course": row["target_course"],
+                    "error": row["error"], "latency_seconds": 0.0}
+        prior_courses = row["prior_courses"]
+        if self.name_index is not None:
+            prior_courses = self.name_index.canonicalize(prior_courses)
+        student = Student(
+            prior_courses=prior_courses,
+            department=row["department"],
+            degree_level=row["degree_level"]
+        )
+        started = time.perf_counter()
+        try:
+            plan = self.plan_generator.generate_plan(student, row["target_course"], self.course_db)
+            result = {"id": row["id"], "status": "ok", "target_course": row["target_course"], "plan": plan}
+        except Exception as e:
+            result = {"id": row["id"], "status": "error", "target_course": row["target_course"], "error": str(e)}
+        result["latency_seconds"] = time.perf_counter() - started
+        return result
@@ -0,0 +1,110 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+
+CACHE_FORMAT_VERSION = 1
+
+
+def file_content_hash(path, block_size=1 << 20):
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class CatalogTextCache:
+    """
+    On-disk cache of text extracted from catalog PDFs.
+
+    Entries are stored as gzip-compressed JSON files named after the SHA-256 of
+    the PDF, holding the extracted text and the start offset of every page. A
+    small manifest maps each PDF path to its last seen mtime, size and hash, so
+    a warm start with an unchanged file skips both hashing and PDF parsing.
+    """
+
+    MANIFEST_NAME = "catalog_manifest.json"
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+
+    def get(self, pdf_path):
+        """
+        Look up the extracted text for a PDF.
+
+        Args:
+            pdf_path: Path to the catalog PDF
+
+        Returns:
+            tuple or None: (text, page_offsets), or None on a cache miss
+        """
+        content_hash = self._content_hash(pdf_path)
+        try:
+            with gzip.open(self._entry_path(content_hash), "rt", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if entry.get("version") != CACHE_FORMAT_VERSION:
+            return None
+        return entry["text"], entry["page_offsets"]
+
+    def put(self, pdf_path, text, page_offsets):
+        """
+        Store the extracted text for a PDF.
+
+        Args:
+            pdf_path: Path to the catalog PDF
+            text: The extracted catalog text
+            page_offsets: Start offset of every page in text
+        """
+        content_hash = self._content_hash(pdf_path)
+        entry = {"version": CACHE_FORMAT_VERSION, "text": text, "page_offsets": page_offsets}
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entry_path = self._entry_path(content_hash)
+        tmp_path = f"{entry_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+            json.dump(entry, f, separators=(",", ":"))
+        os.replace(tmp_path, entry_path)
+
+    def _entry_path(self, content_hash):
+        return os.path.join(self.cache_dir, f"catalog_text_{content_hash}.json.gz")
+
+    def _content_hash(self, pdf_path):
+        """Return the content hash of a PDF, reusing the manifest when path, mtime and size are unchanged."""
+        key = os.path.abspath(pdf_path)
+        stat = os.stat(pdf_path)
+
+        with self._lock:
+            manifest = self._read_manifest()
+            known = manifest.get(key)
+            if known and known["mtime_ns"] == stat.st_mtime_ns and known["size"] == stat.st_size:
+                return known["sha256"]
+
+            content_hash = file_content_hash(pdf_path)
+            manifest[key] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": content_hash}
+            try:
+                self._write_manifest(manifest)
+            except OSError as e:
+                print(f"Warning: Could not update catalog cache manifest: {e}")
+            return content_hash
+
+    def _read_manifest(self):
+        try:
+            with open(os.path.join(self.cache_dir, self.MANIFEST_NAME), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_manifest(self, manifest):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = os.path.join(self.cache_dir, self.MANIFEST_NAME)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
@@ -0,0 +1,245 @@
+import hashlib
+import heapq
+import json
+import math
+import os
+import re
+import threading
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# A line that opens a new course entry, e.g. "CSCI 632. Machine Learning." or "Engr 691 ..."
+SECTION_HEADING_PATTERN = re.compile(r"^[A-Z][A-Za-z]{1,4}\s*[-]?\s*\d{3,4}[A-Z]?\b", re.MULTILINE)
+
+INDEX_FORMAT_VERSION = 1
+
+
+def tokenize(text):
+    """Split text into lowercase alphanumeric tokens."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def text_fingerprint(text):
+    """Return a stable fingerprint for a catalog text, used to validate persisted indexes."""
+    return hashlib.sha1(text.encode("utf-8", errors="ignore")).hexdigest()
+
+
+def chunk_catalog(text, page_offsets=None, max_chunk_chars=1200):
+    """
+    Split the catalog into page and section chunks.
+
+    Pages are split first (using the page start offsets), then each page is split
+    at course headings. Small sections are merged and oversized ones are cut at
+    line boundaries so every chunk stays close to max_chunk_chars.
+
+    Args:
+        text: The full catalog text
+        page_offsets: Start offset of every page in text (defaults to one page)
+        max_chunk_chars: Soft upper bound on the size of a chunk
+
+    Returns:
+        list: (start, end, page_number) tuples covering the text
+    """
+    page_offsets = list(page_offsets or [0])
+    page_bounds = list(zip(page_offsets, page_offsets[1:] + [len(text)]))
+
+    chunks = []
+    for page_number, (page_start, page_end) in enumerate(page_bounds):
+        page_text = text[page_start:page_end]
+        cuts = [0] + [m.start() for m in SECTION_HEADING_PATTERN.finditer(page_text) if m.start() > 0]
+        cuts.append(len(page_text))
+
+        chunk_start = None
+        chunk_end = None
+        for section_start, section_end in zip(cuts, cuts[1:]):
+            if chunk_start is not None and section_end - chunk_start > max_chunk_chars:
+                chunks.extend(_split_long_span(page_text, chunk_start, chunk_end, page_start, page_number, max_chunk_chars))
+                chunk_start = None
+            if chunk_start is None:
+                chunk_start = section_start
+            chunk_end = section_end
+        if chunk_start is not None:
+            chunks.extend(_split_long_span(page_text, chunk_start, chunk_end, page_start, page_number, max_chunk_chars))
+
+    return [chunk for chunk in chunks if text[chunk[0]:chunk[1]].strip()]
+
+
+def _split_long_span(page_text, start, end, page_start, page_number, max_chunk_chars):
+    """Cut a span of a page at line boundaries so no piece is much larger than max_chunk_chars."""
+    pieces = []
+    while end - start > max_chunk_chars:
+        cut = page_text.rfind("\n", start, start + max_chunk_chars)
+        if cut <= start:
+            cut = start + max_chunk_chars
+        pieces.append((page_start + start, page_start + cut, page_number))
+        start = cut
+    pieces.append((page_start + start, page_start + end, page_number))
+    return pieces
+
+
+class CatalogIndex:
+    """
+    Tokenized inverted index over catalog chunks with BM25 ranking.
+
+    The index is built once from the catalog text. Each term maps to a posting
+    list of (chunk id, term frequency) pairs, so a query only touches the chunks
+    that contain its terms instead of scanning the whole catalog.
+    """
+
+    def __init__(self, chunks, postings, chunk_lengths, fingerprint="", k1=1.5, b=0.75):
+        self.chunks = chunks
+        self.postings = postings
+        self.chunk_lengths = chunk_lengths
+        self.fingerprint = fingerprint
+        self.k1 = k1
+        self.b = b
+
+        doc_count = len(chunks)
+        average_length = (sum(chunk_lengths) / doc_count) if doc_count else 0.0
+
+        # Precompute the per-term idf and per-chunk length normalisation once
+        self.idf = {
+            term: math.log(1 + (doc_count - len(ids) + 0.5) / (len(ids) + 0.5))
+            for term, (ids, _) in postings.items()
+        }
+        self.length_norm = [
+            k1 * (1 - b + b * (length / average_length if average_length else 0.0))
+            for length in chunk_lengths
+        ]
+
+    @classmethod
+    def build(cls, text, page_offsets=None, max_chunk_chars=1200, k1=1.5, b=0.75):
+        """
+        Build an index from catalog text.
+
+        Args:
+            text: The full catalog text
+            page_offsets: Start offset of every page in text
+            max_chunk_chars: Soft upper bound on the size of a chunk
+            k1: BM25 term frequency saturation
+            b: BM25 length normalisation
+
+        Returns:
+            CatalogIndex: The built index
+        """
+        chunks = chunk_catalog(text, page_offsets, max_chunk_chars)
+        postings = {}
+        chunk_lengths = []
+
+        for chunk_id, (start, end, _) in enumerate(chunks):
+            tokens = tokenize(text[start:end])
+            chunk_lengths.append(len(tokens))
+
+            counts = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, count in counts.items():
+                ids, tfs = postings.setdefault(token, ([], []))
+                ids.append(chunk_id)
+                tfs.append(count)
+
+        return cls(chunks, postings, chunk_lengths, text_fingerprint(text), k1, b)
+
+    def search(self, query, top_k=5):
+        """
+        Rank chunks against a query with BM25.
+
+        Args:
+            query: Free-text query
+            top_k: Maximum number of chunks to return
+
+        Returns:
+            list: (chunk_id, score) tuples, best first
+        """
+        scores = {}
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            idf = self.idf[term]
+            for chunk_id, tf in zip(*posting):
+                score = idf * tf * (self.k1 + 1) / (tf + self.length_norm[chunk_id])
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + score
+
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+    def search_batch(self, queries, top_k=5):
+        """Rank chunks for several queries; returns one search() result per query."""
+        return [self.search(query, top_k) for query in queries]
+
+    def save(self, path):
+        """Persist the index as JSON."""
+        data = {
+            "version": INDEX_FORMAT_VERSION,
+            "fingerprint": self.fingerprint,
+            "k1": self.k1,
+            "b": self.b,
+            "chunks": self.chunks,
+            "chunk_lengths": self.chunk_lengths,
+            "postings": self.postings,
+        }
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Write to a temporary file first so a crash never leaves a half-written index
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, fingerprint=None):
+        """
+        Load a persisted index.
+
+        Args:
+            path: Path written by save()
+            fingerprint: Expected catalog fingerprint; a mismatch is treated as missing
+
+        Returns:
+            CatalogIndex or None: The index, or None if it is missing, stale or unreadable
+        """
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if data.get("version") != INDEX_FORMAT_VERSION:
+            return None
+        if fingerprint is not None and data.get("fingerprint") != fingerprint:
+            return None
+
+        chunks = [tuple(chunk) for chunk in data["chunks"]]
+        postings = {term: (ids, tfs) for term, (ids, tfs) in data["postings"].items()}
+        return cls(chunks, postings, data["chunk_lengths"], data["fingerprint"], data["k1"], data["b"])
+
+    @classmethod
+    def load_or_build(cls, text, page_offsets=None, cache_dir=None):
+        """
+        Load the index for this catalog text from cache_dir, building and saving it if needed.
+
+        Args:
+            text: The full catalog text
+            page_offsets: Start offset of every page in text
+            cache_dir: Directory for persisted indexes (no persistence if None)
+
+        Returns:
+            CatalogIndex: The index for text
+        """
+        fingerprint = text_fingerprint(text)
+        path = os.path.join(cache_dir, f"catalog_index_{fingerprint}.json") if cache_dir else None
+
+        if path:
+            index = cls.load(path, fingerprint)
+            if index is not None:
+                return index
+
+        index = cls.build(text, page_offsets)
+        if path:
+            try:
+                index.save(path)
+            except OSError as e:
+                print(f"Warning: Could not save catalog index: {e}")
+        return index
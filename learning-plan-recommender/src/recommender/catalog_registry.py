@@ -0,0 +1,539 @@
+"""
+Registry of catalog PDFs in a directory, indexed incrementally for BM25 search.
+
+Every college's catalog and every term's edition is a PDF in one directory tree,
+e.g. engineering/2024-2025.pdf or business_2025.pdf. The catalog name and year
+are taken from the file's relative path, so queries can be limited to some
+catalogs or years:
+
+    registry = CatalogRegistry("catalogs", cache_dir=".cache")
+    registry.refresh()
+    hits = registry.search("machine learning", catalogs="engineering", years=2025)
+
+refresh() only extracts PDFs whose content changed, spreading their pages over
+a process pool, and only re-tokenizes pages whose text changed. The extracted
+pages and their term counts are persisted per PDF content hash, so a restart
+loads the index without parsing or tokenizing anything.
+"""
+
+import concurrent.futures
+import gzip
+import hashlib
+import heapq
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import re
+import threading
+import time
+
+from config.config import Config
+from src.recommender.catalog_cache import file_content_hash
+from src.recommender.catalog_index import chunk_catalog, text_fingerprint, tokenize
+from src.recommender.telemetry import METRICS, span
+
+REGISTRY_FORMAT_VERSION = 1
+YEAR_PATTERN = re.compile(r"(?<!\d)((?:19|20)\d{2})(?:\s*[-_/]\s*(?:\d{2}|\d{4}))?(?!\d)")
+
+
+def _extract_page_range(path, first, last):
+    """Extract the text of pages [first, last) of a PDF (runs in the extraction pool)."""
+    import fitz  # PyMuPDF
+
+    with fitz.open(path) as document:
+        return [document[page_number].get_text() for page_number in range(first, last)]
+
+
+def _page_count(path):
+    import fitz  # PyMuPDF
+
+    with fitz.open(path) as document:
+        return document.page_count
+
+
+def catalog_name_and_year(catalog_id):
+    """
+    Split a catalog id (its path relative to the registry directory) into a name and a year.
+
+    "engineering/2024-2025" -> ("engineering", 2024), "business_2025" -> ("business", 2025),
+    "graduate" -> ("graduate", None).
+    """
+    match = YEAR_PATTERN.search(catalog_id)
+    if not match:
+        return catalog_id, None
+    name = catalog_id[:match.start()] + catalog_id[match.end():]
+    name = re.sub(r"[\s_\-./]+$", "", re.sub(r"[\s_\-.]+/", "/", name)).strip("/ _-.")
+    return name or catalog_id, int(match.group(1))
+
+
+def index_page(text, max_chunk_chars=1200):
+    """
+    Chunk one page and count the terms of every chunk.
+
+    Returns:
+        list: [start, end, token_count, {term: frequency}] per chunk, offsets relative to the page
+    """
+    chunks = []
+    for start, end, _ in chunk_catalog(text, [0], max_chunk_chars):
+        tokens = tokenize(text[start:end])
+        counts = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        chunks.append([start, end, len(tokens), counts])
+    return chunks
+
+
+class CatalogView:
+    """
+    One snapshot of some of the registry's catalogs, shaped like a single catalog.
+
+    text and page_offsets concatenate the selected catalogs in id order, and the
+    view exposes chunks, search() and search_batch() like CatalogIndex, so the RAG
+    generator can use it in place of a single-PDF catalog. sources names the
+    catalog and page behind every page of text. A view does not follow later
+    refreshes; take a new one after refresh() reports changes.
+    """
+
+    def __init__(self, registry, catalog_ids):
+        self.registry = registry
+        self.catalog_ids = list(catalog_ids)
+        self.page_offsets = []
+        self.sources = []
+        self.chunks = []
+        self._chunk_ids = {}
+        pages = []
+        offset = 0
+        for catalog_id in self.catalog_ids:
+            for page_number, page in enumerate(registry._catalogs[catalog_id]["pages"]):
+                global_page = len(self.page_offsets)
+                self.page_offsets.append(offset)
+                self.sources.append((catalog_id, page_number))
+                for uid, (start, end, _, _) in zip(page["uids"], page["chunks"]):
+                    self._chunk_ids[uid] = len(self.chunks)
+                    self.chunks.append((offset + start, offset + end, global_page))
+                pages.append(page["text"])
+                offset += len(page["text"])
+        self.text = "".join(pages)
+        self.page_offsets = self.page_offsets or [0]
+        self.fingerprint = text_fingerprint(self.text)
+
+    def search(self, query, top_k=5):
+        """Rank the view's chunks against a query; returns (chunk_id, score) tuples, best first."""
+        return self.search_batch([query], top_k)[0]
+
+    def search_batch(self, queries, top_k=5):
+        """Rank chunks for several queries; returns one search() result per query."""
+        ranked_lists = self.registry._rank_batch(queries, top_k, self.catalog_ids)
+        return [
+            [(self._chunk_ids[uid], score) for uid, score in ranked if uid in self._chunk_ids]
+            for ranked in ranked_lists
+        ]
+
+
+class CatalogRegistry:
+    """
+    Incremental BM25 index over every catalog PDF under a directory.
+
+    Chunks of all catalogs share one inverted index whose posting lists are
+    dicts, so the pages of a changed PDF are removed and re-added in place
+    instead of rebuilding the index. Idf and length normalisation are computed
+    at query time from the live document counts. refresh() reads, extracts
+    and tokenizes changed PDFs without the registry lock and only takes it to
+    swap the new pages into the index, so searches keep running during a
+    refresh. Refreshes themselves run one at a time.
+    """
+
+    STATE_NAME = "catalog_registry.json"
+
+    def __init__(self, catalog_dir, cache_dir=None, processes=None, pages_per_task=16, k1=1.5, b=0.75):
+        """
+        Args:
+            catalog_dir: Directory searched recursively for *.pdf catalogs
+            cache_dir: Where extracted pages and term counts are persisted (defaults to Config.CACHE_DIR)
+            processes: Extraction processes (defaults to Config.CATALOG_EXTRACT_PROCESSES; 1 = in-process)
+            pages_per_task: Pages extracted per pool task
+            k1: BM25 term frequency saturation
+            b: BM25 length normalisation
+        """
+        self.catalog_dir = catalog_dir
+        self.cache_dir = os.path.join(cache_dir or Config.CACHE_DIR, "catalog_registry")
+        self.processes = processes or Config.CATALOG_EXTRACT_PROCESSES
+        self.pages_per_task = pages_per_task
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._catalogs = {}  # catalog id -> file stat, content hash, name, year and pages
+        self._postings = {}  # term -> {chunk uid: term frequency}
+        self._chunks = {}  # chunk uid -> [catalog id, page number, token count]
+        self._total_length = 0
+        self._uids = itertools.count()
+        self._load_state()
+
+    def catalogs(self):
+        """
+        List the indexed catalogs.
+
+        Returns:
+            list: {"id", "name", "year", "pages", "path"} dicts sorted by id
+        """
+        with self._lock:
+            return [
+                {"id": catalog_id, "name": entry["name"], "year": entry["year"],
+                 "pages": len(entry["pages"]), "path": entry["path"]}
+                for catalog_id, entry in sorted(self._catalogs.items())
+            ]
+
+    def refresh(self):
+        """
+        Bring the index up to date with the catalog directory.
+
+        New and changed PDFs are extracted in parallel; within a changed PDF only
+        pages whose text hash changed are re-chunked and re-tokenized. Unchanged
+        files are recognised by mtime and size without being read.
+
+        Returns:
+            dict: Catalog ids "added", "updated" and "removed", plus "unchanged",
+            "pages_extracted", "pages_indexed" and "seconds"
+        """
+        started = time.perf_counter()
+        with span("catalog_refresh", metric="catalog_refresh_duration_seconds") as refresh_span, self._refresh_lock:
+            # Only refresh() changes the catalogs, so this snapshot stays current until the swap below
+            with self._lock:
+                known = {catalog_id: dict(entry) for catalog_id, entry in self._catalogs.items()}
+            found = self._discover()
+            removed = sorted(set(known) - set(found))
+
+            changed, touched = {}, {}
+            for catalog_id, path in found.items():
+                entry = known.get(catalog_id)
+                stat = os.stat(path)
+                if entry and (entry["mtime_ns"], entry["size"]) == (stat.st_mtime_ns, stat.st_size):
+                    continue
+                content_hash = file_content_hash(path)
+                if entry and entry["sha256"] == content_hash:
+                    touched[catalog_id] = stat
+                    continue
+                changed[catalog_id] = (path, stat, content_hash)
+
+            summary = {"added": [], "updated": [], "removed": removed, "pages_extracted": 0, "pages_indexed": 0}
+            stored = {catalog_id: self._read_pages(content_hash) for catalog_id, (_, _, content_hash) in changed.items()}
+            to_extract = {catalog_id: changed[catalog_id][0] for catalog_id, pages in stored.items() if pages is None}
+            extracted = self._extract(to_extract)
+            summary["pages_extracted"] = sum(len(texts) for texts in extracted.values() if texts is not None)
+
+            entries = {}
+            for catalog_id, (path, stat, content_hash) in sorted(changed.items()):
+                summary["updated" if catalog_id in known else "added"].append(catalog_id)
+                pages, extracted_ok = stored[catalog_id], True
+                if pages is None and extracted[catalog_id] is None:
+                    # Record neither its pages nor its mtime and hash, so the next refresh extracts it again
+                    pages, extracted_ok = [], False
+                elif pages is None:
+                    previous = known[catalog_id]["pages"] if catalog_id in known else []
+                    pages, indexed = self._reindex_pages(extracted[catalog_id], previous)
+                    summary["pages_indexed"] += indexed
+                    self._write_pages(content_hash, pages)
+                name, year = catalog_name_and_year(catalog_id)
+                entries[catalog_id] = {
+                    "path": os.path.relpath(path, self.catalog_dir),
+                    "mtime_ns": stat.st_mtime_ns if extracted_ok else None, "size": stat.st_size,
+                    "sha256": content_hash if extracted_ok else None, "name": name, "year": year, "pages": pages,
+                }
+
+            with self._lock:
+                for catalog_id in removed:
+                    self._drop_catalog(catalog_id)
+                for catalog_id, stat in touched.items():
+                    self._catalogs[catalog_id]["mtime_ns"], self._catalogs[catalog_id]["size"] = stat.st_mtime_ns, stat.st_size
+                for catalog_id, entry in entries.items():
+                    self._drop_catalog(catalog_id)
+                    self._catalogs[catalog_id] = entry
+                    for page_number, page in enumerate(entry["pages"]):
+                        self._add_page(catalog_id, page_number, page)
+                state = self._state() if changed or removed or touched else None
+
+            if state is not None:
+                self._save_state(state)
+            summary["unchanged"] = len(found) - len(changed)
+            summary["seconds"] = time.perf_counter() - started
+            refresh_span.set(**{key: len(value) if isinstance(value, list) else value for key, value in summary.items()})
+        METRICS.inc("catalog_pages_extracted_total", summary["pages_extracted"])
+        METRICS.inc("catalog_pages_indexed_total", summary["pages_indexed"])
+        return summary
+
+    def select(self, catalogs=None, years=None):
+        """
+        Resolve catalog and year filters to catalog ids.
+
+        Args:
+            catalogs: Catalog name or id, or a list of them (None = all)
+            years: Year or list of years (None = all)
+
+        Returns:
+            list: Matching catalog ids, sorted
+        """
+        if isinstance(catalogs, str):
+            catalogs = [catalogs]
+        if isinstance(years, (int, str)):
+            years = [years]
+        wanted_catalogs = set(catalogs) if catalogs else None
+        wanted_years = {int(year) for year in years} if years else None
+        return [
+            catalog_id for catalog_id, entry in sorted(self._catalogs.items())
+            if (wanted_catalogs is None or catalog_id in wanted_catalogs or entry["name"] in wanted_catalogs)
+            and (wanted_years is None or entry["year"] in wanted_years)
+        ]
+
+    def view(self, catalogs=None, years=None):
+        """Return a CatalogView over the catalogs matching the filters (see select())."""
+        with self._lock:
+            return CatalogView(self, self.select(catalogs, years))
+
+    def search(self, query, top_k=5, catalogs=None, years=None, context_size=0):
+        """
+        Rank chunks of the selected catalogs against a query with BM25.
+
+        Args:
+            query: Free-text query
+            top_k: Maximum number of hits
+            catalogs: Catalog name(s) or id(s) to search (None = all)
+            years: Catalog year(s) to search (None = all)
+            context_size: Characters of page text included around each chunk
+
+        Returns:
+            list: {"catalog", "name", "year", "page", "score", "text"} dicts, best first
+        """
+        with self._lock:
+            ranked = self._rank_batch_locked([query], top_k, self.select(catalogs, years))[0]
+            hits = []
+            for uid, score in ranked:
+                catalog_id, page_number, _ = self._chunks[uid]
+                entry = self._catalogs[catalog_id]
+                page = entry["pages"][page_number]
+                start, end = page["chunks"][page["uids"].index(uid)][:2]
+                hits.append({
+                    "catalog": catalog_id, "name": entry["name"], "year": entry["year"], "page": page_number,
+                    "score": score, "text": page["text"][max(0, start - context_size):end + context_size],
+                })
+            return hits
+
+    def _rank_batch(self, queries, top_k, catalog_ids):
+        with self._lock:
+            return self._rank_batch_locked(queries, top_k, catalog_ids)
+
+    def _rank_batch_locked(self, queries, top_k, catalog_ids):
+        """BM25-rank chunk uids of the given catalogs for each query; collection statistics span all catalogs."""
+        allowed = set(catalog_ids)
+        restrict = len(allowed) < len(self._catalogs)
+        doc_count = len(self._chunks)
+        average_length = self._total_length / doc_count if doc_count else 0.0
+        k1, b = self.k1, self.b
+
+        results = []
+        for query in queries:
+            scores = {}
+            for term in set(tokenize(query)):
+                posting = self._postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (doc_count - len(posting) + 0.5) / (len(posting) + 0.5))
+                for uid, tf in posting.items():
+                    catalog_id, _, length = self._chunks[uid]
+                    if restrict and catalog_id not in allowed:
+                        continue
+                    norm = k1 * (1 - b + b * (length / average_length if average_length else 0.0))
+                    scores[uid] = scores.get(uid, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+            results.append(heapq.nlargest(top_k, scores.items(), key=lambda item: item[1]))
+        return results
+
+    def _discover(self):
+        """Map catalog id (relative path without .pdf, "/"-separated) to path for every PDF in the directory."""
+        found = {}
+        if not os.path.isdir(self.catalog_dir):
+            print(f"Warning: Catalog directory not found at {self.catalog_dir}")
+            return found
+        for root, dirs, files in os.walk(self.catalog_dir):
+            dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+            for file_name in sorted(files):
+                if file_name.lower().endswith(".pdf") and not file_name.startswith("."):
+                    path = os.path.join(root, file_name)
+                    catalog_id = os.path.splitext(os.path.relpath(path, self.catalog_dir))[0].replace(os.sep, "/")
+                    found[catalog_id] = path
+        return found
+
+    def _extract(self, paths):
+        """
+        Extract the page texts of several PDFs, in parallel when there is enough work.
+
+        Returns:
+            dict: catalog id -> list of page texts, or None for a PDF that cannot be
+            opened or fails on any page
+        """
+        tasks, failed = [], set()
+        for catalog_id, path in paths.items():
+            try:
+                page_count = _page_count(path)
+            except Exception as e:
+                print(f"Warning: Could not open catalog {path}: {e}")
+                failed.add(catalog_id)
+                continue
+            for first in range(0, page_count, self.pages_per_task):
+                tasks.append((catalog_id, path, first, min(first + self.pages_per_task, page_count)))
+
+        results = {}
+
+        def collect(catalog_id, path, first, get_texts):
+            try:
+                results[(catalog_id, first)] = get_texts()
+            except Exception as e:
+                if catalog_id not in failed:
+                    print(f"Warning: Could not extract catalog {path}: {e}")
+                failed.add(catalog_id)
+
+        if self.processes <= 1 or len(tasks) <= 1:
+            for catalog_id, path, first, last in tasks:
+                collect(catalog_id, path, first, lambda: _extract_page_range(path, first, last))
+        else:
+            start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=min(self.processes, len(tasks)), mp_context=multiprocessing.get_context(start_method)
+            ) as executor:
+                futures = [
+                    (catalog_id, path, first, executor.submit(_extract_page_range, path, first, last))
+                    for catalog_id, path, first, last in tasks
+                ]
+                for catalog_id, path, first, future in futures:
+                    collect(catalog_id, path, first, future.result)
+
+        texts = {catalog_id: None if catalog_id in failed else [] for catalog_id in paths}
+        for catalog_id, _, first, _ in tasks:
+            if catalog_id not in failed:
+                texts[catalog_id].extend(results[(catalog_id, first)])
+        return texts
+
+    def _reindex_pages(self, page_texts, previous_pages):
+        """
+        Build the page records of a changed PDF, reusing the chunks of pages whose text did not change.
+
+        Args:
+            page_texts: Page texts of the new version of the PDF
+            previous_pages: Page records of the indexed version ([] for a new PDF)
+
+        Returns:
+            tuple: (pages, number of pages that were chunked and tokenized)
+        """
+        previous = {}
+        for page in previous_pages:
+            previous.setdefault(page["hash"], page)
+        pages, indexed = [], 0
+        for text in page_texts:
+            page_hash = hashlib.sha1(text.encode("utf-8", errors="ignore")).hexdigest()
+            known = previous.get(page_hash)
+            if known is None:
+                chunks = index_page(text)
+                indexed += 1
+            else:
+                chunks = known["chunks"]
+            pages.append({"hash": page_hash, "text": text, "chunks": chunks, "uids": []})
+        return pages, indexed
+
+    def _add_page(self, catalog_id, page_number, page):
+        uids = []
+        for _, _, length, counts in page["chunks"]:
+            uid = next(self._uids)
+            self._chunks[uid] = (catalog_id, page_number, length)
+            self._total_length += length
+            for term, tf in counts.items():
+                self._postings.setdefault(term, {})[uid] = tf
+            uids.append(uid)
+        page["uids"] = uids
+
+    def _drop_catalog(self, catalog_id):
+        entry = self._catalogs.pop(catalog_id, None)
+        if entry is None:
+            return
+        for page in entry["pages"]:
+            for uid, (_, _, length, counts) in zip(page["uids"], page["chunks"]):
+                del self._chunks[uid]
+                self._total_length -= length
+                for term in counts:
+                    posting = self._postings[term]
+                    del posting[uid]
+                    if not posting:
+                        del self._postings[term]
+            page["uids"] = []
+
+    def _pages_path(self, content_hash):
+        return os.path.join(self.cache_dir, f"pages_{content_hash}.json.gz")
+
+    def _read_pages(self, content_hash):
+        """Load the persisted pages of a PDF by content hash, or None if they are missing or unreadable."""
+        try:
+            with gzip.open(self._pages_path(content_hash), "rt", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != REGISTRY_FORMAT_VERSION:
+            return None
+        return [{"hash": page["hash"], "text": page["text"], "chunks": page["chunks"], "uids": []} for page in data["pages"]]
+
+    def _write_pages(self, content_hash, pages):
+        data = {
+            "version": REGISTRY_FORMAT_VERSION,
+            "pages": [{"hash": page["hash"], "text": page["text"], "chunks": page["chunks"]} for page in pages],
+        }
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._pages_path(content_hash)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            # json.dumps runs the C encoder; json.dump into a file encodes chunk by chunk in Python
+            with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=1) as f:
+                f.write(json.dumps(data, separators=(",", ":")))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Warning: Could not cache catalog pages: {e}")
+
+    def _state_path(self):
+        directory_key = hashlib.sha1(os.path.abspath(self.catalog_dir).encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{directory_key}_{self.STATE_NAME}")
+
+    def _load_state(self):
+        """Index the catalogs recorded by the last refresh, from their persisted pages."""
+        try:
+            with open(self._state_path(), "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        if state.get("version") != REGISTRY_FORMAT_VERSION:
+            return
+        for catalog_id, entry in state["catalogs"].items():
+            pages = self._read_pages(entry["sha256"])
+            if pages is None:
+                continue  # the next refresh extracts it again
+            self._catalogs[catalog_id] = {**entry, "pages": pages}
+            for page_number, page in enumerate(pages):
+                self._add_page(catalog_id, page_number, page)
+
+    def _state(self):
+        """Snapshot of the catalog entries without their pages, for _save_state (call with the lock held)."""
+        return {
+            "version": REGISTRY_FORMAT_VERSION,
+            "catalogs": {
+                catalog_id: {key: value for key, value in entry.items() if key != "pages"}
+                for catalog_id, entry in self._catalogs.items()
+            },
+        }
+
+    def _save_state(self, state):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._state_path()
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Warning: Could not save catalog registry state: {e}")
@@ -0,0 +1,116 @@
+from src.recommender.catalog_index import tokenize
+from src.recommender.prompt_budget import count_tokens, truncate_to_tokens
+
+SNIPPET_SEPARATOR = "\n---\n"
+
+
+def merge_intervals(windows, max_passage_chars=2000):
+    """
+    Merge overlapping catalog windows into passages.
+
+    Overlapping or touching windows become one passage covering their union.
+    A passage is not grown past max_passage_chars; instead the next window is
+    clipped to start where the passage ends, so no character is kept twice.
+
+    Args:
+        windows: (start, end, score, term) tuples; score is the window's relevance for term
+        max_passage_chars: Largest passage produced by merging
+
+    Returns:
+        list: Passage dicts with start, end and term_scores (term -> best score), in text order
+    """
+    def credit(passage):
+        passage["term_scores"][term] = max(score, passage["term_scores"].get(term, 0.0))
+
+    passages = []
+    for start, end, score, term in sorted(windows):
+        # A window starting inside an earlier (clipped) passage credits that passage first
+        if passages and start < passages[-1]["start"]:
+            credit(next(p for p in reversed(passages) if p["start"] <= start))
+            start = passages[-1]["start"]
+            if end <= passages[-1]["end"]:
+                continue
+        last = passages[-1] if passages else None
+        if last is not None and start <= last["end"]:
+            if max(end, last["end"]) - last["start"] <= max_passage_chars:
+                last["end"] = max(last["end"], end)
+                credit(last)
+                continue
+            start = last["end"]
+            if start >= end:
+                credit(last)
+                continue
+        passages.append({"start": start, "end": end, "term_scores": {term: score}})
+    return passages
+
+
+def _jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def select_passages(passages, text, max_tokens, diversity_lambda=0.7, duplicate_threshold=0.9, min_tokens=32):
+    """
+    Pick a relevant, non-redundant set of passages that fits a token budget.
+
+    Uses maximal marginal relevance: each step takes the passage with the best
+    diversity_lambda * relevance - (1 - diversity_lambda) * (similarity to the
+    passages already chosen). Relevance is the sum of a passage's term scores,
+    so a passage matching several terms outranks one matching a single term.
+    Near-duplicates (word Jaccard above duplicate_threshold) are dropped, and
+    the last passage is truncated so the result uses the budget exactly.
+
+    Args:
+        passages: Passage dicts from merge_intervals()
+        text: The catalog text the passages point into
+        max_tokens: Token budget for the joined result (separators included)
+        diversity_lambda: 1.0 ranks by relevance only, lower values favour diversity
+        duplicate_threshold: Similarity above which a passage counts as a duplicate
+        min_tokens: Smallest truncated passage worth including
+
+    Returns:
+        list: Selected passage texts, in catalog order
+    """
+    candidates = []
+    for passage in passages:
+        passage_text = text[passage["start"]:passage["end"]].strip()
+        if passage_text:
+            relevance = sum(passage["term_scores"].values())
+            candidates.append((passage["start"], passage_text, relevance, set(tokenize(passage_text))))
+    if not candidates:
+        return []
+
+    top_relevance = max(relevance for _, _, relevance, _ in candidates) or 1.0
+    separator_tokens = count_tokens(SNIPPET_SEPARATOR)
+    remaining = max_tokens
+    selected = []
+
+    while candidates and remaining > 0:
+        best, best_score, best_similarity = None, None, 0.0
+        for i, (_, _, relevance, words) in enumerate(candidates):
+            similarity = max((_jaccard(words, chosen[3]) for chosen in selected), default=0.0)
+            score = diversity_lambda * relevance / top_relevance - (1 - diversity_lambda) * similarity
+            if best_score is None or score > best_score:
+                best, best_score, best_similarity = i, score, similarity
+        start, passage_text, relevance, words = candidates.pop(best)
+        if best_similarity > duplicate_threshold:
+            continue
+
+        cost = count_tokens(passage_text) + (separator_tokens if selected else 0)
+        if cost > remaining:
+            budget = remaining - (separator_tokens if selected else 0)
+            if budget < min_tokens:
+                continue  # a smaller passage may still fit
+            passage_text = truncate_to_tokens(passage_text, budget)
+            cost = count_tokens(passage_text) + (separator_tokens if selected else 0)
+        selected.append((start, passage_text, relevance, words))
+        remaining -= cost
+
+    return [passage_text for _, passage_text, _, _ in sorted(selected, key=lambda chosen: chosen[0])]
+
+
+def assemble_context(windows, text, max_tokens, diversity_lambda=0.7):
+    """Merge, de-duplicate and select catalog windows into one context string within max_tokens."""
+    passages = merge_intervals(windows)
+    return SNIPPET_SEPARATOR.join(select_passages(passages, text, max_tokens, diversity_lambda))
@@ -0,0 +1,89 @@
+import bisect
+import re
+
+# A course entry heading at the start of a line, e.g. "CSCI 632. Machine Learning. (3 hrs.)"
+COURSE_HEADING_PATTERN = re.compile(
+    r"^(?P<subject>[A-Z][A-Za-z]{1,4})\s*[-]?\s*(?P<number>\d{3,4}[A-Z]?)\s*[.:\-]?\s+(?P<title>[A-Z][^\n]{2,})$",
+    re.MULTILINE,
+)
+COURSE_CODE_PATTERN = re.compile(r"\b([A-Z][A-Za-z]{1,4})\s*[-]?\s*(\d{3,4}[A-Z]?)\b")
+CREDITS_PATTERN = re.compile(r"\(\s*(\d+(?:\s*-\s*\d+)?)\s*(?:hrs?|hours?|credits?|cr)?\.?\s*\)", re.IGNORECASE)
+PREREQUISITE_PATTERN = re.compile(r"(?:Prerequisites?|Prereq\.?)\s*:?\s*(?P<text>[^\n]*(?:\n(?![A-Z][A-Za-z]{1,4}\s*\d{3})[^\n]*){0,2})", re.IGNORECASE)
+
+
+def normalize_course_code(code):
+    """
+    Normalize a course code for lookups, e.g. "CSci-356" -> "CSCI 356".
+
+    Args:
+        code: A course code in any casing or spacing
+
+    Returns:
+        str: The normalized code, or the stripped uppercase input if it is not code-shaped
+    """
+    match = COURSE_CODE_PATTERN.search(code.upper())
+    if not match:
+        return code.strip().upper()
+    return f"{match.group(1)} {match.group(2)}"
+
+
+def extract_course_records(text, page_offsets=None):
+    """
+    Parse structured course records out of the catalog text.
+
+    Each course heading starts a record whose description runs until the next
+    heading. Credits are taken from a parenthesised hour count in the heading
+    and prerequisite codes from a "Prerequisite:" clause in the description.
+    When a code appears more than once, the entry with the longest description wins.
+
+    Args:
+        text: The full catalog text
+        page_offsets: Start offset of every page in text, used to record page numbers
+
+    Returns:
+        list: Course record dicts with code, name, credits, description, prerequisites and page
+    """
+    page_offsets = page_offsets or [0]
+    headings = list(COURSE_HEADING_PATTERN.finditer(text))
+    records = {}
+
+    for i, heading in enumerate(headings):
+        body_end = headings[i + 1].start() if i + 1 < len(headings) else len(text)
+        body = text[heading.end():body_end]
+        title = heading.group("title").strip()
+
+        credits = ""
+        credits_match = CREDITS_PATTERN.search(title)
+        if credits_match:
+            credits = credits_match.group(1).replace(" ", "")
+            title = title[:credits_match.start()]
+        title = title.strip(" .:-")
+        if not title:
+            continue
+
+        code = f"{heading.group('subject')} {heading.group('number')}"
+        code_key = normalize_course_code(code)
+
+        prerequisites = []
+        prereq_match = PREREQUISITE_PATTERN.search(body)
+        if prereq_match:
+            for subject, number in COURSE_CODE_PATTERN.findall(prereq_match.group("text")):
+                prereq_key = normalize_course_code(f"{subject} {number}")
+                if prereq_key != code_key and prereq_key not in prerequisites:
+                    prerequisites.append(prereq_key)
+
+        description = " ".join(body.split())
+        existing = records.get(code_key)
+        if existing is not None and len(existing["description"]) >= len(description):
+            continue
+
+        records[code_key] = {
+            "code": code,
+            "name": title,
+            "credits": credits,
+            "description": description,
+            "prerequisites": prerequisites,
+            "page": bisect.bisect_right(page_offsets, heading.start()) - 1,
+        }
+
+    return list(records.values())
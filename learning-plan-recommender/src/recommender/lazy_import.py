@@ -0,0 +1,58 @@
+import importlib
+import threading
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access.
+
+    Used for heavy dependencies (e.g. openai) so importing a module that needs them
+    does not pay their import cost until they are actually used. Attribute writes
+    and deletes go to the real module, so unittest.mock.patch works through it.
+    """
+
+    def __init__(self, name):
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_module", None)
+
+    def _load(self):
+        module = self._module
+        if module is None:
+            # import_module holds the per-module import lock, so concurrent first uses are safe
+            module = importlib.import_module(self._name)
+            object.__setattr__(self, "_module", module)
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __delattr__(self, attr):
+        delattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def preload_modules(*names):
+    """
+    Import modules on a daemon thread, e.g. while the user is still typing input.
+
+    Import failures are left for the code that actually uses the module to report.
+
+    Returns:
+        threading.Thread: The started import thread
+    """
+    def load():
+        for name in names:
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                pass
+
+    thread = threading.Thread(target=load, name="preload-modules", daemon=True)
+    thread.start()
+    return thread
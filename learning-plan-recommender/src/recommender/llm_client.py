@@ -1,23 +1,385 @@
+import asyncio
+import inspect
 import json
-import openai
+import os
+import threading
+import time
+from config.config import Config
+from src.recommender.prompt_budget import count_tokens
+from src.recommender.response_cache import ResponseCache
+from src.recommender.telemetry import METRICS, record_llm_usage, span
+from src.recommender.lazy_import import LazyModule
+
+openai = LazyModule("openai")  # imported on the first client construction, not at startup
+
+_default_response_cache = None
+_default_response_cache_lock = threading.Lock()
+
+def default_response_cache():
+    """Return the process-wide response cache configured in Config, or None if disabled."""
+    global _default_response_cache
+    with _default_response_cache_lock:
+        if Config.LLM_CACHE_ENABLED and _default_response_cache is None:
+            _default_response_cache = ResponseCache(
+                os.path.join(Config.CACHE_DIR, "llm_responses"),
+                max_disk_bytes=Config.LLM_CACHE_MAX_DISK_BYTES,
+                ttl_seconds=Config.LLM_CACHE_TTL_SECONDS,
+            )
+            METRICS.register_collector("llm_response_cache", lambda: cache_gauges(_default_response_cache))
+        return _default_response_cache if Config.LLM_CACHE_ENABLED else None
+
+def cache_gauges(cache, prefix="llm_response_cache"):
+    """Expose a ResponseCache's hit/miss counters as metrics gauges."""
+    return {f"{prefix}_{name}": value for name, value in cache.stats().items()}
+
+def _prompt_tokens(messages):
+    """Estimate the prompt size for servers that do not report usage."""
+    return sum(count_tokens(str(message.get("content", ""))) for message in messages)
+
+def _record_usage(usage, messages, completion, target_span=None):
+    """record_llm_usage for a finished call, counting tokens locally only for what usage does not report."""
+    prompt_tokens = None if getattr(usage, "prompt_tokens", None) else _prompt_tokens(messages)
+    completion_tokens = None if getattr(usage, "completion_tokens", None) else count_tokens(completion)
+    record_llm_usage(usage, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens, target_span=target_span)
+
+def _client_limits(timeout=None, max_retries=None):
+    """Request timeout and retry count for an OpenAI client (its retries back off exponentially with jitter)."""
+    return {
+        "timeout": Config.LLM_TIMEOUT_SECONDS if timeout is None else timeout,
+        "max_retries": Config.LLM_MAX_RETRIES if max_retries is None else max_retries,
+    }
+
+def build_messages(message, history_json="[]"):
+    """Append the user message to the chat history, keeping at most Config.MAX_HISTORY_LENGTH earlier messages."""
+    history = json.loads(history_json) if history_json else []
+    if Config.MAX_HISTORY_LENGTH:
+        history = history[-Config.MAX_HISTORY_LENGTH:]
+    return history + [{"role": "user", "content": message}]
+
+class LLMClientPool:
+    """
+    Thread-safe pool of OpenAI clients shared across plan generations.
+
+    One openai.Client is kept per (host, port, api_key). Each client keeps its own
+    keep-alive HTTP connection pool, so later requests reuse open connections.
+    The served model id is looked up once per endpoint and cached until
+    refresh_model() is called.
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    @classmethod
+    def shared(cls):
+        """Return the process-wide pool used by the plan generators by default."""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def get(self, host, port, api_key):
+        """
+        Borrow the client and cached model id for an endpoint, creating them on first use.
+
+        Returns:
+            tuple: (openai.Client, model_name)
+        """
+        key = (host, str(port), api_key)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            # Connect and look up the model without holding the pool lock, so a slow or dead
+            # endpoint only stalls its own callers; if two threads race, the first entry wins
+            client = openai.Client(base_url=f"http://{host}:{port}/v1", api_key=api_key, **_client_limits())
+            try:
+                created = {"client": client, "model_name": client.models.list().data[0].id}
+            except Exception:
+                client.close()
+                raise
+            with self._lock:
+                entry = self._entries.setdefault(key, created)
+            if entry is not created:
+                client.close()
+        return entry["client"], entry["model_name"]
+
+    def refresh_model(self, host, port, api_key):
+        """Re-query the endpoint for its served model and update the cached id."""
+        key = (host, str(port), api_key)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            # A new entry has just looked the model up
+            return self.get(host, port, api_key)[1]
+        model_name = entry["client"].models.list().data[0].id
+        with self._lock:
+            entry["model_name"] = model_name
+        return model_name
+
+    def close(self):
+        """Close every pooled client and its open connections."""
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            entry["client"].close()
 
 class LLMClient:
-    def __init__(self, host, port, api_key):
-        self.client = openai.Client(base_url=f"http://{host}:{port}/v1", api_key=api_key)
-        self.model_name = self.client.models.list().data[0].id
-
-    def query_llm(self, message, history_json="[]"):
-        history = json.loads(history_json) if history_json else []
-        messages = history + [{"role": "user", "content": message}]
-        
-        response = self.client.chat.completions.create(
-            model=self.model_name,
-            messages=messages,
-            temperature=0.6,
-            top_p=0.95,
+    def __init__(self, host, port, api_key, pool=None, cache=None):
+        self.host = host
+        self.port = port
+        self.api_key = api_key
+        self.pool = pool
+        self.cache = cache
+        self.temperature = Config.TEMPERATURE
+        self.top_p = Config.TOP_P
+        if pool is not None:
+            self.client, self.model_name = pool.get(host, port, api_key)
+        else:
+            self.client = openai.Client(base_url=f"http://{host}:{port}/v1", api_key=api_key, **_client_limits())
+            self.model_name = self.client.models.list().data[0].id
+
+    def refresh_model(self):
+        """Re-query the server for its served model, e.g. after the model was swapped."""
+        if self.pool is not None:
+            self.model_name = self.pool.refresh_model(self.host, self.port, self.api_key)
+        else:
+            self.model_name = self.client.models.list().data[0].id
+        return self.model_name
+
+    def query_llm(self, message, history_json="[]", bypass_cache=False):
+        """
+        Send a chat completion request.
+
+        Args:
+            message: The user message
+            history_json: JSON list of earlier chat messages
+            bypass_cache: Skip the response cache lookup to force fresh sampling
+
+        Returns:
+            dict: The assistant message as {"content", "role"}
+        """
+        messages = build_messages(message, history_json)
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = ResponseCache.make_key(self.model_name, messages, self.temperature, self.top_p)
+            if not bypass_cache:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    record_llm_usage(cached=True)
+                    return dict(cached)
+
+        with span("llm_call", metric="llm_call_duration_seconds", mode="sync"):
+            response = self.client.chat.completions.create(
+                model=self.model_name,
+                messages=messages,
+                temperature=self.temperature,
+                top_p=self.top_p,
+            )
+            content = response.choices[0].message.content
+            _record_usage(getattr(response, "usage", None), messages, content or "")
+
+        result = {
+            "content": content,
+            "role": "assistant"
+        }
+        if cache_key is not None:
+            self.cache.put(cache_key, result)
+        return result
+
+
+    def query_llm_stream(self, message, history_json="[]", bypass_cache=False):
+        """
+        Stream a chat completion, yielding content chunks as the server produces them.
+
+        A cached response is yielded as a single chunk; a completed stream is
+        stored in the cache like a regular query_llm response.
+
+        Args:
+            message: The user message
+            history_json: JSON list of earlier chat messages
+            bypass_cache: Skip the response cache lookup to force fresh sampling
+
+        Yields:
+            str: Pieces of the assistant message
+        """
+        messages = build_messages(message, history_json)
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = ResponseCache.make_key(self.model_name, messages, self.temperature, self.top_p)
+            if not bypass_cache:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    record_llm_usage(cached=True)
+                    yield cached["content"]
+                    return
+
+        pieces = []
+        # Not activated: the span stays open across yields to the consumer
+        with span("llm_call", metric="llm_call_duration_seconds", activate=False, mode="stream") as call:
+            started = time.perf_counter()
+            stream = self.client.chat.completions.create(
+                model=self.model_name,
+                messages=messages,
+                temperature=self.temperature,
+                top_p=self.top_p,
+                stream=True,
+            )
+            usage = None
+            for chunk in stream:
+                usage = getattr(chunk, "usage", None) or usage
+                if not chunk.choices:
+                    continue
+                content = chunk.choices[0].delta.content
+                if content:
+                    if not pieces:
+                        call.set(first_token_seconds=time.perf_counter() - started)
+                    pieces.append(content)
+                    yield content
+            _record_usage(usage, messages, "".join(pieces), target_span=call)
+
+        if cache_key is not None:
+            self.cache.put(cache_key, {"content": "".join(pieces), "role": "assistant"})
+
+
+class AsyncLLMClient:
+    """
+    asyncio-native counterpart of LLMClient.
+
+    Many plan generations can share one instance on a single event loop; the
+    semaphore caps how many chat completions are in flight at once. The model id
+    is looked up on first use and cached.
+    """
+
+    def __init__(self, host, port, api_key, model_name=None, max_concurrency=None, cache=None, timeout=None, max_retries=None):
+        self.client = openai.AsyncClient(
+            base_url=f"http://{host}:{port}/v1", api_key=api_key, **_client_limits(timeout, max_retries)
         )
-        
-        return {
-            "content": response.choices[0].message.content,
+        self.model_name = model_name
+        self.cache = cache
+        self.temperature = Config.TEMPERATURE
+        self.top_p = Config.TOP_P
+        self._semaphore = asyncio.Semaphore(max_concurrency or Config.LLM_MAX_CONCURRENCY)
+        self._model_lock = asyncio.Lock()
+
+    async def get_model_name(self):
+        """Return the served model id, querying the server only once."""
+        if self.model_name is None:
+            async with self._model_lock:
+                if self.model_name is None:
+                    models = await self.client.models.list()
+                    self.model_name = models.data[0].id
+        return self.model_name
+
+    async def refresh_model(self):
+        """Re-query the server for its served model."""
+        models = await self.client.models.list()
+        self.model_name = models.data[0].id
+        return self.model_name
+
+    async def cached_response(self, message, history_json="[]"):
+        """Return the cached response to this prompt without querying the server, or None."""
+        if self.cache is None:
+            return None
+        model_name = await self.get_model_name()
+        messages = build_messages(message, history_json)
+        cached = self.cache.get(ResponseCache.make_key(model_name, messages, self.temperature, self.top_p))
+        if cached is None:
+            return None
+        record_llm_usage(cached=True)
+        return dict(cached)
+
+    async def query_llm(self, message, history_json="[]", bypass_cache=False):
+        messages = build_messages(message, history_json)
+        model_name = await self.get_model_name()
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = ResponseCache.make_key(model_name, messages, self.temperature, self.top_p)
+            if not bypass_cache:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    record_llm_usage(cached=True)
+                    return dict(cached)
+
+        async with self._semaphore:
+            with span("llm_call", metric="llm_call_duration_seconds", mode="async"):
+                response = await self.client.chat.completions.create(
+                    model=model_name,
+                    messages=messages,
+                    temperature=self.temperature,
+                    top_p=self.top_p,
+                )
+                content = response.choices[0].message.content
+                _record_usage(getattr(response, "usage", None), messages, content or "")
+
+        result = {
+            "content": content,
             "role": "assistant"
-        }
\ No newline at end of file
+        }
+        if cache_key is not None:
+            self.cache.put(cache_key, result)
+        return result
+
+    async def query_llm_stream(self, message, history_json="[]", bypass_cache=False):
+        """Async counterpart of LLMClient.query_llm_stream."""
+        messages = build_messages(message, history_json)
+        model_name = await self.get_model_name()
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = ResponseCache.make_key(model_name, messages, self.temperature, self.top_p)
+            if not bypass_cache:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    record_llm_usage(cached=True)
+                    yield cached["content"]
+                    return
+
+        pieces = []
+        async with self._semaphore:
+            with span("llm_call", metric="llm_call_duration_seconds", activate=False, mode="async_stream") as call:
+                started = time.perf_counter()
+                stream = await self.client.chat.completions.create(
+                    model=model_name,
+                    messages=messages,
+                    temperature=self.temperature,
+                    top_p=self.top_p,
+                    stream=True,
+                )
+                usage = None
+                async for chunk in stream:
+                    usage = getattr(chunk, "usage", None) or usage
+                    if not chunk.choices:
+                        continue
+                    content = chunk.choices[0].delta.content
+                    if content:
+                        if not pieces:
+                            call.set(first_token_seconds=time.perf_counter() - started)
+                        pieces.append(content)
+                        yield content
+                _record_usage(usage, messages, "".join(pieces), target_span=call)
+
+        if cache_key is not None:
+            self.cache.put(cache_key, {"content": "".join(pieces), "role": "assistant"})
+
+    async def close(self):
+        await self.client.close()
+
+
+async def query_llm_async(llm_client, message, history_json="[]", bypass_cache=False):
+    """
+    Query an LLMClient or AsyncLLMClient from a coroutine.
+
+    Async clients are awaited directly; blocking clients run in a worker thread
+    so they do not stall the event loop.
+    """
+    kwargs = {"bypass_cache": True} if bypass_cache else {}
+    if inspect.iscoroutinefunction(llm_client.query_llm):
+        return await llm_client.query_llm(message, history_json, **kwargs)
+    return await asyncio.to_thread(llm_client.query_llm, message, history_json, **kwargs)
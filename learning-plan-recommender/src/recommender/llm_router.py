@@ -0,0 +1,453 @@
+import asyncio
+import contextvars
+import random
+import threading
+import time
+import weakref
+
+from config.config import Config
+from src.recommender.llm_client import AsyncLLMClient, openai
+from src.recommender.telemetry import METRICS
+
+
+def parse_endpoints(spec, api_key=None):
+    """
+    Parse a comma-separated "host:port" list (e.g. Config.LLM_ENDPOINTS).
+
+    Args:
+        spec: The endpoint list
+        api_key: API key used for every endpoint
+
+    Returns:
+        list: (host, port, api_key) tuples
+    """
+    endpoints = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        host, separator, port = item.rpartition(":")
+        if not separator or not host or not port.isdigit():
+            raise ValueError(f"Invalid LLM endpoint (expected host:port): {item}")
+        endpoints.append((host, port, api_key))
+    return endpoints
+
+
+def configured_endpoints(host=None, port=None, api_key=None):
+    """Return the endpoints listed in Config.LLM_ENDPOINTS, or the single host/port endpoint if none are."""
+    api_key = api_key or Config.LLM_API_KEY
+    return parse_endpoints(Config.LLM_ENDPOINTS, api_key) or [(host or Config.LLM_HOST, str(port or Config.LLM_PORT), api_key)]
+
+
+def run_blocking(coroutine, router=None):
+    """
+    asyncio.run(coroutine), then close the clients router created on that loop.
+
+    The loop ends with the call, so its clients (and their connections) would
+    otherwise stay open until garbage collected. Context variables the coroutine
+    sets (e.g. a generator's last_trace) are kept in the caller's context, as if
+    it had been a plain function call.
+    """
+    async def run():
+        try:
+            return await coroutine
+        finally:
+            if router is not None:
+                await router.close()
+
+    context = contextvars.copy_context()
+    try:
+        with asyncio.Runner() as runner:
+            return runner.run(run(), context=context)
+    finally:
+        _adopt_context(context)
+
+
+def iterate_blocking(async_iterator, router=None):
+    """
+    Drive an async iterator (e.g. a streamed plan) from blocking code on a private event loop.
+
+    Like asyncio.run, this must not be called from inside a running event loop.
+    The clients router created on the loop are closed with it. As with
+    run_blocking, context variables the iterator sets are kept in the caller's context.
+    """
+    async def step():
+        return await async_iterator.__anext__()
+
+    context = contextvars.copy_context()
+    loop = asyncio.new_event_loop()
+    try:
+        while True:
+            try:
+                chunk = loop.run_until_complete(loop.create_task(step(), context=context))
+            except StopAsyncIteration:
+                break
+            finally:
+                _adopt_context(context)
+            yield chunk
+    finally:
+        loop.run_until_complete(async_iterator.aclose())
+        if router is not None:
+            loop.run_until_complete(router.close())
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
+
+def _adopt_context(context):
+    """Copy the variables set in context (a copy of the current one) back into the current context."""
+    for variable, value in context.items():
+        variable.set(value)
+
+
+def is_retryable(error):
+    """True for failures another attempt may not hit: timeouts, connection errors, 408/409/429 and 5xx."""
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    if isinstance(error, (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)):
+        return True
+    status = getattr(error, "status_code", None)
+    return isinstance(status, int) and (status >= 500 or status in (408, 409, 429))
+
+
+def _close_at_loop_shutdown(client):
+    """
+    Return an async generator, parked on the running event loop, that closes client when it is closed.
+
+    The loop tracks async generators once they have started, and its shutdown_asyncgens()
+    (run by asyncio.run and run_blocking before the loop closes) closes them, so clients
+    are closed even on loops the caller owns and never calls AsyncLLMRouter.close() on.
+    """
+    async def closer():
+        try:
+            yield
+        finally:
+            await client.close()
+
+    generator = closer()
+    try:
+        # Starting it registers it with the running loop; it stops at once at its yield
+        generator.asend(None).send(None)
+    except StopIteration:
+        pass
+    return generator
+
+
+class Endpoint:
+    """One LLM server behind the router, with the load and health signals used to pick it."""
+
+    def __init__(self, host, port, api_key, client_options):
+        self.host = host
+        self.port = str(port)
+        self.api_key = api_key
+        self.client_options = client_options
+        self._clients = weakref.WeakKeyDictionary()  # one AsyncLLMClient per event loop
+        self._closers = weakref.WeakKeyDictionary()  # per event loop, closes its client when the loop shuts down
+        self.model_name = None  # resolved once, then handed to the clients of later loops
+        self.name = f"{host}:{port}"
+        self.outstanding = 0
+        self.latency = None  # EWMA of successful call latency in seconds
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.ejections = 0
+
+    @property
+    def client(self):
+        """The AsyncLLMClient for this endpoint on the running event loop."""
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = AsyncLLMClient(self.host, self.port, self.api_key, model_name=self.model_name, **self.client_options)
+            self._clients[loop] = client
+            self._closers[loop] = _close_at_loop_shutdown(client)
+        return client
+
+    async def close(self):
+        """Close the client created on the running event loop, if any."""
+        loop = asyncio.get_running_loop()
+        self._clients.pop(loop, None)
+        closer = self._closers.pop(loop, None)
+        if closer is not None:
+            await closer.aclose()
+
+    def to_dict(self, now):
+        return {
+            "endpoint": self.name, "outstanding": self.outstanding, "latency_ewma_seconds": self.latency,
+            "requests": self.requests, "failures": self.failures, "ejections": self.ejections,
+            "ejected": self.ejected_until > now,
+        }
+
+
+class AsyncLLMRouter:
+    """
+    Spread LLM calls over several OpenAI-compatible endpoints.
+
+    Drop-in replacement for AsyncLLMClient (query_llm, query_llm_stream, close).
+    Each call goes to the endpoint with the lowest (outstanding requests + 1) x
+    latency EWMA, so a slow or busy server receives less traffic. Calls have a
+    deadline that covers every retry. Retries use jittered exponential backoff,
+    prefer an endpoint not tried yet, and only happen for transient errors.
+    Optionally a non-streamed call still running after hedge_after seconds is
+    sent to a second endpoint, and the first answer wins. An endpoint failing
+    eject_after times in a row is left out of rotation for eject_seconds (unless
+    every endpoint is out).
+
+    Load and health are tracked across event loops and threads, so one router
+    can serve every plan of a generator, including blocking generate_plan calls
+    that each run their own loop (see run_blocking). Each loop gets its own
+    client per endpoint, so max_concurrency caps in-flight calls per endpoint
+    on one loop, not across loops; the resolved model id is shared.
+
+    Args:
+        endpoints: List of (host, port, api_key)
+        max_concurrency: In-flight calls per endpoint on each event loop (defaults to Config.LLM_MAX_CONCURRENCY)
+        cache: ResponseCache shared by all endpoints
+        timeout: Per-call deadline in seconds (defaults to Config.LLM_TIMEOUT_SECONDS)
+        max_retries: Retries per call (defaults to Config.LLM_MAX_RETRIES)
+        backoff: Base backoff in seconds (defaults to Config.LLM_RETRY_BACKOFF_SECONDS)
+        hedge_after: Seconds before a hedged second attempt, 0 for none (defaults to Config.LLM_HEDGE_AFTER_SECONDS)
+        eject_after: Consecutive failures before ejection (defaults to Config.LLM_EJECT_AFTER_FAILURES)
+        eject_seconds: Ejection period (defaults to Config.LLM_EJECT_SECONDS)
+        ewma_alpha: Weight of the newest latency sample
+    """
+
+    MAX_BACKOFF_SECONDS = 5.0
+
+    def __init__(self, endpoints, max_concurrency=None, cache=None, timeout=None, max_retries=None, backoff=None,
+                 hedge_after=None, eject_after=None, eject_seconds=None, ewma_alpha=0.3):
+        if not endpoints:
+            raise ValueError("AsyncLLMRouter needs at least one endpoint")
+        self.timeout = Config.LLM_TIMEOUT_SECONDS if timeout is None else timeout
+        self.max_retries = Config.LLM_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff = Config.LLM_RETRY_BACKOFF_SECONDS if backoff is None else backoff
+        self.hedge_after = Config.LLM_HEDGE_AFTER_SECONDS if hedge_after is None else hedge_after
+        self.eject_after = Config.LLM_EJECT_AFTER_FAILURES if eject_after is None else eject_after
+        self.eject_seconds = Config.LLM_EJECT_SECONDS if eject_seconds is None else eject_seconds
+        self.ewma_alpha = ewma_alpha
+        self.counts = {"calls": 0, "retries": 0, "hedges": 0, "hedge_wins": 0, "deadline_exceeded": 0}
+        self._lock = threading.Lock()
+        # The router owns retries and deadlines, so the OpenAI clients must not retry on their own
+        client_options = {"max_concurrency": max_concurrency, "cache": cache, "timeout": self.timeout, "max_retries": 0}
+        self.endpoints = [Endpoint(host, port, api_key, client_options) for host, port, api_key in endpoints]
+
+    async def query_llm(self, message, history_json="[]", bypass_cache=False):
+        """Route one chat completion; same result as AsyncLLMClient.query_llm."""
+        deadline = time.monotonic() + self.timeout
+        self._count("calls")
+        tried = []
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await self._hedged_call(message, history_json, bypass_cache, deadline, tried)
+            except Exception as e:
+                await self._before_retry(e, attempt, deadline)
+
+    async def query_llm_stream(self, message, history_json="[]", bypass_cache=False):
+        """
+        Route one streamed chat completion; same chunks as AsyncLLMClient.query_llm_stream.
+
+        Failures before the first chunk are retried; once output has been
+        yielded, an error is raised to the caller. Streams are never hedged.
+        """
+        deadline = time.monotonic() + self.timeout
+        self._count("calls")
+        tried = []
+        for attempt in range(self.max_retries + 1):
+            endpoint = self._choose(tried)
+            tried.append(endpoint)
+            client = endpoint.client
+            try:
+                cached = await self._before_call(endpoint, client, message, history_json, bypass_cache, deadline)
+            except Exception as e:
+                await self._before_retry(e, attempt, deadline)
+                continue
+            if cached is not None:
+                yield cached["content"]
+                return
+            self._acquire(endpoint)
+            started = time.monotonic()
+            stream = None
+            yielded = False
+            try:
+                stream = client.query_llm_stream(message, history_json, bypass_cache=True)
+                while True:
+                    try:
+                        remaining = self._remaining(deadline)
+                        chunk = await asyncio.wait_for(stream.__anext__(), remaining)
+                    except StopAsyncIteration:
+                        break
+                    if not yielded:
+                        # Streams are ranked by time to first token
+                        self._record_success(endpoint, time.monotonic() - started)
+                        yielded = True
+                    yield chunk
+                if not yielded:
+                    self._record_success(endpoint, time.monotonic() - started)
+                return
+            except Exception as e:
+                self._record_failure(endpoint, e)
+                if yielded:
+                    raise
+                await self._before_retry(e, attempt, deadline)
+            finally:
+                self._release(endpoint)
+                if stream is not None:
+                    await stream.aclose()
+
+    def stats(self):
+        """Router counters and the load and health of every endpoint."""
+        now = time.monotonic()
+        with self._lock:
+            return {**self.counts, "endpoints": [endpoint.to_dict(now) for endpoint in self.endpoints]}
+
+    async def close(self):
+        """Close the endpoint clients created on the running event loop."""
+        for endpoint in self.endpoints:
+            await endpoint.close()
+
+    def _count(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+    def _remaining(self, deadline):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            self._count("deadline_exceeded")
+            raise TimeoutError(f"LLM call exceeded its {self.timeout:g}s deadline")
+        return remaining
+
+    def _choose(self, exclude=()):
+        """Pick the endpoint with the lowest expected wait, skipping ejected and (if possible) excluded ones."""
+        now = time.monotonic()
+        with self._lock:
+            healthy = [e for e in self.endpoints if e.ejected_until <= now]
+            if not healthy:
+                # Everything is ejected: probe the endpoint that comes back first rather than failing
+                endpoint = min(self.endpoints, key=lambda e: e.ejected_until)
+            else:
+                candidates = [e for e in healthy if e not in exclude] or healthy
+                known = [e.latency for e in self.endpoints if e.latency is not None]
+                default_latency = sum(known) / len(known) if known else 1.0
+                # Ties (e.g. before any latency is known) go to the endpoint that was used least
+                endpoint = min(candidates, key=lambda e: (
+                    (e.outstanding + 1) * (e.latency if e.latency is not None else default_latency), e.requests,
+                ))
+            return endpoint
+
+    def _acquire(self, endpoint):
+        with self._lock:
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+
+    def _release(self, endpoint):
+        with self._lock:
+            endpoint.outstanding -= 1
+
+    async def _before_retry(self, error, attempt, deadline):
+        """Re-raise error unless another attempt is allowed; otherwise sleep the jittered backoff."""
+        if attempt >= self.max_retries or not is_retryable(error):
+            raise error
+        delay = random.uniform(0, min(self.MAX_BACKOFF_SECONDS, self.backoff * 2 ** attempt))
+        if time.monotonic() + delay >= deadline:
+            raise error
+        self._count("retries")
+        METRICS.inc("llm_retries_total")
+        await asyncio.sleep(delay)
+
+    async def _hedged_call(self, message, history_json, bypass_cache, deadline, tried):
+        primary = self._choose(tried)
+        tried.append(primary)
+        first = asyncio.ensure_future(self._attempt(primary, message, history_json, bypass_cache, deadline))
+        tasks = {first}
+        try:
+            if not self.hedge_after or len(self.endpoints) < 2:
+                return await first
+            done, _ = await asyncio.wait(tasks, timeout=min(self.hedge_after, self._remaining(deadline)))
+            if done:
+                return first.result()
+            backup = self._choose([primary])
+            if backup is primary:
+                return await first
+            tried.append(backup)
+            self._count("hedges")
+            METRICS.inc("llm_hedges_total")
+            second = asyncio.ensure_future(self._attempt(backup, message, history_json, bypass_cache, deadline))
+            tasks.add(second)
+            error = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self._count("hedge_wins")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _before_call(self, endpoint, client, message, history_json, bypass_cache, deadline):
+        """
+        Resolve the client's model and check the response cache before a call.
+
+        Neither counts as endpoint load or latency: the model lookup only happens
+        on a client's first call, and cache hits never reach the server.
+
+        Returns:
+            dict or None: The cached response, if there is one
+        """
+        try:
+            await asyncio.wait_for(client.get_model_name(), self._remaining(deadline))
+        except Exception as e:
+            self._record_failure(endpoint, e)
+            raise
+        endpoint.model_name = client.model_name
+        return None if bypass_cache else await client.cached_response(message, history_json)
+
+    async def _attempt(self, endpoint, message, history_json, bypass_cache, deadline):
+        client = endpoint.client
+        cached = await self._before_call(endpoint, client, message, history_json, bypass_cache, deadline)
+        if cached is not None:
+            return cached
+        self._acquire(endpoint)
+        started = time.monotonic()
+        try:
+            remaining = self._remaining(deadline)
+            # The cache was checked above; the client still stores the new response
+            result = await asyncio.wait_for(client.query_llm(message, history_json, bypass_cache=True), remaining)
+        except Exception as e:
+            self._record_failure(endpoint, e)
+            raise
+        else:
+            self._record_success(endpoint, time.monotonic() - started)
+            return result
+        finally:
+            self._release(endpoint)
+
+    def _record_success(self, endpoint, latency):
+        with self._lock:
+            if endpoint.latency is None:
+                endpoint.latency = latency
+            else:
+                endpoint.latency += self.ewma_alpha * (latency - endpoint.latency)
+            endpoint.consecutive_failures = 0
+        METRICS.inc("llm_endpoint_requests_total", endpoint=endpoint.name, outcome="ok")
+
+    def _record_failure(self, endpoint, error):
+        METRICS.inc("llm_endpoint_requests_total", endpoint=endpoint.name, outcome="error")
+        retryable = is_retryable(error)
+        with self._lock:
+            endpoint.failures += 1
+            if not retryable:
+                return  # the request was bad, not the server
+            endpoint.consecutive_failures += 1
+            if not self.eject_after or endpoint.consecutive_failures < self.eject_after:
+                return
+            # Stays at the threshold, so one more failure after the ejection ends ejects it again
+            endpoint.ejected_until = time.monotonic() + self.eject_seconds
+            endpoint.ejections += 1
+            METRICS.inc("llm_endpoint_ejections_total", endpoint=endpoint.name)
+            print(f"Warning: LLM endpoint {endpoint.name} ejected for {self.eject_seconds:g}s "
+                  f"after {endpoint.consecutive_failures} consecutive failures")
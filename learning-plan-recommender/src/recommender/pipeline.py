@@ -0,0 +1,152 @@
+import asyncio
+import inspect
+import time
+from src.recommender.telemetry import span
+
+
+class Stage:
+    """
+    One step of a plan-generation pipeline.
+
+    Args:
+        name: Unique stage name; its result is stored under this name
+        func: Callable receiving the results of its inputs as keyword arguments.
+            Coroutine functions are awaited, plain functions run in a worker thread.
+        inputs: Names of the stages (or initial values) this stage depends on
+    """
+
+    def __init__(self, name, func, inputs=()):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+
+
+class PipelineRun:
+    """Results and per-stage timings of one pipeline execution."""
+
+    def __init__(self, results, timings, inputs):
+        self.results = results
+        self.timings = timings
+        self._inputs = inputs
+
+    def critical_path(self):
+        """
+        Return the chain of stages that determined the end-to-end latency.
+
+        Starting from the stage that finished last, repeatedly step to the input
+        that finished last, i.e. the dependency the stage was actually waiting on.
+
+        Returns:
+            list: (stage_name, duration_seconds) tuples in execution order
+        """
+        if not self.timings:
+            return []
+        path = []
+        name = max(self.timings, key=lambda stage: self.timings[stage]["end"])
+        while name is not None:
+            path.append((name, self.timings[name]["duration"]))
+            waited_on = [stage for stage in self._inputs[name] if stage in self.timings]
+            name = max(waited_on, key=lambda stage: self.timings[stage]["end"]) if waited_on else None
+        return list(reversed(path))
+
+    def report(self):
+        """Return a JSON-serialisable summary of stage timings and the critical path."""
+        start = min((t["start"] for t in self.timings.values()), default=0.0)
+        end = max((t["end"] for t in self.timings.values()), default=0.0)
+        return {
+            "total_seconds": end - start,
+            "stages": {
+                name: {"start_offset": t["start"] - start, "duration": t["duration"]}
+                for name, t in self.timings.items()
+            },
+            "critical_path": [
+                {"stage": name, "duration": duration} for name, duration in self.critical_path()
+            ],
+        }
+
+
+class StagePipeline:
+    """
+    A small DAG of stages with declared inputs.
+
+    run() starts every stage as soon as all of its inputs are available, so
+    independent stages (e.g. catalog lookups and an LLM call) overlap instead of
+    running strictly in order.
+    """
+
+    def __init__(self, stages):
+        self.stages = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate stage name: {stage.name}")
+            self.stages[stage.name] = stage
+        self._check_acyclic()
+
+    def _check_acyclic(self):
+        visiting, done = set(), set()
+
+        def visit(name):
+            if name in done or name not in self.stages:
+                return
+            if name in visiting:
+                raise ValueError(f"Pipeline has a dependency cycle through stage: {name}")
+            visiting.add(name)
+            for dependency in self.stages[name].inputs:
+                visit(dependency)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.stages:
+            visit(name)
+
+    async def run(self, initial=None):
+        """
+        Execute the pipeline.
+
+        Args:
+            initial: Dict of values available before any stage runs (e.g. student, target_course)
+
+        Returns:
+            PipelineRun: Results of every stage plus their timings
+        """
+        results = dict(initial or {})
+        missing = {
+            dependency
+            for stage in self.stages.values()
+            for dependency in stage.inputs
+            if dependency not in self.stages and dependency not in results
+        }
+        if missing:
+            raise ValueError(f"Pipeline inputs not provided: {', '.join(sorted(missing))}")
+
+        timings = {}
+        tasks = {}
+
+        async def run_stage(stage):
+            for dependency in stage.inputs:
+                if dependency in tasks:
+                    await tasks[dependency]
+            kwargs = {dependency: results[dependency] for dependency in stage.inputs}
+
+            started = time.perf_counter()
+            with span(f"stage:{stage.name}", metric="stage_duration_seconds", stage=stage.name):
+                if inspect.iscoroutinefunction(stage.func):
+                    value = await stage.func(**kwargs)
+                else:
+                    value = await asyncio.to_thread(stage.func, **kwargs)
+            finished = time.perf_counter()
+
+            results[stage.name] = value
+            timings[stage.name] = {"start": started, "end": finished, "duration": finished - started}
+
+        for stage in self.stages.values():
+            tasks[stage.name] = asyncio.ensure_future(run_stage(stage))
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            raise
+
+        inputs = {name: stage.inputs for name, stage in self.stages.items()}
+        return PipelineRun(results, timings, inputs)
@@ -1,48 +1,169 @@
+import contextvars
 import json
-from src.recommender.llm_client import LLMClient
+from src.models.prerequisite_graph import describe_prerequisite_gaps
+from src.recommender.llm_client import LLMClient, LLMClientPool, query_llm_async, default_response_cache
+from src.recommender.llm_router import AsyncLLMRouter, iterate_blocking, run_blocking
+from src.recommender.prompt_budget import PromptBudget
+from src.recommender.telemetry import maybe_profile, profile_label, span, tracing
+from config.config import Config
 
 class LearningPlanGenerator:
-    def __init__(self, host, port, api_key):
+    def __init__(self, host, port, api_key, client_pool=None, max_concurrency=None, response_cache=None, endpoints=None):
         self.host = host
         self.port = port
         self.api_key = api_key
+        # LLM servers to route between (see AsyncLLMRouter); defaults to the single host/port
+        self.endpoints = list(endpoints or [(host, str(port), api_key)])
+        self.client_pool = client_pool or LLMClientPool.shared()
+        self.max_concurrency = max_concurrency
+        self.response_cache = response_cache if response_cache is not None else default_response_cache()
+        self.prompt_budget = PromptBudget(Config.MAX_STAGE_INPUT_TOKENS)
+        self._router = None  # created on first async use, then shared by every event loop
+        # Per thread / asyncio task, so plans generated concurrently don't overwrite each other's
+        self._last_trace = contextvars.ContextVar("last_trace", default=None)
 
-    def generate_plan(self, student, target_course, course_db):
+    @property
+    def last_trace(self):
+        """Telemetry Trace of the most recent plan generated in this thread or asyncio task."""
+        return self._last_trace.get()
+    
+    def generate_plan(self, student, target_course, course_db, bypass_cache=False):
         """
         Generate a learning plan using a multi-turn interaction approach.
         
+        Blocking wrapper around generate_plan_async using a pooled LLMClient; it must
+        not be called from inside a running event loop. A Config.PROFILE_SAMPLE_RATE
+        fraction of calls is profiled with cProfile into Config.PROFILE_DIR.
+        
+        Args:
+            student: Student object with background information
+            target_course: The target course the student wants to take
+            course_db: CourseDatabase object with course information
+            bypass_cache: Skip cached LLM responses to force fresh sampling
+            
+        Returns:
+            str: A personalized learning plan
+        """
+        # Borrow a pooled LLM client (connections and model id are reused across plans); with
+        # several endpoints the async path's router spreads the calls over them instead
+        llm_client = None
+        if len(self.endpoints) == 1:
+            llm_client = LLMClient(self.host, self.port, self.api_key, pool=self.client_pool, cache=self.response_cache)
+        label = profile_label("generate_plan")
+        with maybe_profile(Config.PROFILE_SAMPLE_RATE, Config.PROFILE_DIR, label):
+            return run_blocking(
+                self.generate_plan_async(student, target_course, course_db, llm_client, bypass_cache),
+                self._get_async_client() if llm_client is None else None,
+            )
+    
+    async def generate_plan_async(self, student, target_course, course_db, llm_client=None, bypass_cache=False):
+        """
+        Asynchronously generate a learning plan using a multi-turn interaction approach.
+        
         Args:
             student: Student object with background information
             target_course: The target course the student wants to take
             course_db: CourseDatabase object with course information
+            llm_client: Client to use; defaults to this generator's AsyncLLMRouter
+            bypass_cache: Skip cached LLM responses to force fresh sampling
             
         Returns:
             str: A personalized learning plan
         """
-        # Initialize LLM client
-        llm_client = LLMClient(self.host, self.port, self.api_key)
+        if llm_client is None:
+            llm_client = self._get_async_client()
+        
+        with tracing("generate_plan", generator="basic", target_course=target_course) as trace:
+            final_prompt = await self._prepare_final_prompt_async(student, target_course, course_db, llm_client, bypass_cache)
+            
+            # Step 4: Final plan generation - combine all insights into a complete plan
+            with span("stage:final_plan", metric="stage_duration_seconds", stage="final_plan"):
+                final_response = await query_llm_async(llm_client, final_prompt, bypass_cache=bypass_cache)
+        self._last_trace.set(trace)
+        
+        # Return the final learning plan
+        return final_response.get("content", "Error generating learning plan.")
+    
+    def generate_plan_stream(self, student, target_course, course_db, bypass_cache=False):
+        """
+        Generate a learning plan, streaming the final plan as it is produced.
+        
+        The first three steps run to completion as in generate_plan; only the
+        final step is streamed, so output starts at the first final-plan token.
         
+        Args:
+            student: Student object with background information
+            target_course: The target course the student wants to take
+            course_db: CourseDatabase object with course information
+            bypass_cache: Skip cached LLM responses to force fresh sampling
+            
+        Yields:
+            str: Pieces of the personalized learning plan
+        """
+        if len(self.endpoints) > 1:
+            yield from iterate_blocking(
+                self.generate_plan_stream_async(student, target_course, course_db, bypass_cache=bypass_cache),
+                self._get_async_client(),
+            )
+            return
+        llm_client = LLMClient(self.host, self.port, self.api_key, pool=self.client_pool, cache=self.response_cache)
+        final_prompt = run_blocking(self._prepare_traced(student, target_course, course_db, llm_client, bypass_cache))
+        yield from llm_client.query_llm_stream(final_prompt, bypass_cache=bypass_cache)
+    
+    async def generate_plan_stream_async(self, student, target_course, course_db, llm_client=None, bypass_cache=False):
+        """
+        Async counterpart of generate_plan_stream, for callers already running an event loop.
+        
+        Args:
+            student: Student object with background information
+            target_course: The target course the student wants to take
+            course_db: CourseDatabase object with course information
+            llm_client: AsyncLLMClient to use; defaults to this generator's AsyncLLMRouter
+            bypass_cache: Skip cached LLM responses to force fresh sampling
+            
+        Yields:
+            str: Pieces of the personalized learning plan
+        """
+        if llm_client is None:
+            llm_client = self._get_async_client()
+        final_prompt = await self._prepare_traced(student, target_course, course_db, llm_client, bypass_cache)
+        async for chunk in llm_client.query_llm_stream(final_prompt, bypass_cache=bypass_cache):
+            yield chunk
+    
+    async def _prepare_traced(self, student, target_course, course_db, llm_client, bypass_cache=False):
+        """Run the preparation steps of a streamed plan under their own trace."""
+        with tracing("prepare_plan", generator="basic", target_course=target_course) as trace:
+            final_prompt = await self._prepare_final_prompt_async(student, target_course, course_db, llm_client, bypass_cache)
+        self._last_trace.set(trace)
+        return final_prompt
+    
+    async def _prepare_final_prompt_async(self, student, target_course, course_db, llm_client, bypass_cache=False):
+        """Run the assessment, gap analysis and course selection steps and build the final plan prompt."""
         # Step 1: Knowledge assessment - understand what the student already knows
-        knowledge_prompt = self._create_knowledge_assessment_prompt(student, target_course)
-        knowledge_response = llm_client.query_llm(knowledge_prompt)
-        knowledge_assessment = knowledge_response.get("content", "")
+        with span("stage:knowledge_assessment", metric="stage_duration_seconds", stage="knowledge_assessment"):
+            knowledge_prompt = self._create_knowledge_assessment_prompt(student, target_course)
+            knowledge_response = await query_llm_async(llm_client, knowledge_prompt, bypass_cache=bypass_cache)
+            knowledge_assessment = knowledge_response.get("content", "")
         
         # Step 2: Gap analysis - identify what knowledge/skills are missing
-        gap_prompt = self._create_gap_analysis_prompt(student, target_course, knowledge_assessment, course_db)
-        gap_response = llm_client.query_llm(gap_prompt)
-        gap_analysis = gap_response.get("content", "")
+        with span("stage:gap_analysis", metric="stage_duration_seconds", stage="gap_analysis"):
+            gap_prompt = self._create_gap_analysis_prompt(student, target_course, knowledge_assessment, course_db)
+            gap_response = await query_llm_async(llm_client, gap_prompt, bypass_cache=bypass_cache)
+            gap_analysis = gap_response.get("content", "")
         
         # Step 3: Course selection - determine specific courses to take
-        courses_prompt = self._create_course_selection_prompt(student, target_course, knowledge_assessment, gap_analysis, course_db)
-        courses_response = llm_client.query_llm(courses_prompt)
-        course_selection = courses_response.get("content", "")
-        
-        # Step 4: Final plan generation - combine all insights into a complete plan
-        final_prompt = self._create_final_plan_prompt(student, target_course, knowledge_assessment, gap_analysis, course_selection)
-        final_response = llm_client.query_llm(final_prompt)
-        
-        # Return the final learning plan
-        return final_response.get("content", "Error generating learning plan.")
+        with span("stage:course_selection", metric="stage_duration_seconds", stage="course_selection"):
+            courses_prompt = self._create_course_selection_prompt(student, target_course, knowledge_assessment, gap_analysis, course_db)
+            courses_response = await query_llm_async(llm_client, courses_prompt, bypass_cache=bypass_cache)
+            course_selection = courses_response.get("content", "")
+        
+        return self._create_final_plan_prompt(student, target_course, knowledge_assessment, gap_analysis, course_selection)
+    
+    def _get_async_client(self):
+        """Return the AsyncLLMRouter over this generator's endpoints, creating it on first use."""
+        if self._router is None:
+            self._router = AsyncLLMRouter(self.endpoints, max_concurrency=self.max_concurrency, cache=self.response_cache)
+        return self._router
 
     def _create_knowledge_assessment_prompt(self, student, target_course):
         """Generate a prompt focused solely on assessing the student's current knowledge."""
@@ -72,6 +193,8 @@ class LearningPlanGenerator:
         """Generate a prompt to identify knowledge gaps based on previous assessment."""
         
         courses_text = course_db.get_courses_as_text()
+        prerequisite_gaps = describe_prerequisite_gaps(student, target_course, course_db) or "Target course not found in the prerequisite graph."
+        (knowledge_assessment,) = self.prompt_budget.fit([knowledge_assessment], fixed_text=courses_text + prerequisite_gaps)
         
         prompt = f"""
         You are an academic advisor identifying knowledge gaps for a student.
@@ -89,6 +212,9 @@ class LearningPlanGenerator:
         Available courses in the catalog:
         {courses_text}
         
+        Missing prerequisites for the target, in the order they must be taken (computed from the catalog):
+        {prerequisite_gaps}
+        
         Based on the knowledge assessment and the requirements for {target_course}, identify specific knowledge and skill gaps this student needs to address. Consider:
         - Mathematical prerequisites
         - Programming skills and frameworks
@@ -104,6 +230,10 @@ class LearningPlanGenerator:
         """Generate a prompt to select specific courses based on identified gaps."""
         
         courses_text = course_db.get_courses_as_text()
+        prerequisite_gaps = describe_prerequisite_gaps(student, target_course, course_db) or "Target course not found in the prerequisite graph."
+        knowledge_assessment, gap_analysis = self.prompt_budget.fit(
+            [knowledge_assessment, gap_analysis], fixed_text=courses_text + prerequisite_gaps
+        )
         
         prompt = f"""
         You are an academic advisor selecting courses to fill specific knowledge gaps.
@@ -124,6 +254,9 @@ class LearningPlanGenerator:
         Available courses in the catalog:
         {courses_text}
         
+        Missing prerequisites for the target, in the order they must be taken (computed from the catalog):
+        {prerequisite_gaps}
+        
         Based on the identified knowledge gaps, select specific courses from the catalog that would best prepare this student for {target_course}. For each recommended course:
         1. Explain exactly which gap(s) it addresses
         2. Justify why this specific course is appropriate given the student's background
@@ -139,6 +272,11 @@ class LearningPlanGenerator:
     def _create_final_plan_prompt(self, student, target_course, knowledge_assessment, gap_analysis, course_selection):
         """Generate a prompt to create the final learning plan that integrates all previous insights."""
         
+        # Earlier stage outputs are compacted (headings and bullet lists first) when over budget
+        knowledge_assessment, gap_analysis, course_selection = self.prompt_budget.fit(
+            [knowledge_assessment, gap_analysis, course_selection]
+        )
+        
         prompt = f"""
         You are an academic advisor creating a complete learning plan for a student.
         
@@ -0,0 +1,219 @@
+import json
+import re
+
+from src.models.prerequisite_graph import describe_prerequisite_gaps
+from src.recommender.llm_client import query_llm_async
+from src.recommender.pipeline import Stage
+from src.recommender.plan_generator_rag import LearningPlanGenerator as RagLearningPlanGenerator
+from src.recommender.term_matcher import extract_key_terms
+
+# Fields of the assessment object returned by the first call, with their empty values
+ASSESSMENT_FIELDS = {
+    "knowledge_summary": "",
+    "known_topics": [],
+    "gaps": [],
+    "search_terms": [],
+}
+GAP_PRIORITIES = ("essential", "optional")
+
+
+def parse_assessment(text):
+    """
+    Parse the JSON assessment returned by the first fast-mode call.
+
+    Tolerates code fences and prose around the object, and drops fields of the
+    wrong type. If no JSON object can be read, the raw text is kept as the
+    knowledge summary so the plan can still be written.
+
+    Args:
+        text: Model output
+
+    Returns:
+        dict: ASSESSMENT_FIELDS filled from the output, plus "structured" (False if parsing failed)
+    """
+    assessment = {name: type(empty)() for name, empty in ASSESSMENT_FIELDS.items()}
+    data = None
+    match = re.search(r"\{.*\}", text or "", re.DOTALL)
+    if match:
+        try:
+            data = json.loads(match.group(0))
+        except ValueError:
+            data = None
+    if not isinstance(data, dict):
+        assessment["knowledge_summary"] = (text or "").strip()
+        assessment["structured"] = False
+        return assessment
+
+    if isinstance(data.get("knowledge_summary"), str):
+        assessment["knowledge_summary"] = data["knowledge_summary"].strip()
+    for name in ("known_topics", "search_terms"):
+        values = data.get(name)
+        if isinstance(values, list):
+            assessment[name] = [value.strip() for value in values if isinstance(value, str) and value.strip()]
+    for gap in data.get("gaps") if isinstance(data.get("gaps"), list) else []:
+        if isinstance(gap, str):
+            gap = {"topic": gap}
+        if not isinstance(gap, dict) or not isinstance(gap.get("topic"), str) or not gap["topic"].strip():
+            continue
+        priority = str(gap.get("priority", "essential")).lower()
+        assessment["gaps"].append({
+            "topic": gap["topic"].strip(),
+            "reason": gap["reason"].strip() if isinstance(gap.get("reason"), str) else "",
+            "priority": priority if priority in GAP_PRIORITIES else "essential",
+        })
+    assessment["structured"] = True
+    return assessment
+
+
+def format_assessment(assessment):
+    """Render a parsed assessment as the compact text sent to the second call."""
+    lines = []
+    if assessment["knowledge_summary"]:
+        lines.append(f"Summary: {assessment['knowledge_summary']}")
+    if assessment["known_topics"]:
+        lines.append(f"Known topics: {', '.join(assessment['known_topics'])}")
+    if assessment["gaps"]:
+        lines.append("Gaps:")
+        for gap in assessment["gaps"]:
+            reason = f": {gap['reason']}" if gap["reason"] else ""
+            lines.append(f"- {gap['topic']} ({gap['priority']}){reason}")
+    return "\n".join(lines)
+
+
+class LearningPlanGenerator(RagLearningPlanGenerator):
+    """
+    Low-latency variant of the RAG generator that needs two LLM calls instead of four.
+
+    The first call returns the knowledge assessment and the gaps as one JSON
+    object (see ASSESSMENT_FIELDS). Its search terms and gap topics drive catalog
+    retrieval directly, instead of mining free text for terms. The second call
+    selects courses and writes the final plan in one response. Catalog loading,
+    retrieval, streaming and tracing are shared with the RAG generator.
+    """
+
+    generator_name = "fast"
+
+    def _preparation_stages(self, student, target_course, course_db, llm_client, bypass_cache=False):
+        """Build the stages that lead up to the fused plan prompt."""
+        async def assess():
+            response = await query_llm_async(
+                llm_client, self._create_assessment_prompt(student, target_course, course_db), bypass_cache=bypass_cache
+            )
+            return parse_assessment(response.get("content", ""))
+
+        # Catalog lookups for the target and prior courses need no LLM output, so they overlap the first call
+        def prefetch_target():
+            return self._prefetch_catalog_terms([target_course], top_k=2)
+
+        def prefetch_prior_courses():
+            return self._prefetch_catalog_terms(student.prior_courses, top_k=1)
+
+        def retrieve_catalog(assessment, target_snippets, prior_course_snippets):
+            return self._retrieve_catalog_for_terms(
+                self._assessment_search_terms(assessment), target_course, {**prior_course_snippets, **target_snippets}
+            )
+
+        def build_final_prompt(assessment, catalog_data):
+            return self._create_fused_plan_prompt(student, target_course, assessment, course_db, catalog_data)
+
+        return [
+            Stage("assessment", assess),
+            Stage("target_snippets", prefetch_target),
+            Stage("prior_course_snippets", prefetch_prior_courses),
+            Stage("catalog_data", retrieve_catalog, ["assessment", "target_snippets", "prior_course_snippets"]),
+            Stage("final_prompt", build_final_prompt, ["assessment", "catalog_data"]),
+        ]
+
+    def _assessment_search_terms(self, assessment):
+        """Catalog search terms from the structured assessment (free-text term mining only if it was not JSON)."""
+        if not assessment["structured"]:
+            return extract_key_terms(assessment["knowledge_summary"], self._get_term_matcher())
+        terms = assessment["search_terms"] + [gap["topic"] for gap in assessment["gaps"]]
+        return list(dict.fromkeys(term for term in terms if len(term) > 1))
+
+    def _create_assessment_prompt(self, student, target_course, course_db):
+        """Generate the prompt for the JSON knowledge assessment and gap analysis."""
+
+        prerequisite_gaps = describe_prerequisite_gaps(student, target_course, course_db) or "Target course not found in the prerequisite graph."
+
+        prompt = f"""
+        You are an academic advisor assessing a student's readiness for {target_course}.
+
+        Student Background:
+        - Department: {student.department}
+        - Degree Level: {student.degree_level}
+        - Prior Courses: {', '.join(student.prior_courses)}
+
+        Missing prerequisites for the target, in the order they must be taken (computed from the catalog):
+        {prerequisite_gaps}
+
+        Assess what the student already knows that is relevant to {target_course} (mathematics, programming,
+        theory, practical experience) and which knowledge and skill gaps remain.
+
+        Respond with only a JSON object, no other text, using exactly these fields:
+        {{
+          "knowledge_summary": "two or three sentences on what the student likely knows",
+          "known_topics": ["topic", "..."],
+          "gaps": [{{"topic": "missing topic", "reason": "why it is needed", "priority": "essential or optional"}}],
+          "search_terms": ["course codes, course titles or topics to look up in the course catalog"]
+        }}
+        """
+
+        return prompt
+
+    def _create_fused_plan_prompt(self, student, target_course, assessment, course_db, catalog_data):
+        """Generate the prompt that selects courses and writes the final plan in one response."""
+
+        courses_text = course_db.get_courses_as_text()
+        prerequisite_gaps = describe_prerequisite_gaps(student, target_course, course_db) or "Target course not found in the prerequisite graph."
+        (assessment_text,) = self.prompt_budget.fit(
+            [format_assessment(assessment)], fixed_text=courses_text + catalog_data + prerequisite_gaps
+        )
+
+        prompt = f"""
+        You are an academic advisor creating a complete learning plan for a student.
+
+        Student Background:
+        - Department: {student.department}
+        - Degree Level: {student.degree_level}
+        - Prior Courses: {', '.join(student.prior_courses)}
+
+        Target Course: {target_course}
+
+        Assessment:
+        {assessment_text}
+
+        Available courses in the catalog:
+        {courses_text}
+
+        Missing prerequisites for the target, in the order they must be taken (computed from the catalog):
+        {prerequisite_gaps}
+
+        Relevant Information from Engineering Catalog:
+        {catalog_data}
+
+        Select courses that exist in the catalog data to close the gaps, then create a learning plan for this student to successfully prepare for and complete {target_course}. Your plan should include:
+
+        ## Current Knowledge Assessment
+        [Summarize the student's current relevant knowledge]
+
+        ## Knowledge Gaps for {target_course}
+        [Summarize the key gaps that need to be addressed]
+
+        ## Recommended Courses
+        [For each course: the gap(s) it addresses, whether it is essential or optional, and its prerequisites]
+
+        ## Recommended Learning Path
+        [Provide a sequential path of courses and learning activities]
+
+        ## Additional Resources
+        [Suggest supplementary materials, online resources, or self-study topics]
+
+        ## Timeline
+        [Recommend a realistic timeline for completing the preparation and target course]
+
+        If the student appears ready to take {target_course} directly, state this clearly with justification.
+        Make your plan specific, actionable, and tailored to this student's unique background and needs.
+        """
+
+        return prompt
@@ -1,108 +1,521 @@
+import contextvars
 import json
 import os
-import fitz  # PyMuPDF for PDF parsing
-from src.recommender.llm_client import LLMClient
+import threading
+import time
+from config.config import Config
+from src.models.prerequisite_graph import describe_prerequisite_gaps
+from src.recommender.llm_client import LLMClient, LLMClientPool, query_llm_async, default_response_cache
+from src.recommender.llm_router import AsyncLLMRouter, iterate_blocking, run_blocking
+from src.recommender.pipeline import Stage, StagePipeline
+from src.recommender.prompt_budget import PromptBudget, count_tokens, truncate_to_tokens
+from src.recommender.context_assembler import SNIPPET_SEPARATOR, assemble_context
+from src.recommender.catalog_index import CatalogIndex
+from src.recommender.catalog_cache import CatalogTextCache
+from src.recommender.course_extractor import normalize_course_code
+from src.recommender.term_matcher import EDUCATIONAL_TOPICS, TermMatcher, course_code_patterns, extract_key_terms
+from src.recommender.telemetry import METRICS, maybe_profile, profile_label, span, tracing
+from src.models.catalog_course_database import CatalogCourseDatabase, format_course_record
+
+CATALOG_LOAD_MODES = ("eager", "background", "lazy")
+
+def _split_setting(value):
+    """Split a comma-separated Config value into its non-empty items."""
+    return [item.strip() for item in value.split(",") if item.strip()]
 
 class LearningPlanGenerator:
-    def __init__(self, host, port, api_key, catalog_path=None):
+    generator_name = "rag"  # label on traces and profiles
+    
+    def __init__(self, host, port, api_key, catalog_path=None, cache_dir=None, retriever=None, client_pool=None, max_concurrency=None, response_cache=None, catalog_load=None, shared_catalog=None, endpoints=None, catalogs=None, years=None):
         self.host = host
         self.port = port
         self.api_key = api_key
-        self.catalog_path = catalog_path or "../engineering-course-catalog/engineering_catalog.pdf"
-        self.catalog_text = self._load_catalog_text()
+        # LLM servers to route between (see AsyncLLMRouter); defaults to the single host/port
+        self.endpoints = list(endpoints or [(host, str(port), api_key)])
+        self.client_pool = client_pool or LLMClientPool.shared()
+        self.max_concurrency = max_concurrency
+        self.response_cache = response_cache if response_cache is not None else default_response_cache()
+        self.prompt_budget = PromptBudget(Config.MAX_STAGE_INPUT_TOKENS)
+        self._router = None  # created on first async use, then shared by every event loop
+        # Per thread / asyncio task, so plans generated concurrently don't overwrite each other's
+        self._last_run = contextvars.ContextVar("last_run", default=None)
+        self._last_trace = contextvars.ContextVar("last_trace", default=None)
+        self._term_matcher = None  # built from the course store on first retrieval
+        self.catalog_path = catalog_path or Config.CATALOG_PATH
+        self.cache_dir = cache_dir or Config.CACHE_DIR
+        self.retriever = retriever or Config.CATALOG_RETRIEVER
+        if self.retriever not in ("bm25", "semantic"):
+            raise ValueError(f"Unknown catalog retriever: {self.retriever}")
+        # A SharedCatalog (or the path of one) replaces the per-process catalog text and BM25
+        # index with a read-only memory mapping that many worker processes can share
+        self.shared_catalog = shared_catalog
+        if shared_catalog is not None and self.retriever != "bm25":
+            raise ValueError("Shared catalogs support the bm25 retriever only")
+        # When catalog_path is a directory, its PDFs are indexed by a CatalogRegistry and the
+        # catalogs matching these filters (names or ids, and years) are searched as one catalog
+        self.catalogs = catalogs if catalogs is not None else _split_setting(Config.CATALOG_FILTER)
+        self.years = years if years is not None else [int(year) for year in _split_setting(Config.CATALOG_YEARS)]
+        self.catalog_registry = None
+        
+        # The catalog text, index and course store are loaded by _ensure_catalog: right away
+        # ("eager"), on a background thread ("background") or on first use ("lazy")
+        self.catalog_load = catalog_load or Config.CATALOG_LOAD_MODE
+        if self.catalog_load not in CATALOG_LOAD_MODES:
+            raise ValueError(f"Unknown catalog load mode: {self.catalog_load}")
+        self.catalog_load_seconds = None
+        self._catalog_lock = threading.Lock()
+        self._catalog_ready = False
+        self._catalog_thread = None
+        self._page_offsets = [0]
+        self._catalog_text = None
+        self._catalog_index = None
+        self._course_store = None
+        if self.catalog_load == "eager":
+            self._ensure_catalog()
+        elif self.catalog_load == "background":
+            self._catalog_thread = threading.Thread(target=self._load_catalog_in_background, name="catalog-loader", daemon=True)
+            self._catalog_thread.start()
+    
+    @property
+    def catalog_text(self):
+        self._ensure_catalog()
+        return self._catalog_text
+    
+    @property
+    def page_offsets(self):
+        self._ensure_catalog()
+        return self._page_offsets
+    
+    @property
+    def catalog_index(self):
+        self._ensure_catalog()
+        return self._catalog_index
+    
+    @property
+    def course_store(self):
+        self._ensure_catalog()
+        return self._course_store
+    
+    def wait_for_catalog(self):
+        """
+        Block until the catalog is loaded (starting the load if it is deferred).
+        
+        Returns:
+            float: Seconds the load itself took
+        """
+        self._ensure_catalog()
+        return self.catalog_load_seconds
+    
+    def _load_catalog_in_background(self):
+        try:
+            self._ensure_catalog()
+        except Exception as e:
+            # The first caller that needs the catalog retries the load and sees the error
+            print(f"Warning: Background catalog load failed: {e}")
+    
+    def _ensure_catalog(self):
+        """Load the catalog text, search index and course store once; later calls return immediately."""
+        if self._catalog_ready:
+            return
+        with self._catalog_lock:
+            if self._catalog_ready:
+                return
+            started = time.perf_counter()
+            if self.shared_catalog is not None:
+                self._attach_shared_catalog()
+            elif os.path.isdir(self.catalog_path):
+                self._load_catalog_registry()
+            else:
+                self._catalog_text = self._load_catalog_text()
+                self._catalog_index = self._load_catalog_index()
+                self._course_store = CatalogCourseDatabase.load_or_build(
+                    self._catalog_text, self._page_offsets, self.cache_dir
+                )
+            self.catalog_load_seconds = time.perf_counter() - started
+            self._catalog_ready = True
+        
+    def _attach_shared_catalog(self):
+        """Serve the catalog text and index from a SharedCatalog mapping instead of loading them."""
+        from src.recommender.shared_catalog import SharedCatalog
+        if isinstance(self.shared_catalog, (str, os.PathLike)):
+            self.shared_catalog = SharedCatalog(self.shared_catalog)
+        shared = self.shared_catalog
+        self._catalog_text = shared.text
+        self._page_offsets = shared.page_offsets
+        self._catalog_index = shared.index
+        # The course store is a SQLite file, so its pages are shared through the OS page cache too
+        self._course_store = CatalogCourseDatabase(shared.meta["course_store_path"])
+    
+    def _load_catalog_registry(self):
+        """Index the catalog directory (only changed PDFs and pages) and use the selected catalogs."""
+        from src.recommender.catalog_registry import CatalogRegistry
+        if self.catalog_registry is None:
+            self.catalog_registry = CatalogRegistry(self.catalog_path, self.cache_dir)
+        self.catalog_registry.refresh()
+        self._use_catalog_view()
+    
+    def _use_catalog_view(self):
+        """Switch to the registry's current view of the selected catalogs."""
+        view = self.catalog_registry.view(self.catalogs, self.years)
+        if not view.catalog_ids:
+            print(f"Warning: No catalogs in {self.catalog_path} match catalogs={self.catalogs} years={self.years}")
+        self._catalog_text = view.text
+        self._page_offsets = view.page_offsets
+        # The registry's incremental BM25 index serves the view; the semantic index is built over its text
+        self._catalog_index = view if self.retriever == "bm25" else self._load_catalog_index()
+        previous_store = self._course_store
+        self._course_store = CatalogCourseDatabase.load_or_build(view.text, view.page_offsets, self.cache_dir)
+        if previous_store is not None:
+            previous_store.close()
+        self._term_matcher = None
+    
+    def refresh_catalog(self):
+        """
+        Re-index a catalog directory after PDFs were added, replaced or removed.
+        
+        Only changed PDFs are extracted and only changed pages re-tokenized, then
+        the generator switches to the updated catalog. Call it between plans: a
+        plan running during the switch may mix old and new catalog data.
+        
+        Returns:
+            dict: The CatalogRegistry.refresh() summary
+        """
+        self._ensure_catalog()
+        if self.catalog_registry is None:
+            raise ValueError(f"refresh_catalog needs a catalog directory, got {self.catalog_path}")
+        with self._catalog_lock:
+            started = time.perf_counter()
+            summary = self.catalog_registry.refresh()
+            if summary["added"] or summary["updated"] or summary["removed"]:
+                self._use_catalog_view()
+            self.catalog_load_seconds = time.perf_counter() - started
+        return summary
+    
+    def export_shared_catalog(self, path):
+        """
+        Write the loaded catalog and its BM25 index to a file that SharedCatalog can map.
         
+        Args:
+            path: Output file
+            
+        Returns:
+            str: path
+        """
+        from src.recommender.shared_catalog import write_shared_catalog
+        index = self.catalog_index
+        if not isinstance(index, CatalogIndex):
+            index = CatalogIndex.load_or_build(self.catalog_text, self.page_offsets, self.cache_dir)
+        meta = {"catalog_path": self.catalog_path, "course_store_path": os.path.abspath(self.course_store.db_path)}
+        write_shared_catalog(path, self.catalog_text, self.page_offsets, index, meta)
+        return path
+    
     def _load_catalog_text(self):
-        """Load and extract text from the engineering course catalog PDF."""
+        """
+        Load and extract text from the engineering course catalog PDF.
+        
+        Extracted text and page offsets are cached on disk keyed by the PDF's
+        content hash, so only the first start after a catalog change parses the PDF.
+        """
         try:
-            catalog_text = ""
             if not os.path.exists(self.catalog_path):
                 print(f"Warning: Catalog file not found at {self.catalog_path}")
                 return "Catalog data not available."
-                
-            pdf_document = fitz.open(self.catalog_path)
-            for page_num in range(len(pdf_document)):
-                page = pdf_document[page_num]
-                catalog_text += page.get_text()
+            
+            text_cache = CatalogTextCache(self.cache_dir)
+            try:
+                cached = text_cache.get(self.catalog_path)
+            except OSError:
+                cached = None
+            if cached is not None:
+                catalog_text, self._page_offsets = cached
+                return catalog_text
+            
+            import fitz  # PyMuPDF; imported here so warm starts served from the text cache skip it
+            
+            pages = []
+            page_offsets = []
+            offset = 0
+            with fitz.open(self.catalog_path) as pdf_document:
+                for page in pdf_document:
+                    page_text = page.get_text()
+                    page_offsets.append(offset)
+                    pages.append(page_text)
+                    offset += len(page_text)
+            
+            catalog_text = "".join(pages)
+            self._page_offsets = page_offsets or [0]
+            try:
+                text_cache.put(self.catalog_path, catalog_text, self._page_offsets)
+            except OSError as e:
+                print(f"Warning: Could not cache catalog text: {e}")
             return catalog_text
         except Exception as e:
             print(f"Error loading catalog: {e}")
             return "Error loading catalog data."
     
-    def search_catalog(self, query, context_size=500):
+    def _load_catalog_index(self):
+        """Load or build the index behind search_catalog for the configured retriever."""
+        if self.retriever == "semantic":
+            # Imported here so the default BM25 path does not pay for loading NumPy
+            from src.recommender.semantic_index import SemanticCatalogIndex
+            return SemanticCatalogIndex.load_or_build(self._catalog_text, self._page_offsets, self.cache_dir)
+        return CatalogIndex.load_or_build(self._catalog_text, self._page_offsets, self.cache_dir)
+    
+    def search_catalog(self, query, context_size=500, top_k=None):
         """
         Search the engineering catalog for relevant information.
         
+        Chunks are ranked by the catalog index (BM25 or semantic, see retriever),
+        so the cost does not grow with a scan of the whole catalog.
+        
         Args:
             query: The search query (course name, topic, etc.)
             context_size: Number of characters to include before and after match
+            top_k: Maximum number of snippets to return (defaults to Config.CATALOG_SEARCH_TOP_K)
             
         Returns:
-            list: List of relevant text snippets from the catalog
+            list: List of relevant text snippets from the catalog, most relevant first
         """
-        query = query.lower()
-        catalog_lower = self.catalog_text.lower()
-        results = []
+        ranked = self.catalog_index.search(query, top_k or Config.CATALOG_SEARCH_TOP_K)
+        return self._snippets_for_ranked([query], [ranked], context_size)[0]
+    
+    def search_catalog_batch(self, queries, context_size=500, top_k=None):
+        """
+        Search the catalog for many queries at once (e.g. one per student in a batch).
         
-        # Find all occurrences of the query in the catalog
-        start_pos = 0
-        while True:
-            pos = catalog_lower.find(query, start_pos)
-            if pos == -1:
-                break
-                
-            # Extract context around the match
-            context_start = max(0, pos - context_size)
-            context_end = min(len(self.catalog_text), pos + len(query) + context_size)
-            context = self.catalog_text[context_start:context_end]
-            
-            # Add the snippet to results
-            results.append(context)
-            start_pos = pos + len(query)
+        The semantic retriever scores all queries with a single matrix-matrix product,
+        and each matched chunk is scanned once for all queries.
+        
+        Args:
+            queries: List of search queries
+            context_size: Number of characters to include before and after match
+            top_k: Maximum number of snippets per query
             
+        Returns:
+            list: One list of snippets per query
+        """
+        ranked_lists = self.catalog_index.search_batch(queries, top_k or Config.CATALOG_SEARCH_TOP_K)
+        return self._snippets_for_ranked(queries, ranked_lists, context_size)
+    
+    def _snippets_for_ranked(self, queries, ranked_lists, context_size):
+        """Turn ranked (chunk_id, score) lists into context snippets centred on each query."""
+        catalog_text = self.catalog_text
+        return [
+            [catalog_text[start:end] for start, end, _ in windows]
+            for windows in self._windows_for_ranked(queries, ranked_lists, context_size)
+        ]
+    
+    def _windows_for_ranked(self, queries, ranked_lists, context_size):
+        """
+        Turn ranked (chunk_id, score) lists into (start, end, relevance) catalog windows.
+        
+        Relevance is the chunk's score divided by the query's best score, so windows
+        found for different queries can be compared when assembling the context.
+        """
+        # One automaton pass over each distinct chunk finds the first occurrence of every query in it
+        matcher = TermMatcher(queries)
+        catalog_text, chunks = self.catalog_text, self.catalog_index.chunks
+        chunk_ids = dict.fromkeys(chunk_id for ranked in ranked_lists for chunk_id, _ in ranked)
+        first_match = {}
+        for chunk_id in chunk_ids:
+            chunk_start, chunk_end, _ = chunks[chunk_id]
+            for start, end, query in matcher.find_all(catalog_text[chunk_start:chunk_end]):
+                first_match.setdefault((chunk_id, query), (chunk_start + start, chunk_start + end))
+        
+        results = []
+        for query, ranked in zip(queries, ranked_lists):
+            windows = []
+            top_score = max((score for _, score in ranked), default=0.0) or 1.0
+            for chunk_id, score in ranked:
+                # Centre the snippet on the exact phrase when the chunk contains it
+                chunk_start, chunk_end, _ = chunks[chunk_id]
+                match_start, match_end = first_match.get((chunk_id, query), (chunk_start, chunk_end))
+                context_start = max(0, match_start - context_size)
+                context_end = min(len(catalog_text), match_end + context_size)
+                windows.append((context_start, context_end, score / top_score))
+            results.append(windows)
         return results
     
-    def generate_plan(self, student, target_course, course_db):
+    @property
+    def last_run(self):
+        """PipelineRun of the most recent plan generated in this thread or asyncio task, for stage timing reports."""
+        return self._last_run.get()
+    
+    @property
+    def last_trace(self):
+        """Telemetry Trace of the most recent plan generated in this thread or asyncio task."""
+        return self._last_trace.get()
+    
+    def generate_plan(self, student, target_course, course_db, bypass_cache=False):
         """
         Generate a learning plan using a multi-turn interaction approach with RAG.
         
+        Blocking wrapper around generate_plan_async using a pooled LLMClient; it must
+        not be called from inside a running event loop. A Config.PROFILE_SAMPLE_RATE
+        fraction of calls is profiled with cProfile into Config.PROFILE_DIR.
+        
         Args:
             student: Student object with background information
             target_course: The target course the student wants to take
             course_db: CourseDatabase object with course information
+            bypass_cache: Skip cached LLM responses to force fresh sampling
             
         Returns:
             str: A personalized learning plan
         """
-        # Initialize LLM client
-        llm_client = LLMClient(self.host, self.port, self.api_key)
+        # Borrow a pooled LLM client (connections and model id are reused across plans); with
+        # several endpoints the async path's router spreads the calls over them instead
+        llm_client = None
+        if len(self.endpoints) == 1:
+            llm_client = LLMClient(self.host, self.port, self.api_key, pool=self.client_pool, cache=self.response_cache)
+        label = profile_label(f"generate_plan_{self.generator_name}")
+        with maybe_profile(Config.PROFILE_SAMPLE_RATE, Config.PROFILE_DIR, label):
+            return run_blocking(
+                self.generate_plan_async(student, target_course, course_db, llm_client, bypass_cache),
+                self._get_async_client() if llm_client is None else None,
+            )
+    
+    async def generate_plan_async(self, student, target_course, course_db, llm_client=None, bypass_cache=False):
+        """
+        Asynchronously generate a learning plan using a multi-turn interaction approach with RAG.
         
-        # Step 1: Knowledge assessment - understand what the student already knows
-        knowledge_prompt = self._create_knowledge_assessment_prompt(student, target_course)
-        knowledge_response = llm_client.query_llm(knowledge_prompt)
-        knowledge_assessment = knowledge_response.get("content", "")
+        Args:
+            student: Student object with background information
+            target_course: The target course the student wants to take
+            course_db: CourseDatabase object with course information
+            llm_client: Client to use; defaults to this generator's AsyncLLMRouter
+            bypass_cache: Skip cached LLM responses to force fresh sampling
+            
+        Returns:
+            str: A personalized learning plan
+        """
+        if llm_client is None:
+            llm_client = self._get_async_client()
         
-        # Step 2: Gap analysis - identify what knowledge/skills are missing
-        gap_prompt = self._create_gap_analysis_prompt(student, target_course, knowledge_assessment, course_db)
-        gap_response = llm_client.query_llm(gap_prompt)
-        gap_analysis = gap_response.get("content", "")
+        # Step 4: Final plan generation - combine all insights into a complete plan
+        async def create_final_plan(final_prompt):
+            response = await query_llm_async(llm_client, final_prompt, bypass_cache=bypass_cache)
+            return response.get("content", "Error generating learning plan.")
         
-        # Step 3: Course selection with RAG - search catalog before recommending courses
-        catalog_data = self._retrieve_catalog_information(gap_analysis, target_course)
+        stages = self._preparation_stages(student, target_course, course_db, llm_client, bypass_cache)
+        stages.append(Stage("final_plan", create_final_plan, ["final_prompt"]))
+        with tracing("generate_plan", generator=self.generator_name, target_course=target_course) as trace:
+            run = await StagePipeline(stages).run()
+        self._last_run.set(run)
+        self._last_trace.set(trace)
         
-        courses_prompt = self._create_rag_course_selection_prompt(
-            student, target_course, knowledge_assessment, gap_analysis, 
-            course_db, catalog_data
-        )
-        courses_response = llm_client.query_llm(courses_prompt)
-        course_selection = courses_response.get("content", "")
+        # Return the final learning plan
+        return run.results["final_plan"]
+    
+    def generate_plan_stream(self, student, target_course, course_db, bypass_cache=False):
+        """
+        Generate a learning plan with RAG, streaming the final plan as it is produced.
         
-        # Step 4: Final plan generation - combine all insights into a complete plan
-        final_prompt = self._create_final_plan_prompt(student, target_course, knowledge_assessment, gap_analysis, course_selection)
-        final_response = llm_client.query_llm(final_prompt)
+        The earlier stages run to completion as in generate_plan; only the final
+        step is streamed, so output starts at the first final-plan token.
         
-        # Return the final learning plan
-        return final_response.get("content", "Error generating learning plan.")
+        Args:
+            student: Student object with background information
+            target_course: The target course the student wants to take
+            course_db: CourseDatabase object with course information
+            bypass_cache: Skip cached LLM responses to force fresh sampling
+            
+        Yields:
+            str: Pieces of the personalized learning plan
+        """
+        if len(self.endpoints) > 1:
+            yield from iterate_blocking(
+                self.generate_plan_stream_async(student, target_course, course_db, bypass_cache=bypass_cache),
+                self._get_async_client(),
+            )
+            return
+        llm_client = LLMClient(self.host, self.port, self.api_key, pool=self.client_pool, cache=self.response_cache)
+        stages = self._preparation_stages(student, target_course, course_db, llm_client, bypass_cache)
+        run = run_blocking(self._run_traced(StagePipeline(stages), target_course))
+        self._last_run.set(run)
+        yield from llm_client.query_llm_stream(run.results["final_prompt"], bypass_cache=bypass_cache)
+    
+    async def generate_plan_stream_async(self, student, target_course, course_db, llm_client=None, bypass_cache=False):
+        """
+        Async counterpart of generate_plan_stream, for callers already running an event loop.
+        
+        Args:
+            student: Student object with background information
+            target_course: The target course the student wants to take
+            course_db: CourseDatabase object with course information
+            llm_client: AsyncLLMClient to use; defaults to this generator's AsyncLLMRouter
+            bypass_cache: Skip cached LLM responses to force fresh sampling
+            
+        Yields:
+            str: Pieces of the personalized learning plan
+        """
+        if llm_client is None:
+            llm_client = self._get_async_client()
+        stages = self._preparation_stages(student, target_course, course_db, llm_client, bypass_cache)
+        run = await self._run_traced(StagePipeline(stages), target_course)
+        self._last_run.set(run)
+        async for chunk in llm_client.query_llm_stream(run.results["final_prompt"], bypass_cache=bypass_cache):
+            yield chunk
+    
+    async def _run_traced(self, pipeline, target_course):
+        """Run the preparation stages of a streamed plan under their own trace."""
+        with tracing("prepare_plan", generator=self.generator_name, target_course=target_course) as trace:
+            run = await pipeline.run()
+        self._last_trace.set(trace)
+        return run
+    
+    def _preparation_stages(self, student, target_course, course_db, llm_client, bypass_cache=False):
+        """Build the pipeline stages that lead up to the final plan prompt."""
+        async def query(prompt):
+            response = await query_llm_async(llm_client, prompt, bypass_cache=bypass_cache)
+            return response.get("content", "")
+        
+        # Step 1: Knowledge assessment - understand what the student already knows
+        async def assess_knowledge():
+            return await query(self._create_knowledge_assessment_prompt(student, target_course))
+        
+        # Catalog lookups for the target and prior courses need no LLM output, so they overlap step 1
+        def prefetch_target():
+            return self._prefetch_catalog_terms([target_course], top_k=2)
+        
+        def prefetch_prior_courses():
+            return self._prefetch_catalog_terms(student.prior_courses, top_k=1)
+        
+        # Step 2: Gap analysis - identify what knowledge/skills are missing
+        async def analyse_gaps(knowledge_assessment):
+            return await query(self._create_gap_analysis_prompt(student, target_course, knowledge_assessment, course_db))
+        
+        # Step 3: Course selection with RAG - search catalog before recommending courses
+        def retrieve_catalog(gap_analysis, target_snippets, prior_course_snippets):
+            return self._retrieve_catalog_information(
+                gap_analysis, target_course, {**prior_course_snippets, **target_snippets}
+            )
+        
+        async def select_courses(knowledge_assessment, gap_analysis, catalog_data):
+            return await query(self._create_rag_course_selection_prompt(
+                student, target_course, knowledge_assessment, gap_analysis,
+                course_db, catalog_data
+            ))
+        
+        def build_final_prompt(knowledge_assessment, gap_analysis, course_selection):
+            return self._create_final_plan_prompt(student, target_course, knowledge_assessment, gap_analysis, course_selection)
+        
+        return [
+            Stage("knowledge_assessment", assess_knowledge),
+            Stage("target_snippets", prefetch_target),
+            Stage("prior_course_snippets", prefetch_prior_courses),
+            Stage("gap_analysis", analyse_gaps, ["knowledge_assessment"]),
+            Stage("catalog_data", retrieve_catalog, ["gap_analysis", "target_snippets", "prior_course_snippets"]),
+            Stage("course_selection", select_courses, ["knowledge_assessment", "gap_analysis", "catalog_data"]),
+            Stage("final_prompt", build_final_prompt, ["knowledge_assessment", "gap_analysis", "course_selection"]),
+        ]
     
+    def _get_async_client(self):
+        """Return the AsyncLLMRouter over this generator's endpoints, creating it on first use."""
+        if self._router is None:
+            self._router = AsyncLLMRouter(self.endpoints, max_concurrency=self.max_concurrency, cache=self.response_cache)
+        return self._router
+
     def _create_knowledge_assessment_prompt(self, student, target_course):
         """Generate a prompt focused solely on assessing the student's current knowledge."""
         
@@ -131,6 +544,10 @@ class LearningPlanGenerator:
         """Generate a prompt to select specific courses based on identified gaps."""
         
         courses_text = course_db.get_courses_as_text()
+        prerequisite_gaps = describe_prerequisite_gaps(student, target_course, course_db) or "Target course not found in the prerequisite graph."
+        knowledge_assessment, gap_analysis = self.prompt_budget.fit(
+            [knowledge_assessment, gap_analysis], fixed_text=courses_text + prerequisite_gaps
+        )
         
         prompt = f"""
         You are an academic advisor selecting courses to fill specific knowledge gaps.
@@ -151,6 +568,9 @@ class LearningPlanGenerator:
         Available courses in the catalog:
         {courses_text}
         
+        Missing prerequisites for the target, in the order they must be taken (computed from the catalog):
+        {prerequisite_gaps}
+        
         Based on the identified knowledge gaps, select specific courses from the catalog that would best prepare this student for {target_course}. For each recommended course:
         1. Explain exactly which gap(s) it addresses
         2. Justify why this specific course is appropriate given the student's background
@@ -166,6 +586,11 @@ class LearningPlanGenerator:
     def _create_final_plan_prompt(self, student, target_course, knowledge_assessment, gap_analysis, course_selection):
         """Generate a prompt to create the final learning plan that integrates all previous insights."""
         
+        # Earlier stage outputs are compacted (headings and bullet lists first) when over budget
+        knowledge_assessment, gap_analysis, course_selection = self.prompt_budget.fit(
+            [knowledge_assessment, gap_analysis, course_selection]
+        )
+        
         prompt = f"""
         You are an academic advisor creating a complete learning plan for a student.
         
@@ -211,6 +636,8 @@ class LearningPlanGenerator:
         """Generate a prompt to identify knowledge gaps based on previous assessment."""
         
         courses_text = course_db.get_courses_as_text()
+        prerequisite_gaps = describe_prerequisite_gaps(student, target_course, course_db) or "Target course not found in the prerequisite graph."
+        (knowledge_assessment,) = self.prompt_budget.fit([knowledge_assessment], fixed_text=courses_text + prerequisite_gaps)
         
         prompt = f"""
         You are an academic advisor identifying knowledge gaps for a student.
@@ -228,6 +655,9 @@ class LearningPlanGenerator:
         Available courses in the catalog:
         {courses_text}
         
+        Missing prerequisites for the target, in the order they must be taken (computed from the catalog):
+        {prerequisite_gaps}
+        
         Based on the knowledge assessment and the requirements for {target_course}, identify specific knowledge and skill gaps this student needs to address. Consider:
         - Mathematical prerequisites
         - Programming skills and frameworks
@@ -239,91 +669,111 @@ class LearningPlanGenerator:
         
         return prompt
     
-    def _retrieve_catalog_information(self, gap_analysis, target_course):
+    def _prefetch_catalog_terms(self, terms, top_k=2):
+        """Search the catalog for terms known before the gap analysis (target and prior courses)."""
+        return self._search_catalog_windows([term.strip() for term in terms if term.strip()], top_k)
+    
+    def _search_catalog_windows(self, terms, top_k, context_size=500):
+        """Return term -> (start, end, relevance) catalog windows for several terms at once."""
+        terms = list(dict.fromkeys(terms))
+        ranked_lists = self.catalog_index.search_batch(terms, top_k)
+        return dict(zip(terms, self._windows_for_ranked(terms, ranked_lists, context_size)))
+    
+    def _get_term_matcher(self):
+        """Return the automaton over known topics, catalog course codes and titles, building it on first use."""
+        if self._term_matcher is None:
+            courses = self.course_store.get_all_courses()
+            patterns = {topic: topic for topic in EDUCATIONAL_TOPICS}
+            patterns.update(course_code_patterns(course["code"] for course in courses))
+            for course in courses:
+                # Single-word titles ("Seminar", "Thesis") are too generic to be useful search terms
+                if len(course["name"].split()) > 1:
+                    patterns.setdefault(course["name"], normalize_course_code(course["code"]))
+            self._term_matcher = TermMatcher(patterns)
+        return self._term_matcher
+    
+    def _retrieve_catalog_information(self, gap_analysis, target_course, prefetched=None):
         """
         Retrieve relevant information from the engineering catalog based on identified gaps.
         
         Args:
             gap_analysis: The identified knowledge gaps
             target_course: The target course
+            prefetched: Optional dict of term -> catalog windows already searched (e.g. by an earlier stage)
             
         Returns:
             str: Relevant catalog information
         """
-        # Use a set for collecting key terms (eliminates duplicates automatically)
-        key_terms = set()
-        
-        # Add the target course as a key term
-        key_terms.add(target_course)
-        
-        # Extract potential course names and topics from gap analysis
-        gap_lines = gap_analysis.split('\n')
-        
-        # List of common educational topics to look for
-        educational_topics = {
-            "calculus", "programming", "statistics", "algorithm", 
-            "linear algebra", "probability", "machine learning", "data science",
-            "neural networks", "deep learning", "computer vision", "nlp",
-            "databases", "operating systems", "networks", "security"
-        }
+        # Topics, titles and codes mentioned in the free-text gap analysis become search terms
+        return self._retrieve_catalog_for_terms(
+            extract_key_terms(gap_analysis, self._get_term_matcher()), target_course, prefetched
+        )
+    
+    def _retrieve_catalog_for_terms(self, terms, target_course, prefetched=None):
+        """
+        Retrieve course records and catalog excerpts for a list of search terms.
         
-        for line in gap_lines:
-            line_lower = line.lower()
-            
-            # Look for course indicators
-            if "course" in line_lower or "prerequisite" in line_lower:
-                words = line.split()
-                for i in range(len(words) - 1):
-                    if words[i].lower() in {"course", "courses", "class", "classes"}:
-                        # Check for course codes (typically uppercase or containing numbers)
-                        next_word = words[i+1] if i+1 < len(words) else ""
-                        if next_word and (next_word[0].isupper() or any(c.isdigit() for c in next_word)):
-                            key_terms.add(next_word)
-                            
-                            # capture course numbers that might follow
-                            if i+2 < len(words) and any(c.isdigit() for c in words[i+2]):
-                                key_terms.add(f"{next_word} {words[i+2]}")
-            
-            # Look for educational topics
-            for topic in educational_topics:
-                if topic in line_lower:
-                    key_terms.add(topic)
-                    
-            # common course prefix patterns (CSCI 101, MATH-240)
-            import re
-            course_patterns = [
-                r'\b([A-Z]{2,5})\s*[-]?\s*(\d{3,4}[A-Z]?)\b',  # CSCI 101
-                r'\b([A-Z]{2,5})(\d{3,4}[A-Z]?)\b'             #  MATH240
-            ]
-            
-            for pattern in course_patterns:
-                matches = re.findall(pattern, line)
-                for match in matches:
-                    course_code = f"{match[0]} {match[1]}"
-                    key_terms.add(course_code)
-        
-        # Convert set to list for further processing
-        key_terms_list = list(key_terms)
-        
-        # Search the catalog for each key term
-        catalog_snippets = []
-        for term in key_terms_list:
-            snippets = self.search_catalog(term)
-            catalog_snippets.extend(snippets[:2])  # Limit to top 2 snippets per term
+        Args:
+            terms: Search terms (course codes, titles or topics)
+            target_course: The target course, always searched first
+            prefetched: Optional dict of term -> catalog windows already searched
             
-        # Limit overall length
-        max_catalog_text_length = 4000  # Prevent prompt from ~large
-        catalog_text = "\n---\n".join(catalog_snippets[:8])  # Limit to 8 
+        Returns:
+            str: Relevant catalog information
+        """
+        with span("catalog_retrieval") as retrieval:
+            catalog_text = self._assemble_catalog_information(terms, target_course, prefetched or {}, retrieval)
+        METRICS.inc("catalog_retrievals_total")
+        METRICS.inc("catalog_context_bytes_total", len(catalog_text.encode("utf-8")))
+        return catalog_text
+    
+    def _assemble_catalog_information(self, extracted, target_course, prefetched, retrieval):
+        """Body of _retrieve_catalog_for_terms; retrieval statistics are recorded on the given span."""
+        # Target and prefetched terms first, then the extracted terms
+        key_terms = list(dict.fromkeys([target_course, *prefetched, *extracted]))
+        
+        # Exact course records for any key term that names a catalog course
+        course_records = []
+        for term in key_terms:
+            course = self.course_store.get_course_by_code(term)
+            if course is not None and course not in course_records:
+                course_records.append(course)
+        
+        # Search the remaining terms together (top 2 windows per term)
+        windows = dict(prefetched)
+        windows.update(self._search_catalog_windows([term for term in key_terms if term not in prefetched], top_k=2))
+        
+        records_text = ""
+        if course_records:
+            records_text = "Catalog Course Records:\n" + "\n".join(format_course_record(course) for course in course_records)
+            records_text = truncate_to_tokens(records_text, Config.CATALOG_CONTEXT_TOKENS)
+        
+        # Overlapping windows are merged and duplicates dropped before filling the rest of the budget
+        snippet_budget = Config.CATALOG_CONTEXT_TOKENS - count_tokens(records_text + SNIPPET_SEPARATOR)
+        snippets_text = assemble_context(
+            [(start, end, relevance, term) for term, term_windows in windows.items() for start, end, relevance in term_windows],
+            self.catalog_text, snippet_budget, Config.CATALOG_MMR_LAMBDA
+        )
         
-        if len(catalog_text) > max_catalog_text_length:
-            catalog_text = catalog_text[:max_catalog_text_length] + "...[truncated]"
-            
+        catalog_text = SNIPPET_SEPARATOR.join(part for part in (records_text, snippets_text) if part)
+        retrieval.set(
+            terms_extracted=len(extracted),
+            terms_searched=len(key_terms),
+            course_records=len(course_records),
+            windows_found=sum(len(term_windows) for term_windows in windows.values()),
+            passages_sent=snippets_text.count(SNIPPET_SEPARATOR) + 1 if snippets_text else 0,
+            bytes_sent=len(catalog_text.encode("utf-8")),
+        )
         return catalog_text
     
     def _create_rag_course_selection_prompt(self, student, target_course, knowledge_assessment, gap_analysis, course_db, catalog_data):
         """Generate a RAG-enhanced prompt to select specific courses based on identified gaps."""
         
         courses_text = course_db.get_courses_as_text()
+        prerequisite_gaps = describe_prerequisite_gaps(student, target_course, course_db) or "Target course not found in the prerequisite graph."
+        knowledge_assessment, gap_analysis = self.prompt_budget.fit(
+            [knowledge_assessment, gap_analysis], fixed_text=courses_text + catalog_data + prerequisite_gaps
+        )
         
         prompt = f"""
         You are an academic advisor selecting courses to fill specific knowledge gaps.
@@ -344,6 +794,9 @@ class LearningPlanGenerator:
         Available courses in the catalog:
         {courses_text}
         
+        Missing prerequisites for the target, in the order they must be taken (computed from the catalog):
+        {prerequisite_gaps}
+        
         Relevant Information from Engineering Catalog:
         {catalog_data}
         
@@ -0,0 +1,467 @@
+"""
+Pre-forked process pool for plan generation over one shared, memory-mapped catalog.
+
+The parent loads the catalog once and writes it, with its BM25 index, to a
+shared catalog file (see shared_catalog.py). Every worker process maps that file
+read-only instead of holding its own copy of the text and index, so adding
+workers costs little memory beyond the interpreter itself:
+
+    with PlanPool(host, port, api_key, processes=4) as pool:
+        future = pool.submit(student, "Deep Learning")
+        plan = future.result()
+
+Tasks go to the least busy ready worker over a per-worker pipe. Workers that die
+are replaced and their tasks retried; a plan that exceeds task_timeout has its
+worker killed and replaced; workers are recycled after max_tasks_per_worker plans.
+"""
+
+import concurrent.futures
+import itertools
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from collections import deque
+from multiprocessing.connection import wait
+
+from config.config import Config
+from src.recommender.llm_router import configured_endpoints
+from src.recommender.telemetry import METRICS
+
+MAX_STARTUP_FAILURES = 3  # Consecutive workers dying before "ready" that mark the pool as broken
+
+
+class WorkerCrashedError(RuntimeError):
+    """A plan could not be generated because its worker process died."""
+
+
+def build_shared_catalog(catalog_path=None, cache_dir=None):
+    """
+    Load the catalog once and write the shared catalog file pool workers map.
+
+    The file is named after the catalog text's fingerprint, so it is reused until
+    the catalog changes.
+
+    Args:
+        catalog_path: Catalog PDF (defaults to the RAG generator's own)
+        cache_dir: Directory for the file (defaults to Config.CACHE_DIR)
+
+    Returns:
+        str: Path of the shared catalog file
+    """
+    from src.recommender.plan_generator_rag import LearningPlanGenerator
+    cache_dir = cache_dir or Config.CACHE_DIR
+    generator = LearningPlanGenerator(
+        None, None, None, catalog_path=catalog_path, cache_dir=cache_dir, retriever="bm25", catalog_load="eager"
+    )
+    try:
+        path = os.path.join(cache_dir, f"shared_catalog_{generator.catalog_index.fingerprint}.bin")
+        if not os.path.exists(path):
+            generator.export_shared_catalog(path)
+        return path
+    finally:
+        generator.course_store.close()
+
+
+def _worker_main(conn, settings):
+    """Entry point of a pool worker: attach to the shared catalog, then run plans sent over conn."""
+    # Ctrl-C is handled by the parent, which shuts workers down in order
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # The response cache lives under the pool's cache directory too, not the worker's cwd
+    Config.CACHE_DIR = settings["cache_dir"]
+    from src.models.course_database import CourseDatabase
+    from src.recommender.plan_generator_rag import LearningPlanGenerator
+
+    generator = LearningPlanGenerator(
+        settings["host"], settings["port"], settings["api_key"], cache_dir=settings["cache_dir"],
+        endpoints=settings["endpoints"], retriever="bm25", catalog_load="eager", shared_catalog=settings["shared_catalog_path"],
+    )
+    course_db = CourseDatabase()
+    send_lock = threading.Lock()
+
+    def send(message):
+        with send_lock:
+            conn.send(message)
+
+    def run(task_id, student, target_course, bypass_cache):
+        started = time.perf_counter()
+        try:
+            plan = generator.generate_plan(student, target_course, course_db, bypass_cache=bypass_cache)
+        except Exception as e:
+            send(("result", task_id, False, f"{type(e).__name__}: {e}", time.perf_counter() - started))
+        else:
+            send(("result", task_id, True, plan, time.perf_counter() - started))
+
+    send(("ready", os.getpid(), generator.catalog_load_seconds))
+    with concurrent.futures.ThreadPoolExecutor(settings["threads"]) as executor:
+        while True:
+            try:
+                message = conn.recv()
+            except EOFError:
+                break
+            if message is None:
+                break  # retire: finish the plans in flight, then exit
+            executor.submit(run, *message)
+    conn.close()
+
+
+class _Task:
+    def __init__(self, task_id, student, target_course, bypass_cache):
+        self.id = task_id
+        self.message = (task_id, student, target_course, bypass_cache)
+        self.future = concurrent.futures.Future()
+        self.attempts = 0
+
+
+class _WorkerHandle:
+    def __init__(self, worker_id, process, conn):
+        self.id = worker_id
+        self.process = process
+        self.conn = conn
+        self.pid = None
+        self.ready = False
+        self.retiring = False
+        self.timed_out = False
+        self.broken_pipe = False
+        self.dispatched = 0
+        self.completed = 0
+        self.in_flight = {}  # task_id -> (_Task, monotonic dispatch time)
+
+
+class PlanPool:
+    """
+    Pre-forked worker processes that generate learning plans from one shared catalog.
+
+    Args:
+        host, port, api_key: LLM endpoint used by every worker
+        endpoints: LLM servers the workers route between (defaults to host/port if given, else Config.LLM_ENDPOINTS)
+        catalog_path: Catalog PDF (defaults to the RAG generator's own)
+        processes: Worker processes (defaults to Config.POOL_PROCESSES)
+        threads_per_worker: Plans a worker generates concurrently (defaults to Config.POOL_THREADS_PER_WORKER)
+        max_tasks_per_worker: Plans before a worker is recycled, 0 for never (defaults to Config.POOL_MAX_TASKS_PER_WORKER)
+        task_timeout: Seconds before a plan's worker is killed and replaced, 0 for no limit
+            (defaults to Config.POOL_TASK_TIMEOUT_SECONDS)
+        retries: Times a plan lost to a worker crash is resubmitted
+        cache_dir: Directory for the shared catalog file and the workers' response cache
+            (defaults to Config.CACHE_DIR)
+        shared_catalog_path: Use an existing shared catalog file instead of building one
+        start_method: multiprocessing start method (defaults to "forkserver" where available)
+    """
+
+    def __init__(self, host=None, port=None, api_key=None, endpoints=None, catalog_path=None, processes=None, threads_per_worker=None,
+                 max_tasks_per_worker=None, task_timeout=None, retries=1, cache_dir=None, shared_catalog_path=None,
+                 start_method=None):
+        self.host = host or Config.LLM_HOST
+        self.port = port or Config.LLM_PORT
+        self.api_key = api_key or Config.LLM_API_KEY
+        if endpoints is None:
+            endpoints = configured_endpoints(api_key=self.api_key) if host is None else [(self.host, str(self.port), self.api_key)]
+        self.endpoints = endpoints
+        self.catalog_path = catalog_path
+        self.processes = processes or Config.POOL_PROCESSES
+        self.threads_per_worker = threads_per_worker or Config.POOL_THREADS_PER_WORKER
+        self.max_tasks_per_worker = Config.POOL_MAX_TASKS_PER_WORKER if max_tasks_per_worker is None else max_tasks_per_worker
+        self.task_timeout = Config.POOL_TASK_TIMEOUT_SECONDS if task_timeout is None else task_timeout
+        self.retries = retries
+        self.cache_dir = os.path.abspath(cache_dir or Config.CACHE_DIR)
+        self.shared_catalog_path = shared_catalog_path
+        if start_method is None:
+            start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self.start_method = start_method
+        self.counts = {"completed": 0, "failed": 0, "retried": 0, "timeouts": 0, "crashes": 0, "recycled": 0, "spawned": 0}
+
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._workers = {}  # worker id -> _WorkerHandle
+        self._backlog = deque()
+        self._worker_ids = itertools.count(1)
+        self._task_ids = itertools.count(1)
+        self._context = None
+        self._collector = None
+        self._started = False
+        self._closed = False
+        self._broken = False
+        self._startup_failures = 0
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def start(self, timeout=120):
+        """
+        Build (or reuse) the shared catalog and start the workers.
+
+        Args:
+            timeout: Seconds to wait for every worker to attach to the catalog
+
+        Returns:
+            PlanPool: self
+        """
+        with self._lock:
+            if self._started:
+                return self
+            if self._closed:
+                raise RuntimeError("PlanPool is closed")
+            self._started = True
+        if self.shared_catalog_path is None:
+            self.shared_catalog_path = build_shared_catalog(self.catalog_path, self.cache_dir)
+        self._context = multiprocessing.get_context(self.start_method)
+        if self.start_method == "forkserver":
+            # Workers fork from a server that has already imported the generator
+            self._context.set_forkserver_preload(["src.recommender.plan_generator_rag", "src.models.course_database"])
+
+        with self._lock:
+            for _ in range(self.processes):
+                self._spawn()
+        self._collector = threading.Thread(target=self._collect, name="plan-pool", daemon=True)
+        self._collector.start()
+
+        with self._condition:
+            started = self._condition.wait_for(
+                lambda: self._broken or sum(worker.ready for worker in self._workers.values()) >= self.processes,
+                timeout,
+            )
+        if not started or self._broken:
+            self.close(wait=False)
+            raise WorkerCrashedError("Plan pool workers failed to start")
+        return self
+
+    def submit(self, student, target_course, bypass_cache=False):
+        """
+        Queue a plan for the next free worker.
+
+        Args:
+            student: Student object
+            target_course: Course the plan leads to
+            bypass_cache: Skip the LLM response cache for this plan
+
+        Returns:
+            concurrent.futures.Future: Resolves to the plan text
+        """
+        if not self._started:
+            self.start()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("PlanPool is closed")
+            if self._broken:
+                raise WorkerCrashedError("Plan pool workers keep failing to start")
+            task = _Task(next(self._task_ids), student, target_course, bypass_cache)
+            task.future.set_running_or_notify_cancel()
+            self._backlog.append(task)
+            self._dispatch()
+        return task.future
+
+    def generate_plan(self, student, target_course, bypass_cache=False, timeout=None):
+        """Generate one plan in the pool and wait for it."""
+        return self.submit(student, target_course, bypass_cache).result(timeout)
+
+    def stats(self):
+        """Pool counters plus the state of every worker."""
+        with self._lock:
+            return {
+                **self.counts,
+                "backlog": len(self._backlog),
+                "shared_catalog_path": self.shared_catalog_path,
+                "workers": [
+                    {
+                        "id": worker.id, "pid": worker.pid, "ready": worker.ready, "retiring": worker.retiring,
+                        "in_flight": len(worker.in_flight), "dispatched": worker.dispatched, "completed": worker.completed,
+                    }
+                    for worker in self._workers.values()
+                ],
+            }
+
+    def close(self, wait=True, timeout=30):
+        """
+        Stop the workers.
+
+        Args:
+            wait: Finish queued and running plans first; otherwise they fail with CancelledError
+            timeout: Seconds to wait before remaining workers are terminated
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            if wait:
+                self._condition.wait_for(
+                    lambda: self._broken or not (self._backlog or any(w.in_flight for w in self._workers.values())),
+                    timeout,
+                )
+            self._fail_backlog(concurrent.futures.CancelledError())
+            for worker in self._workers.values():
+                self._retire(worker)
+
+        if self._collector is not None:
+            self._collector.join(max(0.0, deadline - time.monotonic()))
+        with self._lock:
+            workers = list(self._workers.values())
+        for worker in workers:
+            worker.process.terminate()
+        if self._collector is not None:
+            self._collector.join(5)
+
+    def _spawn(self):
+        """Start one worker process (called with the lock held)."""
+        parent_conn, child_conn = self._context.Pipe()
+        worker_id = next(self._worker_ids)
+        settings = {
+            "host": self.host, "port": self.port, "api_key": self.api_key, "endpoints": self.endpoints, "cache_dir": self.cache_dir,
+            "shared_catalog_path": self.shared_catalog_path, "threads": self.threads_per_worker,
+        }
+        process = self._context.Process(
+            target=_worker_main, args=(child_conn, settings), name=f"plan-worker-{worker_id}", daemon=True
+        )
+        process.start()
+        child_conn.close()
+        self._workers[worker_id] = _WorkerHandle(worker_id, process, parent_conn)
+        self.counts["spawned"] += 1
+
+    def _retire(self, worker):
+        """Ask a worker to exit once its plans in flight are done (called with the lock held)."""
+        if worker.retiring:
+            return
+        worker.retiring = True
+        try:
+            worker.conn.send(None)
+        except OSError:
+            pass  # already gone; the collector reaps it
+
+    def _collect(self):
+        """Collector thread: read results, reap and replace workers, enforce deadlines and dispatch."""
+        while True:
+            with self._lock:
+                if self._closed and not self._workers:
+                    self._condition.notify_all()
+                    return
+                workers = list(self._workers.values())
+            ready = wait([w.conn for w in workers] + [w.process.sentinel for w in workers], timeout=0.2)
+            with self._condition:
+                for worker in workers:
+                    if worker.conn in ready:
+                        self._drain(worker)
+                    if worker.process.sentinel in ready:
+                        self._drain(worker)
+                        self._reap(worker)
+                self._enforce_deadlines()
+                self._dispatch()
+                self._condition.notify_all()
+
+    def _drain(self, worker):
+        try:
+            while worker.conn.poll():
+                self._handle_message(worker, worker.conn.recv())
+        except (EOFError, OSError):
+            pass  # the process sentinel reports the exit
+
+    def _handle_message(self, worker, message):
+        if message[0] == "ready":
+            _, worker.pid, _load_seconds = message
+            worker.ready = True
+            self._startup_failures = 0
+            return
+        _, task_id, ok, payload, duration = message
+        entry = worker.in_flight.pop(task_id, None)
+        if entry is None:
+            return  # already failed by a deadline
+        task = entry[0]
+        worker.completed += 1
+        METRICS.observe("plan_pool_task_seconds", duration)
+        if ok:
+            self.counts["completed"] += 1
+            METRICS.inc("plan_pool_tasks_total", outcome="completed")
+            task.future.set_result(payload)
+        else:
+            self.counts["failed"] += 1
+            METRICS.inc("plan_pool_tasks_total", outcome="failed")
+            task.future.set_exception(RuntimeError(payload))
+
+    def _reap(self, worker):
+        """Remove an exited worker, retry its plans and start a replacement (called with the lock held)."""
+        worker.process.join()
+        worker.conn.close()
+        del self._workers[worker.id]
+
+        if worker.retiring and not worker.in_flight and worker.process.exitcode == 0:
+            reason = "recycled"
+        elif worker.timed_out:
+            reason = "timeout"
+        else:
+            reason = "crashed"
+            self.counts["crashes"] += 1
+            print(f"Warning: Plan worker {worker.pid or worker.id} exited with code {worker.process.exitcode}")
+        METRICS.inc("plan_pool_worker_exits_total", reason=reason)
+        if not worker.ready:
+            self._startup_failures += 1
+            if self._startup_failures >= MAX_STARTUP_FAILURES:
+                self._broken = True
+
+        for task, _ in worker.in_flight.values():
+            task.attempts += 1
+            if task.attempts <= self.retries and not self._broken:
+                self.counts["retried"] += 1
+                self._backlog.appendleft(task)
+            else:
+                self.counts["failed"] += 1
+                METRICS.inc("plan_pool_tasks_total", outcome="crashed")
+                task.future.set_exception(WorkerCrashedError(f"Plan worker exited with code {worker.process.exitcode}"))
+        worker.in_flight.clear()
+
+        if self._broken:
+            self._fail_backlog(WorkerCrashedError("Plan pool workers keep failing to start"))
+        elif not worker.retiring and not self._closed:
+            self._spawn()
+
+    def _enforce_deadlines(self):
+        """Fail plans running past task_timeout and kill their workers (called with the lock held)."""
+        if not self.task_timeout:
+            return
+        now = time.monotonic()
+        for worker in list(self._workers.values()):
+            expired = [task_id for task_id, (_, dispatched) in worker.in_flight.items() if now - dispatched > self.task_timeout]
+            if not expired or worker.timed_out:
+                continue
+            for task_id in expired:
+                task, _ = worker.in_flight.pop(task_id)
+                self.counts["timeouts"] += 1
+                METRICS.inc("plan_pool_tasks_total", outcome="timeout")
+                task.future.set_exception(TimeoutError(f"Plan took longer than {self.task_timeout} seconds"))
+            # The other plans on this worker are retried elsewhere when it is reaped
+            worker.timed_out = True
+            worker.retiring = True
+            worker.process.kill()
+            if not self._closed:
+                self._spawn()
+
+    def _dispatch(self):
+        """Send queued plans to the least busy ready workers (called with the lock held)."""
+        while self._backlog:
+            candidates = [
+                w for w in self._workers.values()
+                if w.ready and not w.retiring and not w.broken_pipe and len(w.in_flight) < self.threads_per_worker
+            ]
+            if not candidates:
+                return
+            worker = min(candidates, key=lambda w: len(w.in_flight))
+            task = self._backlog.popleft()
+            try:
+                worker.conn.send(task.message)
+            except OSError:
+                self._backlog.appendleft(task)
+                worker.broken_pipe = True  # reaped and replaced once its exit is seen
+                continue
+            worker.in_flight[task.id] = (task, time.monotonic())
+            worker.dispatched += 1
+            if self.max_tasks_per_worker and worker.dispatched >= self.max_tasks_per_worker:
+                self.counts["recycled"] += 1
+                self._retire(worker)
+                if not self._closed:
+                    self._spawn()
+
+    def _fail_backlog(self, error):
+        while self._backlog:
+            self._backlog.popleft().future.set_exception(error)
@@ -0,0 +1,157 @@
+import functools
+import math
+import re
+
+WORD_PATTERN = re.compile(r"\w+|[^\w\s]")
+BULLET_PATTERN = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+")
+HEADING_PATTERN = re.compile(r"^\s*(?:#{1,6}\s+\S.*|\*\*[^*]+\*\*:?|[A-Z][^.!?]{0,80}:)\s*$")
+SENTENCE_END_PATTERN = re.compile(r"(?<=[.!?])\s")
+
+
+@functools.lru_cache(maxsize=None)
+def _get_encoding():
+    """
+    Return the tiktoken encoding, or None if tiktoken is not installed.
+
+    Resolved on the first count rather than at import time, since loading the
+    encoding can download its BPE file.
+    """
+    try:
+        import tiktoken  # optional: exact counts for OpenAI-style BPE vocabularies
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text):
+    """
+    Count the tokens in text.
+
+    Uses tiktoken when it is installed. Otherwise estimates BPE tokens as one
+    per punctuation mark plus one per four characters of each word, which stays
+    within a few percent of common LLM tokenizers on English prose.
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return sum(max(1, math.ceil(len(piece) / 4)) for piece in WORD_PATTERN.findall(text))
+
+
+def truncate_to_tokens(text, max_tokens, marker="...[truncated]"):
+    """Cut text at a line (or, failing that, word) boundary so it fits in max_tokens."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    budget = max(0, max_tokens - count_tokens(marker))
+
+    kept, used = [], 0
+    for line in text.splitlines():
+        line_tokens = count_tokens(line) + 1
+        if used + line_tokens > budget:
+            if not kept:
+                words, partial = line.split(), []
+                for word in words:
+                    word_tokens = count_tokens(word)
+                    if used + word_tokens > budget:
+                        break
+                    partial.append(word)
+                    used += word_tokens
+                kept.append(" ".join(partial))
+            break
+        kept.append(line)
+        used += line_tokens
+    return "\n".join(kept).rstrip() + marker
+
+
+def compact_text(text, max_tokens):
+    """
+    Shrink an earlier stage's output to fit max_tokens, keeping its structure.
+
+    Each step is applied only while the text is still over budget:
+      1. drop blank lines and collapse whitespace
+      2. keep only headings and bullet/numbered list items
+      3. shorten each list item to its first sentence
+      4. truncate at a line boundary
+
+    Args:
+        text: LLM output from an earlier stage
+        max_tokens: Token budget for this text
+
+    Returns:
+        str: The original text if it fits, otherwise a compacted version
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    lines = [" ".join(line.split()) for line in text.splitlines() if line.strip()]
+    compacted = "\n".join(lines)
+    if count_tokens(compacted) <= max_tokens:
+        return compacted
+
+    structured = [line for line in lines if BULLET_PATTERN.match(line) or HEADING_PATTERN.match(line)]
+    if any(BULLET_PATTERN.match(line) for line in structured):
+        lines = structured
+        compacted = "\n".join(lines)
+        if count_tokens(compacted) <= max_tokens:
+            return compacted
+
+        lines = [SENTENCE_END_PATTERN.split(line, 1)[0] for line in lines]
+        compacted = "\n".join(lines)
+        if count_tokens(compacted) <= max_tokens:
+            return compacted
+
+    return truncate_to_tokens(compacted, max_tokens)
+
+
+class PromptBudget:
+    """
+    Enforce a per-stage input token budget when assembling prompts.
+
+    fit() leaves sections alone when the prompt fits. Otherwise it splits the
+    remaining budget fairly: sections smaller than an equal share keep their
+    size, and the larger ones are compacted with compact_text() to share the rest.
+    """
+
+    def __init__(self, max_input_tokens, template_tokens=400, min_section_tokens=64):
+        self.max_input_tokens = max_input_tokens
+        self.template_tokens = template_tokens
+        self.min_section_tokens = min_section_tokens
+
+    def fit(self, sections, fixed_text=""):
+        """
+        Compact variable prompt sections so the whole prompt fits the budget.
+
+        Args:
+            sections: List of section texts (e.g. earlier stage outputs)
+            fixed_text: Other prompt content that is sent verbatim (e.g. the course list)
+
+        Returns:
+            list: The sections, compacted where needed, in the same order
+        """
+        sizes = [count_tokens(section) for section in sections]
+        available = self.max_input_tokens - self.template_tokens - count_tokens(fixed_text)
+        available = max(available, self.min_section_tokens * len(sections))
+        if sum(sizes) <= available:
+            return list(sections)
+
+        # Water-filling: small sections keep their size, large ones share what is left
+        allowances = [None] * len(sections)
+        remaining = available
+        pending = sorted(range(len(sections)), key=lambda i: sizes[i])
+        while pending:
+            share = remaining // len(pending)
+            i = pending[0]
+            if sizes[i] <= share:
+                allowances[i] = sizes[i]
+                remaining -= sizes[i]
+                pending.pop(0)
+            else:
+                for i in pending:
+                    allowances[i] = max(share, self.min_section_tokens)
+                break
+
+        return [
+            compact_text(section, allowance)
+            for section, allowance in zip(sections, allowances)
+        ]
@@ -0,0 +1,273 @@
+import functools
+import json
+import os
+import shutil
+import threading
+import zlib
+
+import numpy as np
+
+from src.recommender.catalog_index import chunk_catalog, text_fingerprint, tokenize
+
+SEMANTIC_FORMAT_VERSION = 1
+
+
+class HashingEmbedder:
+    """
+    Stateless feature hashing for word unigrams and bigrams.
+
+    Tokens are hashed with CRC32 (stable across processes, unlike hash()) into a
+    fixed number of signed buckets, so no vocabulary has to be stored.
+    """
+
+    def __init__(self, n_features=4096, cache_size=65536):
+        self.n_features = n_features
+        # Bounded, since query text keeps adding new features in a long-lived process
+        self._bucket = functools.lru_cache(maxsize=cache_size)(self._hash_feature)
+
+    def _hash_feature(self, feature):
+        h = zlib.crc32(feature.encode("utf-8"))
+        return h % self.n_features, 1.0 if h & 0x80000000 else -1.0
+
+    def transform(self, texts):
+        """
+        Hash texts into a dense (len(texts), n_features) float32 count matrix.
+
+        Args:
+            texts: Iterable of strings
+
+        Returns:
+            numpy.ndarray: Signed, sublinearly scaled term counts
+        """
+        texts = list(texts)
+        matrix = np.zeros((len(texts), self.n_features), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            if not features:
+                continue
+            buckets, signs = zip(*(self._bucket(feature) for feature in features))
+            np.add.at(matrix[row], np.array(buckets), np.array(signs, dtype=np.float32))
+
+        # Sublinear tf keeps long chunks from dominating on raw counts
+        matrix = np.sign(matrix) * np.log1p(np.abs(matrix))
+        return matrix.astype(np.float32, copy=False)
+
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class SemanticCatalogIndex:
+    """
+    Dense retrieval over catalog chunks using hashed TF-IDF and latent semantic analysis.
+
+    Chunks are embedded into hashed TF-IDF vectors and projected onto the top
+    singular directions of the chunk matrix, so related terms that co-occur in
+    the catalog end up close together. The float32 embedding matrix is saved as
+    .npy and memory-mapped on load. Queries are answered with one matrix-vector
+    product and argpartition, and batches with one matrix-matrix product.
+
+    Exposes the same search()/chunks interface as CatalogIndex, so either can
+    back LearningPlanGenerator.search_catalog.
+    """
+
+    def __init__(self, chunks, embeddings, idf, components=None, n_features=4096, fingerprint=""):
+        self.chunks = chunks
+        self.embeddings = embeddings
+        self.idf = idf
+        self.components = components
+        self.fingerprint = fingerprint
+        self.embedder = HashingEmbedder(n_features)
+
+    @classmethod
+    def build(cls, text, page_offsets=None, n_features=4096, dimensions=256, max_chunk_chars=1200):
+        """
+        Build a semantic index from catalog text.
+
+        Args:
+            text: The full catalog text
+            page_offsets: Start offset of every page in text
+            n_features: Number of hashing buckets
+            dimensions: Size of the LSA projection (no projection if the catalog is smaller)
+            max_chunk_chars: Soft upper bound on the size of a chunk
+
+        Returns:
+            SemanticCatalogIndex: The built index
+        """
+        chunks = chunk_catalog(text, page_offsets, max_chunk_chars)
+        embedder = HashingEmbedder(n_features)
+        counts = embedder.transform(text[start:end] for start, end, _ in chunks)
+
+        doc_freq = np.count_nonzero(counts, axis=0).astype(np.float32)
+        idf = (np.log((1 + len(chunks)) / (1 + doc_freq)) + 1).astype(np.float32)
+        weighted = counts * idf
+
+        components = None
+        if len(chunks) > dimensions:
+            components = cls._lsa_components(weighted, dimensions)
+            weighted = weighted @ components.T
+
+        embeddings = _normalize_rows(weighted).astype(np.float32)
+        return cls(chunks, embeddings, idf, components, n_features, text_fingerprint(text))
+
+    @staticmethod
+    def _lsa_components(matrix, dimensions, oversample=10):
+        """Randomized truncated SVD returning the top right singular vectors (dimensions x n_features)."""
+        rng = np.random.default_rng(0)
+        sketch = matrix @ rng.standard_normal((matrix.shape[1], dimensions + oversample)).astype(np.float32)
+        basis, _ = np.linalg.qr(sketch)
+        _, _, vt = np.linalg.svd(basis.T @ matrix, full_matrices=False)
+        return vt[:dimensions].astype(np.float32)
+
+    def embed_queries(self, queries):
+        """Embed queries into the same space as the chunk embeddings."""
+        weighted = self.embedder.transform(queries) * self.idf
+        if self.components is not None:
+            weighted = weighted @ self.components.T
+        return _normalize_rows(weighted).astype(np.float32)
+
+    def search(self, query, top_k=5):
+        """
+        Rank chunks by cosine similarity to a query.
+
+        Args:
+            query: Free-text query
+            top_k: Maximum number of chunks to return
+
+        Returns:
+            list: (chunk_id, score) tuples, best first
+        """
+        return self.search_batch([query], top_k)[0]
+
+    def search_batch(self, queries, top_k=5):
+        """
+        Rank chunks for many queries with a single matrix-matrix product.
+
+        Args:
+            queries: List of free-text queries
+            top_k: Maximum number of chunks per query
+
+        Returns:
+            list: One list of (chunk_id, score) tuples per query, best first
+        """
+        if not queries or len(self.chunks) == 0:
+            return [[] for _ in queries]
+
+        scores = self.embed_queries(queries) @ self.embeddings.T
+        top_k = min(top_k, scores.shape[1])
+
+        if top_k < scores.shape[1]:
+            candidates = np.argpartition(-scores, top_k - 1, axis=1)[:, :top_k]
+        else:
+            candidates = np.tile(np.arange(scores.shape[1]), (len(queries), 1))
+
+        results = []
+        for row, ids in enumerate(candidates):
+            row_scores = scores[row, ids]
+            order = np.argsort(-row_scores)
+            results.append([
+                (int(ids[i]), float(row_scores[i]))
+                for i in order if row_scores[i] > 0
+            ])
+        return results
+
+    def save(self, directory):
+        """Persist the index as .npy arrays plus a JSON metadata file."""
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, "embeddings.npy"), self.embeddings)
+        np.save(os.path.join(directory, "idf.npy"), self.idf)
+        if self.components is not None:
+            np.save(os.path.join(directory, "components.npy"), self.components)
+
+        meta = {
+            "version": SEMANTIC_FORMAT_VERSION,
+            "fingerprint": self.fingerprint,
+            "n_features": self.embedder.n_features,
+            "chunks": self.chunks,
+        }
+        with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, directory, fingerprint=None):
+        """
+        Load a persisted index, memory-mapping the embedding matrix.
+
+        Args:
+            directory: Directory written by save()
+            fingerprint: Expected catalog fingerprint; a mismatch is treated as missing
+
+        Returns:
+            SemanticCatalogIndex or None: The index, or None if it is missing or stale
+        """
+        try:
+            with open(os.path.join(directory, "meta.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("version") != SEMANTIC_FORMAT_VERSION:
+                return None
+            if fingerprint is not None and meta.get("fingerprint") != fingerprint:
+                return None
+
+            embeddings = np.load(os.path.join(directory, "embeddings.npy"), mmap_mode="r")
+            idf = np.load(os.path.join(directory, "idf.npy"))
+            components_path = os.path.join(directory, "components.npy")
+            components = np.load(components_path) if os.path.exists(components_path) else None
+        except (OSError, ValueError):
+            return None
+
+        chunks = [tuple(chunk) for chunk in meta["chunks"]]
+        return cls(chunks, embeddings, idf, components, meta["n_features"], meta["fingerprint"])
+
+    @classmethod
+    def load_or_build(cls, text, page_offsets=None, cache_dir=None):
+        """Load the semantic index for this catalog text from cache_dir, building and saving it if needed."""
+        fingerprint = text_fingerprint(text)
+        directory = os.path.join(cache_dir, f"semantic_index_{fingerprint}") if cache_dir else None
+
+        if directory:
+            index = cls.load(directory, fingerprint)
+            if index is not None:
+                return index
+
+        index = cls.build(text, page_offsets)
+        if directory:
+            # Save into a temporary directory first so readers never see a partial index
+            tmp_directory = f"{directory}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                index.save(tmp_directory)
+                _replace_directory(tmp_directory, directory)
+                # Reopen so the embeddings are served from the memory-mapped file
+                return cls.load(directory, fingerprint) or index
+            except OSError as e:
+                print(f"Warning: Could not save semantic index: {e}")
+                shutil.rmtree(tmp_directory, ignore_errors=True)
+        return index
+
+
+def _replace_directory(source, destination):
+    """
+    Move directory source to destination, replacing an existing (e.g. stale) destination.
+
+    os.replace cannot overwrite a non-empty directory, so the old one is renamed
+    aside, the new one moved in, and only then the old one removed. Readers never
+    see a partial index; one that looks between the two renames finds none and builds it.
+    """
+    old_directory = f"{source}.old"
+    try:
+        os.rename(destination, old_directory)
+    except FileNotFoundError:
+        old_directory = None
+    try:
+        os.rename(source, destination)
+    except OSError:
+        if old_directory is not None:
+            try:
+                os.rename(old_directory, destination)
+            except OSError:  # another writer has moved its index in meanwhile
+                shutil.rmtree(old_directory, ignore_errors=True)
+        raise
+    if old_directory is not None:
+        shutil.rmtree(old_directory, ignore_errors=True)
@@ -0,0 +1,264 @@
+import array
+import bisect
+import heapq
+import json
+import mmap
+import os
+import struct
+import threading
+
+from src.recommender.catalog_index import CatalogIndex, text_fingerprint, tokenize
+
+SHARED_CATALOG_MAGIC = b"LPRCAT01"
+SHARED_CATALOG_VERSION = 1
+HEADER = struct.Struct("<8sIIQQQdd40s")  # magic, version, text width, text length, chunks, terms, k1, b, fingerprint
+SECTIONS = (
+    "meta", "text", "page_offsets", "chunks", "length_norm",
+    "term_offsets", "terms", "posting_offsets", "idf", "posting_ids", "posting_tfs",
+)
+SECTION_TABLE = struct.Struct("<" + "QQ" * len(SECTIONS))  # (offset, length) per section
+TEXT_CODECS = {1: "latin-1", 2: "utf-16-le", 4: "utf-32-le"}
+
+
+def _typed(typecode, values):
+    data = array.array(typecode, values)
+    if typecode in "IQ" and data.itemsize != {"I": 4, "Q": 8}[typecode]:
+        raise RuntimeError(f"Unsupported platform: array('{typecode}') is {data.itemsize} bytes")
+    return data.tobytes()
+
+
+def text_width(text):
+    """Bytes per character needed to store text with fixed-width indexing (like CPython's own str layout)."""
+    highest = max(map(ord, text), default=0)
+    return 1 if highest < 0x100 else 2 if highest < 0x10000 else 4
+
+
+def write_shared_catalog(path, text, page_offsets, index, meta=None):
+    """
+    Write catalog text, page offsets and a BM25 index to one file that processes can memory-map.
+
+    Text is stored with a fixed width per character, so a character offset maps
+    straight to a byte offset. Index terms are sorted by their UTF-8 bytes so they
+    can be looked up by binary search without building a dict per process.
+
+    Args:
+        path: Output file (written atomically)
+        text: The full catalog text
+        page_offsets: Start offset of every page in text
+        index: CatalogIndex built from text
+        meta: Optional JSON-serialisable metadata (e.g. the course store path)
+    """
+    width = text_width(text)
+    terms = sorted(index.postings, key=lambda term: term.encode("utf-8"))
+    encoded_terms = [term.encode("utf-8") for term in terms]
+
+    term_offsets, offset = [0], 0
+    for encoded in encoded_terms:
+        offset += len(encoded)
+        term_offsets.append(offset)
+    posting_offsets, posting_ids, posting_tfs = [0], array.array("I"), array.array("I")
+    for term in terms:
+        ids, tfs = index.postings[term]
+        posting_ids.extend(ids)
+        posting_tfs.extend(tfs)
+        posting_offsets.append(len(posting_ids))
+
+    sections = {
+        "meta": json.dumps(meta or {}).encode("utf-8"),
+        "text": text.encode(TEXT_CODECS[width]),
+        "page_offsets": _typed("Q", page_offsets or [0]),
+        "chunks": _typed("I", [value for chunk in index.chunks for value in chunk]),
+        "length_norm": _typed("d", index.length_norm),
+        "term_offsets": _typed("Q", term_offsets),
+        "terms": b"".join(encoded_terms),
+        "posting_offsets": _typed("Q", posting_offsets),
+        "idf": _typed("d", [index.idf[term] for term in terms]),
+        "posting_ids": _typed("I", posting_ids),
+        "posting_tfs": _typed("I", posting_tfs),
+    }
+
+    header = HEADER.pack(
+        SHARED_CATALOG_MAGIC, SHARED_CATALOG_VERSION, width, len(text), len(index.chunks), len(terms),
+        index.k1, index.b, index.fingerprint.encode("ascii").ljust(40, b"\0"),
+    )
+    table, layout = [], []
+    position = HEADER.size + SECTION_TABLE.size
+    for name in SECTIONS:
+        position += -position % 8  # 8-byte alignment for the typed views
+        table.extend((position, len(sections[name])))
+        layout.append((position, sections[name]))
+        position += len(sections[name])
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header + SECTION_TABLE.pack(*table))
+        for offset, data in layout:
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(data)
+    os.replace(tmp_path, path)
+
+
+class MappedText:
+    """
+    Read-only view of catalog text stored in a memory-mapped file.
+
+    Supports the operations retrieval needs (len() and slicing); slices are
+    decoded on demand, so the full text is never copied into the process.
+    """
+
+    def __init__(self, buffer, width, length):
+        self._buffer = buffer
+        self._width = width
+        self._codec = TEXT_CODECS[width]
+        self._length = length
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self._length)
+            if step != 1:
+                return str(self)[key]
+            if stop <= start:
+                return ""
+            return str(self._buffer[start * self._width:stop * self._width], self._codec)
+        if key < 0:
+            key += self._length
+        if not 0 <= key < self._length:
+            raise IndexError("MappedText index out of range")
+        return self[key:key + 1]
+
+    def __str__(self):
+        return str(self._buffer, self._codec)
+
+
+class _ChunkList:
+    """Sequence of (start, end, page_number) tuples over a flat uint32 view."""
+
+    def __init__(self, values):
+        self._values = values
+
+    def __len__(self):
+        return len(self._values) // 3
+
+    def __getitem__(self, chunk_id):
+        if not 0 <= chunk_id < len(self):
+            raise IndexError("chunk id out of range")
+        base = chunk_id * 3
+        return self._values[base], self._values[base + 1], self._values[base + 2]
+
+
+class _TermList:
+    """Sorted sequence of UTF-8 encoded terms, for bisect lookups."""
+
+    def __init__(self, blob, offsets):
+        self._blob = blob
+        self._offsets = offsets
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        return bytes(self._blob[self._offsets[i]:self._offsets[i + 1]])
+
+
+class MappedCatalogIndex:
+    """
+    BM25 index served from a memory-mapped shared catalog file.
+
+    Ranks exactly like CatalogIndex, but postings, idf and chunk data are read
+    from the mapping, so every process attached to the file shares one copy in
+    the OS page cache.
+    """
+
+    def __init__(self, views, chunk_count, fingerprint, k1, b):
+        self.chunks = _ChunkList(views["chunks"])
+        self.fingerprint = fingerprint
+        self.k1 = k1
+        self.b = b
+        self.length_norm = views["length_norm"]
+        self._terms = _TermList(views["terms"], views["term_offsets"])
+        self._idf = views["idf"]
+        self._posting_offsets = views["posting_offsets"]
+        self._posting_ids = views["posting_ids"]
+        self._posting_tfs = views["posting_tfs"]
+
+    def _term_id(self, term):
+        key = term.encode("utf-8")
+        i = bisect.bisect_left(self._terms, key)
+        if i < len(self._terms) and self._terms[i] == key:
+            return i
+        return None
+
+    def search(self, query, top_k=5):
+        """Rank chunks against a query with BM25; same results as CatalogIndex.search."""
+        scores = {}
+        k1 = self.k1
+        length_norm = self.length_norm
+        for term in set(tokenize(query)):
+            term_id = self._term_id(term)
+            if term_id is None:
+                continue
+            idf = self._idf[term_id]
+            start, end = self._posting_offsets[term_id], self._posting_offsets[term_id + 1]
+            for chunk_id, tf in zip(self._posting_ids[start:end], self._posting_tfs[start:end]):
+                score = idf * tf * (k1 + 1) / (tf + length_norm[chunk_id])
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + score
+
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+    def search_batch(self, queries, top_k=5):
+        """Rank chunks for several queries; returns one search() result per query."""
+        return [self.search(query, top_k) for query in queries]
+
+
+class SharedCatalog:
+    """
+    A catalog file written by write_shared_catalog, mapped read-only into this process.
+
+    Attributes:
+        text: MappedText of the catalog
+        page_offsets: Start offset of every page
+        index: MappedCatalogIndex over the text
+        meta: Metadata stored with the file
+        fingerprint: Fingerprint of the original catalog text
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+
+        magic, version, width, text_length, chunk_count, _, k1, b, fingerprint = HEADER.unpack_from(view, 0)
+        if magic != SHARED_CATALOG_MAGIC or version != SHARED_CATALOG_VERSION:
+            view.release()
+            self._mmap.close()
+            raise ValueError(f"Not a shared catalog file (or an unsupported version): {path}")
+        table = SECTION_TABLE.unpack_from(view, HEADER.size)
+        raw = {name: view[table[2 * i]:table[2 * i] + table[2 * i + 1]] for i, name in enumerate(SECTIONS)}
+        typecodes = {
+            "page_offsets": "Q", "chunks": "I", "length_norm": "d", "term_offsets": "Q",
+            "posting_offsets": "Q", "idf": "d", "posting_ids": "I", "posting_tfs": "I",
+        }
+        views = {name: raw[name].cast(typecodes[name]) if name in typecodes else raw[name] for name in SECTIONS}
+
+        self.fingerprint = fingerprint.rstrip(b"\0").decode("ascii")
+        self.meta = json.loads(bytes(views["meta"]) or b"{}")
+        self.text = MappedText(views["text"], width, text_length)
+        self.page_offsets = list(views["page_offsets"])
+        self.index = MappedCatalogIndex(views, chunk_count, self.fingerprint, k1, b)
+
+    @classmethod
+    def build(cls, path, text, page_offsets, index=None, meta=None):
+        """Write a shared catalog for text (building the BM25 index if not given) and map it."""
+        if index is None:
+            index = CatalogIndex.build(text, page_offsets)
+        if index.fingerprint != text_fingerprint(text):
+            raise ValueError("Index was built from a different catalog text")
+        write_shared_catalog(path, text, page_offsets, index, meta)
+        return cls(path)
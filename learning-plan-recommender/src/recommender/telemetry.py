@@ -0,0 +1,390 @@
+import contextlib
+import contextvars
+import cProfile
+import itertools
+import json
+import os
+import random
+import threading
+import time
+import uuid
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+_current_span = contextvars.ContextVar("current_span", default=None)
+_profile_ids = itertools.count(1)
+
+
+class Span:
+    """One timed operation inside a trace; attributes can be added while it is open."""
+
+    def __init__(self, name, span_id, parent_id, start, attributes):
+        self.name = name
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.start = start
+        self.duration = None
+        self.attributes = attributes
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_dict(self, trace_start):
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start - trace_start,
+            "duration": self.duration,
+            "attributes": self.attributes,
+        }
+
+
+class Trace:
+    """
+    Structured record of one plan request: nested timing spans plus token and cache totals.
+
+    The active trace lives in a context variable, so spans opened in asyncio
+    tasks and asyncio.to_thread workers started from the request are recorded
+    in it too.
+    """
+
+    def __init__(self, name, **attributes):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.attributes = attributes
+        self.start = time.perf_counter()
+        self.duration = None
+        self.spans = []
+        self.totals = {"llm_calls": 0, "cache_hits": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        self._lock = threading.Lock()
+        self._next_span_id = 0
+
+    def _new_span(self, name, attributes):
+        with self._lock:
+            self._next_span_id += 1
+            parent = _current_span.get()
+            span = Span(name, self._next_span_id, parent.span_id if parent else None, time.perf_counter(), attributes)
+            self.spans.append(span)
+        return span
+
+    def add(self, **totals):
+        with self._lock:
+            for name, value in totals.items():
+                self.totals[name] = self.totals.get(name, 0) + value
+
+    def to_dict(self):
+        with self._lock:
+            spans = [span.to_dict(self.start) for span in self.spans]
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "attributes": self.attributes,
+            "duration": self.duration,
+            "totals": dict(self.totals),
+            "spans": spans,
+        }
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2)
+
+
+def current_trace():
+    """Return the trace of the request being handled, or None outside a request."""
+    return _current_trace.get()
+
+
+@contextlib.contextmanager
+def tracing(name, **attributes):
+    """
+    Start a trace for one request, or join the caller's trace if one is already active.
+
+    Yields:
+        Trace: The active trace
+    """
+    trace = _current_trace.get()
+    if trace is not None:
+        with span(name, **attributes):
+            yield trace
+        return
+
+    trace = Trace(name, **attributes)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        trace.duration = time.perf_counter() - trace.start
+        _current_trace.reset(token)
+        METRICS.observe(f"{name}_duration_seconds", trace.duration)
+
+
+class _NoopSpan:
+    def set(self, **attributes):
+        pass
+
+
+@contextlib.contextmanager
+def span(name, metric=None, activate=True, **attributes):
+    """
+    Time a block as a span of the current trace.
+
+    Outside a trace the block still runs (and still feeds the metric), it is
+    just not recorded as a span.
+
+    Args:
+        name: Span name, e.g. "stage:gap_analysis" or "llm_call"
+        metric: Optional histogram name the duration is also observed into
+        activate: Make this the parent of spans opened inside the block. Pass False
+            for spans held open across generator yields, where the consumer's code
+            would otherwise be attributed to this span
+        attributes: Initial span attributes
+
+    Yields:
+        Span: Call .set(...) on it to attach results such as token counts
+    """
+    trace = _current_trace.get()
+    started = time.perf_counter()
+    if trace is None:
+        try:
+            yield _NoopSpan()
+        finally:
+            if metric:
+                METRICS.observe(metric, time.perf_counter() - started, **_labels(attributes))
+        return
+
+    current = trace._new_span(name, attributes)
+    token = _current_span.set(current) if activate else None
+    try:
+        yield current
+    except BaseException as e:
+        current.set(error=type(e).__name__)
+        raise
+    finally:
+        current.duration = time.perf_counter() - current.start
+        if token is not None:
+            _current_span.reset(token)
+        if metric:
+            METRICS.observe(metric, current.duration, **_labels(attributes))
+
+
+def _labels(attributes):
+    """Only short string attributes become metric labels, to keep label cardinality low."""
+    return {key: value for key, value in attributes.items() if isinstance(value, str) and len(value) <= 64}
+
+
+def record_llm_usage(usage=None, cached=False, prompt_tokens=None, completion_tokens=None, target_span=None):
+    """
+    Count one LLM call's tokens in the current trace and the metrics registry.
+
+    Args:
+        usage: The response's usage object (prompt_tokens/completion_tokens), if the server sent one
+        cached: Whether the response came from the response cache
+        prompt_tokens: Fallback prompt token count when usage is missing
+        completion_tokens: Fallback completion token count when usage is missing
+        target_span: Span to annotate (defaults to the innermost active span)
+    """
+    if usage is not None:
+        prompt_tokens = getattr(usage, "prompt_tokens", None) or prompt_tokens
+        completion_tokens = getattr(usage, "completion_tokens", None) or completion_tokens
+    prompt_tokens = prompt_tokens or 0
+    completion_tokens = completion_tokens or 0
+
+    METRICS.inc("llm_requests_total", cached="true" if cached else "false")
+    if not cached:
+        METRICS.inc("llm_prompt_tokens_total", prompt_tokens)
+        METRICS.inc("llm_completion_tokens_total", completion_tokens)
+
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(llm_calls=1, cache_hits=int(cached),
+                  prompt_tokens=0 if cached else prompt_tokens,
+                  completion_tokens=0 if cached else completion_tokens)
+    current = target_span or _current_span.get()
+    if current is not None:
+        current.set(cached=cached, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                    usage_source="server" if usage is not None else "estimated")
+
+
+def _escape_label(value):
+    """Escape a Prometheus label value (backslash, double quote and newline)."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsRegistry:
+    """
+    Process-wide counters and histograms with Prometheus text and JSON export.
+
+    Gauge collectors (callables returning {name: value}) are polled at export
+    time, e.g. to publish response cache hit rates.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counters = {}  # (name, labels) -> value
+        self._histograms = {}  # (name, labels) -> [bucket counts..., count, sum]
+        self._collectors = {}
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram[i] += 1
+            histogram[-2] += 1
+            histogram[-1] += value
+
+    def register_collector(self, name, collector):
+        """Register (or replace) a callable returning {gauge_name: value} polled at export time."""
+        with self._lock:
+            self._collectors[name] = collector
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def _gauges(self):
+        with self._lock:
+            collectors = list(self._collectors.values())
+        gauges = {}
+        for collector in collectors:
+            try:
+                gauges.update(collector())
+            except Exception as e:
+                print(f"Warning: Metrics collector failed: {e}")
+        return gauges
+
+    def to_dict(self):
+        """JSON-serialisable snapshot of every metric."""
+        with self._lock:
+            counters = [{"name": n, "labels": dict(l), "value": v} for (n, l), v in sorted(self._counters.items())]
+            histograms = [
+                {"name": n, "labels": dict(l), "count": h[-2], "sum": h[-1],
+                 "buckets": dict(zip([str(b) for b in self.buckets], h[:-2]))}
+                for (n, l), h in sorted(self._histograms.items())
+            ]
+        return {"counters": counters, "histograms": histograms, "gauges": self._gauges()}
+
+    def render_prometheus(self):
+        """Render every metric in the Prometheus text exposition format."""
+        def fmt(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in pairs) + "}"
+
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items())
+        typed = set()
+        for (name, labels), value in counters:
+            if name not in typed:
+                lines.append(f"# TYPE {name} counter")
+                typed.add(name)
+            lines.append(f"{name}{fmt(labels)} {value}")
+        for (name, labels), histogram in histograms:
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            for bound, count in zip(self.buckets, histogram[:-2]):
+                lines.append(f"{name}_bucket{fmt(labels, [('le', bound)])} {count}")
+            lines.append(f"{name}_bucket{fmt(labels, [('le', '+Inf')])} {histogram[-2]}")
+            lines.append(f"{name}_count{fmt(labels)} {histogram[-2]}")
+            lines.append(f"{name}_sum{fmt(labels)} {histogram[-1]}")
+        for name, value in sorted(self._gauges().items()):
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        """Write the JSON snapshot to a file."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+METRICS = MetricsRegistry()
+
+
+def serve_metrics(port, host="127.0.0.1"):
+    """
+    Serve /metrics (Prometheus text) and /metrics.json from a daemon thread.
+
+    Returns:
+        ThreadingHTTPServer: The running server (call shutdown() to stop it)
+    """
+    # Imported here: http.server is slow to import and most runs never serve metrics
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.rstrip("/")
+            if path == "/metrics":
+                body, content_type = METRICS.render_prometheus(), "text/plain; version=0.0.4"
+            elif path == "/metrics.json":
+                body, content_type = json.dumps(METRICS.to_dict()), "application/json"
+            else:
+                self.send_error(404)
+                return
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
+def profile_label(prefix):
+    """Unique maybe_profile label: prefix, wall-clock time, pid and a per-process sequence number."""
+    return f"{prefix}_{time.strftime('%Y%m%d-%H%M%S')}_{os.getpid()}_{next(_profile_ids)}"
+
+
+@contextlib.contextmanager
+def maybe_profile(sample_rate, output_dir, label):
+    """
+    Capture a cProfile of the block for a sampled fraction of requests.
+
+    Profiles are written to <output_dir>/<label>.prof (open with pstats or snakeviz).
+
+    Yields:
+        str or None: Path the profile will be written to, or None if this request is not sampled
+    """
+    if sample_rate <= 0 or random.random() >= sample_rate:
+        yield None
+        return
+
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f"{label}.prof")
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as e:  # another profiler is already active in this thread
+        print(f"Warning: Could not start profiler: {e}")
+        yield None
+        return
+    try:
+        yield path
+    finally:
+        profiler.disable()
+        try:
+            profiler.dump_stats(path)
+        except OSError as e:
+            print(f"Warning: Could not write profile: {e}")
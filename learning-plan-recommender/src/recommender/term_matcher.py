@@ -0,0 +1,135 @@
+from collections import deque
+
+from src.recommender.course_extractor import COURSE_CODE_PATTERN, normalize_course_code
+
+# Topics worth a catalog lookup whenever they come up in a gap analysis
+EDUCATIONAL_TOPICS = (
+    "calculus", "programming", "statistics", "algorithm",
+    "linear algebra", "probability", "machine learning", "data science",
+    "neural networks", "deep learning", "computer vision", "nlp",
+    "databases", "operating systems", "networks", "security",
+)
+
+
+class TermMatcher:
+    """
+    Aho-Corasick automaton matching many terms in one pass over a text.
+
+    Matching is case-insensitive, treats any whitespace character as a space,
+    and only reports whole-word occurrences. Each pattern maps to a term label,
+    so spelling variants ("csci632", "CSCI-632") can report one canonical term.
+    """
+
+    def __init__(self, patterns):
+        """
+        Args:
+            patterns: Dict of pattern -> term label, or an iterable of terms (each its own label)
+        """
+        if not isinstance(patterns, dict):
+            patterns = {term: term for term in patterns}
+
+        self.labels = []
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]  # state -> (term id, pattern length) pairs ending here
+
+        label_ids = {}
+        for pattern, label in patterns.items():
+            pattern = " ".join(pattern.lower().split())
+            if not pattern:
+                continue
+            if label not in label_ids:
+                label_ids[label] = len(self.labels)
+                self.labels.append(label)
+            self._add(pattern, label_ids[label])
+        self._build_failure_links()
+
+    def _add(self, pattern, term_id):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        if (term_id, len(pattern)) not in self._output[state]:
+            self._output[state].append((term_id, len(pattern)))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find_all(self, text):
+        """
+        Find every whole-word occurrence of every term.
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            list: (start, end, term label) tuples in order of their end position
+        """
+        lowered = text.lower()
+        if len(lowered) != len(text):  # a few Unicode characters change length when lowercased
+            lowered = "".join(char.lower()[:1] for char in text)
+
+        goto, fail, output = self._goto, self._fail, self._output
+        matches = []
+        state = 0
+        for end, char in enumerate(lowered, start=1):
+            if char.isspace():
+                char = " "
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for term_id, length in output[state]:
+                start = end - length
+                if (start == 0 or not lowered[start - 1].isalnum()) and (end == len(lowered) or not lowered[end].isalnum()):
+                    matches.append((start, end, self.labels[term_id]))
+        return matches
+
+    def terms_in(self, text):
+        """Return the distinct term labels found in text, in order of first occurrence."""
+        return list(dict.fromkeys(label for _, _, label in self.find_all(text)))
+
+
+def course_code_patterns(codes):
+    """Spelling variants of course codes ("CSCI 632", "CSCI632", "CSCI-632") mapped to the normalized code."""
+    patterns = {}
+    for code in codes:
+        code_key = normalize_course_code(code)
+        subject, _, number = code_key.partition(" ")
+        if not number:
+            continue
+        for variant in (f"{subject} {number}", f"{subject}{number}", f"{subject}-{number}"):
+            patterns[variant] = code_key
+    return patterns
+
+
+def extract_key_terms(text, matcher):
+    """
+    Pull catalog search terms out of free text (e.g. a gap analysis) in one pass.
+
+    Known topics, course titles and course codes are found by the matcher;
+    codes the matcher does not know are picked up by one scan with the
+    precompiled course-code pattern.
+
+    Returns:
+        list: Distinct terms in order of first occurrence
+    """
+    terms = dict.fromkeys(matcher.terms_in(text))
+    for match in COURSE_CODE_PATTERN.finditer(text):
+        if match.group(1).isupper():  # all-caps subjects like "CSCI 632", not "Room 101"
+            terms.setdefault(normalize_course_code(match.group(0)))
+    return list(terms)
@@ -0,0 +1,327 @@
+"""
+Long-lived worker serving LLM queries and learning plans as newline-delimited JSON.
+
+Replaces spawning a fresh interpreter per request: clients, the response cache,
+the catalog index and the plan generators stay warm between requests. Run from
+the learning-plan-recommender directory:
+
+    python -m src.recommender.worker --preload rag
+
+Every request is one JSON object per line on stdin:
+
+    {"id": 1, "method": "query_llm", "params": {"message": "Hi", "history": []}}
+    {"id": 2, "method": "generate_plan", "params": {"student": {...}, "target_course": "Deep Learning", "stream": true}}
+
+Every response is one line on stdout carrying the request id. Requests run
+concurrently, so responses can arrive out of order:
+
+    {"id": 2, "chunk": "..."}                       (streamed plans, before the result)
+    {"id": 1, "result": {"content": "...", "role": "assistant"}}
+    {"id": 3, "error": {"type": "ValueError", "message": "..."}}
+
+{"id": 4, "method": "cancel", "params": {"id": 2}} stops request 2, which then
+answers with a "Cancelled" error. Clients that give up on a request (e.g. after a
+timeout) should send it, or the worker keeps generating the abandoned plan.
+
+Other methods: "ping", "stats" and "shutdown". A {"event": "ready"} line is
+written once the worker accepts requests. It exits once stdin is closed (or
+after "shutdown") and the requests in flight have finished.
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import sys
+import threading
+import time
+
+from config.config import Config
+from src.models.course_database import CourseDatabase
+from src.models.course_name_index import CourseNameIndex
+from src.models.student import Student
+from src.recommender.llm_client import default_response_cache
+from src.recommender.llm_router import AsyncLLMRouter, configured_endpoints
+from src.recommender.telemetry import METRICS
+
+GENERATOR_KINDS = ("rag", "basic", "fast")
+
+
+class PlanWorker:
+    """
+    Serve query_llm and generate_plan requests on one event loop.
+
+    One AsyncLLMRouter is kept per LLM endpoint and one generator per (kind,
+    endpoint), so connection pools, the response cache and the catalog index are
+    reused by every request. Requests that name no endpoint are routed over all
+    of Config.LLM_ENDPOINTS.
+
+    Args:
+        write_line: Callable that writes one protocol line (without the newline)
+        host, port, api_key: Default LLM endpoint for requests that do not name one
+        catalog_path: Catalog PDF for the RAG generator (defaults to the generator's own)
+        cache_dir: Directory for the generators' catalog caches (defaults to Config.CACHE_DIR)
+        response_cache: ResponseCache shared by the clients and generators (defaults to
+            the process-wide cache configured in Config)
+    """
+
+    def __init__(self, write_line, host=None, port=None, api_key=None, catalog_path=None, cache_dir=None, response_cache=None):
+        self.write_line = write_line
+        self.cache_dir = cache_dir
+        self.response_cache = response_cache if response_cache is not None else default_response_cache()
+        self.endpoint = (host or Config.LLM_HOST, str(port or Config.LLM_PORT), api_key or Config.LLM_API_KEY)
+        self.catalog_path = catalog_path
+        self.course_db = CourseDatabase()
+        self.started = time.time()
+        self.stats = {"requests": 0, "errors": 0, "in_flight": 0}
+        self._clients = {}  # endpoint -> AsyncLLMRouter
+        self._generators = {}  # (kind, endpoint) -> plan generator
+        self._name_indexes = {}  # (kind, endpoint) -> CourseNameIndex
+        self._tasks = set()
+        self._running = {}  # request id -> task handling it
+        self._queue = None
+        self._methods = {
+            "ping": self._ping,
+            "stats": self._stats,
+            "query_llm": self._query_llm,
+            "generate_plan": self._generate_plan,
+            "cancel": self._cancel,
+            "shutdown": self._shutdown,
+        }
+
+    async def serve(self, input_stream):
+        """
+        Handle request lines from input_stream until it is closed or a shutdown request arrives.
+
+        Lines are read on a helper thread so a blocking stdin does not stall the loop.
+        """
+        loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+
+        def read_lines():
+            try:
+                for line in input_stream:
+                    loop.call_soon_threadsafe(self._queue.put_nowait, line)
+            finally:
+                loop.call_soon_threadsafe(self._queue.put_nowait, None)
+
+        threading.Thread(target=read_lines, name="worker-stdin", daemon=True).start()
+        while True:
+            line = await self._queue.get()
+            if line is None:
+                break
+            if line.strip():
+                task = asyncio.ensure_future(self.handle_line(line))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.close()
+
+    async def handle_line(self, line):
+        """Run one request line and write its response line(s)."""
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("Request must be a JSON object")
+        except ValueError as e:
+            self._send({"id": None, "error": {"type": "InvalidRequest", "message": str(e)}})
+            return
+
+        request_id = request.get("id")
+        handler = self._methods.get(request.get("method"))
+        self.stats["requests"] += 1
+        if handler is None:
+            self.stats["errors"] += 1
+            self._send({"id": request_id, "error": {"type": "UnknownMethod", "message": f"Unknown method: {request.get('method')}"}})
+            return
+
+        self.stats["in_flight"] += 1
+        self._running[request_id] = asyncio.current_task()
+        try:
+            result = await handler(request_id, request.get("params") or {})
+        except asyncio.CancelledError:
+            self._send({"id": request_id, "error": {"type": "Cancelled", "message": "Request cancelled"}})
+        except Exception as e:
+            self.stats["errors"] += 1
+            METRICS.inc("worker_errors_total", method=request["method"])
+            self._send({"id": request_id, "error": {"type": type(e).__name__, "message": str(e)}})
+        else:
+            self._send({"id": request_id, "result": result})
+        finally:
+            self._running.pop(request_id, None)
+            self.stats["in_flight"] -= 1
+            METRICS.inc("worker_requests_total", method=request["method"])
+
+    def preload(self, kind):
+        """Create a generator for the default endpoint now, so its catalog starts loading before the first request."""
+        self._get_generator(kind, self.endpoint)
+
+    async def close(self):
+        for client in self._clients.values():
+            await client.close()
+        self._clients.clear()
+
+    def _send(self, message):
+        # ASCII-only JSON, so the channel works whatever encoding the other side assumes
+        self.write_line(json.dumps(message))
+
+    def _endpoint(self, params):
+        host, port, api_key = self.endpoint
+        return (params.get("host") or host, str(params.get("port") or port), params.get("api_key") or api_key)
+
+    def _servers(self, endpoint):
+        """The LLM servers behind an endpoint: every configured one for the default endpoint."""
+        return configured_endpoints(*endpoint) if endpoint == self.endpoint else [endpoint]
+
+    def _get_client(self, endpoint):
+        client = self._clients.get(endpoint)
+        if client is None:
+            client = AsyncLLMRouter(self._servers(endpoint), cache=self.response_cache)
+            self._clients[endpoint] = client
+        return client
+
+    def _get_generator(self, kind, endpoint):
+        if kind not in GENERATOR_KINDS:
+            raise ValueError(f"Unknown generator: {kind}")
+        generator = self._generators.get((kind, endpoint))
+        if generator is None:
+            # Imported on first use, like in app.py, so a worker that only proxies queries starts fast
+            if kind in ("rag", "fast"):
+                if kind == "fast":
+                    from src.recommender.plan_generator_fast import LearningPlanGenerator
+                else:
+                    from src.recommender.plan_generator_rag import LearningPlanGenerator
+                generator = LearningPlanGenerator(
+                    *endpoint, catalog_path=self.catalog_path, cache_dir=self.cache_dir, endpoints=self._servers(endpoint),
+                    response_cache=self.response_cache,
+                )
+            else:
+                from src.recommender.plan_generator import LearningPlanGenerator
+                generator = LearningPlanGenerator(*endpoint, endpoints=self._servers(endpoint), response_cache=self.response_cache)
+            self._generators[(kind, endpoint)] = generator
+        return generator
+
+    async def _get_name_index(self, kind, endpoint, generator):
+        name_index = self._name_indexes.get((kind, endpoint))
+        if name_index is None:
+            name_index = await asyncio.to_thread(
+                CourseNameIndex.from_course_dbs, self.course_db, getattr(generator, "course_store", None)
+            )
+            self._name_indexes[(kind, endpoint)] = name_index
+        return name_index
+
+    async def _ping(self, request_id, params):
+        return {"pong": True}
+
+    async def _stats(self, request_id, params):
+        return {
+            **self.stats,
+            "uptime_seconds": time.time() - self.started,
+            "clients": len(self._clients),
+            "llm_endpoints": [client.stats() for client in self._clients.values()],
+            "generators": [kind for kind, _ in self._generators],
+        }
+
+    async def _query_llm(self, request_id, params):
+        if "message" not in params:
+            raise ValueError("query_llm requires a message")
+        history = params.get("history") or []
+        history_json = history if isinstance(history, str) else json.dumps(history)
+        client = self._get_client(self._endpoint(params))
+        return await client.query_llm(params["message"], history_json, bypass_cache=bool(params.get("bypass_cache")))
+
+    async def _generate_plan(self, request_id, params):
+        kind = params.get("generator", "rag")
+        endpoint = self._endpoint(params)
+        generator = self._get_generator(kind, endpoint)
+        if hasattr(generator, "wait_for_catalog"):
+            await asyncio.to_thread(generator.wait_for_catalog)
+
+        student_data = params.get("student") or {}
+        student = Student(
+            prior_courses=list(student_data.get("prior_courses") or []),
+            department=student_data.get("department", ""),
+            degree_level=student_data.get("degree_level", ""),
+        )
+        if params.get("canonicalize", True):
+            name_index = await self._get_name_index(kind, endpoint, generator)
+            student.prior_courses = name_index.canonicalize(student.prior_courses)
+        target_course = params.get("target_course") or Config.DEFAULT_COURSE
+        bypass_cache = bool(params.get("bypass_cache"))
+
+        started = time.perf_counter()
+        if params.get("stream"):
+            pieces = []
+            async for chunk in generator.generate_plan_stream_async(student, target_course, self.course_db, bypass_cache=bypass_cache):
+                pieces.append(chunk)
+                self._send({"id": request_id, "chunk": chunk})
+            plan = "".join(pieces)
+        else:
+            plan = await generator.generate_plan_async(student, target_course, self.course_db, bypass_cache=bypass_cache)
+        return {"plan": plan, "prior_courses": student.prior_courses, "duration_seconds": time.perf_counter() - started}
+
+    async def _cancel(self, request_id, params):
+        task = self._running.get(params.get("id"))
+        if task is None:
+            return {"cancelled": False}
+        task.cancel()
+        return {"cancelled": True}
+
+    async def _shutdown(self, request_id, params):
+        # Stop reading new requests; the ones in flight still complete
+        self._queue.put_nowait(None)
+        return {"stopping": True}
+
+
+def read_fd_lines(fd):
+    """
+    Yield decoded lines read from a file descriptor with os.read.
+
+    Unlike iterating sys.stdin, a read blocked here holds no buffered-reader lock,
+    so the interpreter can exit while the reader thread is still waiting.
+    """
+    pending = b""
+    while True:
+        data = os.read(fd, 65536)
+        if not data:
+            break
+        pending += data
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8", errors="replace") + "\n"
+    if pending:
+        yield pending.decode("utf-8", errors="replace")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serve LLM queries and learning plans as NDJSON over stdin/stdout")
+    parser.add_argument("--host", help="Default LLM host (defaults to LLM_HOST)")
+    parser.add_argument("--port", help="Default LLM port (defaults to LLM_PORT)")
+    parser.add_argument("--api-key", help="Default LLM API key (defaults to LLM_API_KEY)")
+    parser.add_argument("--catalog", help="Catalog PDF for the RAG generator")
+    parser.add_argument("--preload", choices=GENERATOR_KINDS, action="append", default=[],
+                        help="Create this generator at startup so its catalog is loaded before the first request")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    protocol_out = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8", line_buffering=True)
+    # Library code reports problems with print(); keep that off the protocol channel
+    sys.stdout = sys.stderr
+
+    def write_line(line):
+        protocol_out.write(line + "\n")
+
+    worker = PlanWorker(write_line, args.host, args.port, args.api_key, catalog_path=args.catalog)
+    for kind in args.preload:
+        worker.preload(kind)
+    worker._send({"event": "ready"})
+    asyncio.run(worker.serve(read_fd_lines(sys.stdin.fileno())))
+
+
+if __name__ == "__main__":
+    main()
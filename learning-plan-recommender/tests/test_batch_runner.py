@@ -0,0 +1,90 @@
+"""Tests for the batch plan runner."""
+
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from src.models.course_database import CourseDatabase
+from src.recommender.batch_runner import BatchPlanRunner, percentile, read_batch_rows
+
+
+class TestBatchPlanRunner(unittest.TestCase):
+    """Test cases for batch generation with checkpoint and resume."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.input_path = os.path.join(self.tmp_dir.name, "students.csv")
+        self.output_path = os.path.join(self.tmp_dir.name, "plans.jsonl")
+        with open(self.input_path, "w", encoding="utf-8") as f:
+            f.write("id,prior_courses,department,degree_level,target_course\n")
+            f.write('s1,"Csci 256, Csci 343",Computer Science,graduate,Deep Learning\n')
+            f.write("s2,,Physics,undergraduate,Machine Learning\n")
+            f.write("s3,Csci 256,Mathematics,graduate,Data Mining\n")
+
+        self.plan_generator = MagicMock()
+        self.plan_generator.generate_plan.side_effect = lambda student, target, db: f"Plan for {target}"
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _read_output(self):
+        with open(self.output_path, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def test_read_batch_rows(self):
+        rows = list(read_batch_rows(self.input_path))
+
+        self.assertEqual(rows[0]["prior_courses"], ["Csci 256", "Csci 343"])
+        self.assertEqual(rows[0]["degree_level"], "Graduate")
+        self.assertEqual(rows[1]["prior_courses"], [])
+
+    def test_run_writes_results_and_summary(self):
+        summary = BatchPlanRunner(self.plan_generator, CourseDatabase(), workers=2).run(self.input_path, self.output_path)
+
+        results = {row["id"]: row for row in self._read_output()}
+        self.assertEqual(results["s2"]["plan"], "Plan for Machine Learning")
+        self.assertEqual(summary["ok"], 3)
+        self.assertGreaterEqual(summary["latency_p99"], summary["latency_p50"])
+
+    def test_resume_skips_completed_rows_and_retries_errors(self):
+        with open(self.output_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"id": "s1", "status": "ok", "plan": "done"}) + "\n")
+            f.write(json.dumps({"id": "s2", "status": "error", "error": "timeout"}) + "\n")
+            f.write('{"id": "s3", "status": "o')  # crashed mid-write
+
+        summary = BatchPlanRunner(self.plan_generator, CourseDatabase(), workers=2).run(self.input_path, self.output_path)
+
+        self.assertEqual(summary["skipped"], 1)
+        self.assertEqual(summary["ok"], 2)
+        generated = sorted(call[0][1] for call in self.plan_generator.generate_plan.call_args_list)
+        self.assertEqual(generated, ["Data Mining", "Machine Learning"])
+
+    def test_invalid_rows_fail_without_stopping_the_batch(self):
+        input_path = os.path.join(self.tmp_dir.name, "students.jsonl")
+        with open(input_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"id": "a", "prior_courses": ["Csci 256", 343], "target_course": "Deep Learning"}) + "\n")
+            f.write(json.dumps({"id": "b", "prior_courses": ["Csci 256"], "department": "Physics"}) + "\n")
+            f.write('{"id": "broken", "target_course": \n')
+            f.write(json.dumps({"id": "c", "prior_courses": ["Csci 256"], "target_course": "Data Mining"}) + "\n")
+
+        summary = BatchPlanRunner(self.plan_generator, CourseDatabase()).run(input_path, self.output_path)
+
+        results = {row["id"]: row for row in self._read_output()}
+        self.assertEqual((summary["ok"], summary["errors"]), (1, 3))
+        self.assertIn("line 3", results["3"]["error"])
+        self.assertIn("prior_courses", results["a"]["error"])
+        self.assertIn("target_course", results["b"]["error"])
+        self.assertEqual(results["c"]["status"], "ok")
+        self.assertEqual(self.plan_generator.generate_plan.call_count, 1)
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([], 95), 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+"""Tests for the benchmark helpers (not the benchmarks themselves)."""
+
+import unittest
+
+from benchmarks.run_benchmarks import compare_results, time_call
+from benchmarks.synthetic_catalog import catalog_entry, synthetic_courses
+from src.models.prerequisite_graph import PrerequisiteGraph
+from src.recommender.course_extractor import extract_course_records
+
+
+class TestBenchmarkHelpers(unittest.TestCase):
+    """Test cases for synthetic data and baseline comparison."""
+
+    def test_synthetic_courses_are_unique_and_acyclic(self):
+        courses = synthetic_courses(12000)
+
+        self.assertEqual(len({course["code"] for course in courses}), 12000)
+        self.assertEqual(PrerequisiteGraph(courses).cyclic, [])
+
+    def test_synthetic_entries_parse_like_the_catalog(self):
+        courses = synthetic_courses(30)
+        text = "".join(catalog_entry(course) for course in courses)
+
+        records = extract_course_records(text)
+
+        self.assertEqual(len(records), 30)
+        self.assertEqual(records[-1]["prerequisites"], [c.upper() for c in courses[-1]["prerequisites"]])
+
+    def test_compare_results_flags_regressions(self):
+        baseline = {"fast": {"median_us": 10.0}, "slow": {"median_us": 10.0}, "removed": {"median_us": 1.0}}
+        results = {"fast": {"median_us": 11.0}, "slow": {"median_us": 20.0}, "new": {"median_us": 5.0}}
+
+        rows = compare_results(results, baseline, tolerance=0.25)
+
+        self.assertEqual([(name, regressed) for name, _, _, _, regressed in rows], [("fast", False), ("slow", True)])
+
+    def test_time_call_reports_microseconds(self):
+        stats = time_call(lambda: sum(range(100)), repeat=3, min_seconds=0.001)
+
+        self.assertEqual(stats["samples"], 3)
+        self.assertGreater(stats["median_us"], 0)
+        self.assertLessEqual(stats["min_us"], stats["median_us"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+"""Tests for the extracted catalog text cache."""
+
+import os
+import tempfile
+import unittest
+
+from src.recommender.catalog_cache import CatalogTextCache
+
+
+class TestCatalogTextCache(unittest.TestCase):
+    """Test cases for caching extracted catalog text by PDF content hash."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.pdf_path = os.path.join(self.tmp_dir.name, "catalog.pdf")
+        with open(self.pdf_path, "wb") as f:
+            f.write(b"%PDF-1.4 first edition")
+        self.cache = CatalogTextCache(os.path.join(self.tmp_dir.name, "cache"))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_round_trip(self):
+        self.assertIsNone(self.cache.get(self.pdf_path))
+
+        self.cache.put(self.pdf_path, "page one\npage two\n", [0, 9])
+
+        self.assertEqual(self.cache.get(self.pdf_path), ("page one\npage two\n", [0, 9]))
+
+    def test_changed_pdf_misses(self):
+        self.cache.put(self.pdf_path, "old text", [0])
+
+        with open(self.pdf_path, "wb") as f:
+            f.write(b"%PDF-1.4 second edition, longer")
+
+        self.assertIsNone(self.cache.get(self.pdf_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+"""Tests for course record extraction and the SQLite course store."""
+
+import unittest
+
+from src.models.catalog_course_database import CatalogCourseDatabase, format_course_record
+from src.recommender.course_extractor import extract_course_records, normalize_course_code
+
+
+CATALOG_TEXT = (
+    "Computer Science Courses\n"
+    "CSCI 443. Advanced Data Science. (3 hrs.)\n"
+    "Advanced topics in data science. Prerequisite: CSCI 343 and Csci 356.\n"
+    "CSCI 632. Machine Learning. (3)\n"
+    "Algorithms that learn from data.\n"
+    "Prerequisite: CSCI 443 or\n"
+    "consent of instructor.\n"
+    "Engr 691. Deep Learning (1-3)\n"
+    "Advanced deep learning for graduates. Prerequisite: Csci 632.\n"
+)
+
+
+class TestCatalogCourseDatabase(unittest.TestCase):
+    """Test cases for extracting and querying structured course records."""
+
+    def setUp(self):
+        self.page_offsets = [0, CATALOG_TEXT.index("Engr 691")]
+        self.store = CatalogCourseDatabase.from_catalog(CATALOG_TEXT, self.page_offsets)
+
+    def test_normalize_course_code(self):
+        self.assertEqual(normalize_course_code("CSci-356"), "CSCI 356")
+        self.assertEqual(normalize_course_code("engr 691"), "ENGR 691")
+
+    def test_extract_course_records(self):
+        records = {record["code"]: record for record in extract_course_records(CATALOG_TEXT, self.page_offsets)}
+
+        self.assertEqual(sorted(records), ["CSCI 443", "CSCI 632", "Engr 691"])
+        self.assertEqual(records["CSCI 443"]["name"], "Advanced Data Science")
+        self.assertEqual(records["CSCI 443"]["credits"], "3")
+        self.assertEqual(records["CSCI 443"]["prerequisites"], ["CSCI 343", "CSCI 356"])
+        self.assertEqual(records["CSCI 632"]["prerequisites"], ["CSCI 443"])
+        self.assertEqual(records["Engr 691"]["credits"], "1-3")
+        self.assertEqual(records["Engr 691"]["page"], 1)
+
+    def test_lookup_is_case_insensitive(self):
+        course = self.store.get_course_by_code("csci 632")
+
+        self.assertEqual(course["name"], "Machine Learning")
+        self.assertEqual(course["prerequisites"], ["CSCI 443"])
+        self.assertIsNone(self.store.get_course_by_code("Csci 999"))
+
+    def test_prerequisite_queries(self):
+        self.assertEqual(self.store.get_prerequisites("Engr 691"), ["CSCI 632"])
+        self.assertEqual(self.store.get_courses_requiring("CSCI 632"), ["ENGR 691"])
+
+    def test_course_database_compatible_text(self):
+        self.assertIn("CSCI 632: Machine Learning", self.store.get_courses_as_text())
+        self.assertEqual(len(self.store.get_all_courses()), 3)
+
+    def test_format_course_record(self):
+        line = format_course_record(self.store.get_course_by_code("ENGR 691"))
+        self.assertTrue(line.startswith("Engr 691 | Deep Learning | 1-3 cr | Prereqs: CSCI 632 | p.2"))
+
+
+if __name__ == '__main__':
+    unittest.main()
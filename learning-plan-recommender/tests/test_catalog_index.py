@@ -0,0 +1,68 @@
+"""Tests for the catalog inverted index."""
+
+import os
+import tempfile
+import unittest
+
+from src.recommender.catalog_index import CatalogIndex, chunk_catalog, tokenize
+
+
+CATALOG_PAGES = [
+    "School of Engineering\nCourse Descriptions\n",
+    "Csci 443. Advanced Data Science. Advanced topics in data science.\n"
+    "Csci 632. Machine Learning. Algorithms that learn from data. Machine learning models.\n",
+    "Engr 691. Deep Learning. Neural networks and deep learning for graduates.\n"
+    "Prerequisite: Csci 632.\n",
+]
+
+
+class TestCatalogIndex(unittest.TestCase):
+    """Test cases for building, querying and persisting the catalog index."""
+
+    def setUp(self):
+        self.page_offsets = []
+        self.text = ""
+        for page in CATALOG_PAGES:
+            self.page_offsets.append(len(self.text))
+            self.text += page
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("Csci-632: Machine Learning"), ["csci", "632", "machine", "learning"])
+
+    def test_chunks_follow_pages_and_sections(self):
+        chunks = chunk_catalog(self.text, self.page_offsets, max_chunk_chars=80)
+        pages = [page for _, _, page in chunks]
+
+        self.assertEqual(sorted(set(pages)), [0, 1, 2])
+        # The second page holds two course entries and is split between them
+        second_page = [self.text[start:end] for start, end, page in chunks if page == 1]
+        self.assertTrue(second_page[0].startswith("Csci 443"))
+        self.assertTrue(second_page[1].startswith("Csci 632"))
+
+    def test_search_ranks_by_relevance(self):
+        index = CatalogIndex.build(self.text, self.page_offsets)
+
+        results = index.search("machine learning", top_k=2)
+
+        self.assertTrue(results)
+        best_start, best_end, _ = index.chunks[results[0][0]]
+        self.assertIn("Machine Learning", self.text[best_start:best_end])
+        self.assertEqual(index.search("quantum chemistry"), [])
+
+    def test_save_and_load(self):
+        index = CatalogIndex.build(self.text, self.page_offsets)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "index.json")
+            index.save(path)
+
+            loaded = CatalogIndex.load(path, index.fingerprint)
+            self.assertEqual(loaded.chunks, index.chunks)
+            self.assertEqual(loaded.search("deep learning"), index.search("deep learning"))
+
+            # A different catalog must not reuse a stale index
+            self.assertIsNone(CatalogIndex.load(path, "other-fingerprint"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+"""Tests for the incremental multi-catalog registry."""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+import fitz
+
+from src.recommender import catalog_registry
+from src.recommender.catalog_registry import CatalogRegistry, catalog_name_and_year
+from src.recommender.plan_generator_rag import LearningPlanGenerator
+
+
+def write_pdf(path, page_texts):
+    """Write a PDF with one page per text."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    document = fitz.open()
+    for text in page_texts:
+        document.new_page().insert_textbox(fitz.Rect(36, 36, 576, 756), text, fontsize=9)
+    document.save(path)
+    document.close()
+
+
+def course_pages(subject, topics):
+    return [f"{subject} {100 + i}. {topic}. (3 hrs.)\nStudents study {topic.lower()} in depth.\n" for i, topic in enumerate(topics)]
+
+
+class TestCatalogRegistry(unittest.TestCase):
+    """Test cases for indexing, filtering and incremental refreshes."""
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.work_dir)
+        self.catalog_dir = os.path.join(self.work_dir, "catalogs")
+        self.cache_dir = os.path.join(self.work_dir, "cache")
+        self.engineering_topics = ["Machine Learning", "Thermodynamics", "Circuit Analysis"]
+        write_pdf(os.path.join(self.catalog_dir, "engineering", "2024-2025.pdf"), course_pages("ENGR", self.engineering_topics))
+        write_pdf(os.path.join(self.catalog_dir, "engineering", "2025-2026.pdf"), course_pages("ENGR", ["Deep Learning"]))
+        write_pdf(os.path.join(self.catalog_dir, "business_2025.pdf"), course_pages("BUS", ["Marketing", "Accounting"]))
+
+    def registry(self, **options):
+        return CatalogRegistry(self.catalog_dir, self.cache_dir, processes=1, **options)
+
+    def test_catalog_name_and_year(self):
+        self.assertEqual(catalog_name_and_year("engineering/2024-2025"), ("engineering", 2024))
+        self.assertEqual(catalog_name_and_year("business_2025"), ("business", 2025))
+        self.assertEqual(catalog_name_and_year("graduate"), ("graduate", None))
+
+    def test_search_filters_by_catalog_and_year(self):
+        registry = self.registry()
+        summary = registry.refresh()
+
+        self.assertEqual(len(summary["added"]), 3)
+        self.assertEqual(summary["pages_extracted"], 6)
+        self.assertEqual(
+            [(catalog["id"], catalog["name"], catalog["year"]) for catalog in registry.catalogs()],
+            [("business_2025", "business", 2025), ("engineering/2024-2025", "engineering", 2024),
+             ("engineering/2025-2026", "engineering", 2025)],
+        )
+        self.assertEqual(registry.search("learning")[0]["name"], "engineering")
+        self.assertEqual({hit["catalog"] for hit in registry.search("learning", years=2025)}, {"engineering/2025-2026"})
+        self.assertEqual(registry.search("learning", catalogs="business"), [])
+        self.assertEqual(len(registry.search("students", catalogs=["business", "engineering/2024-2025"])), 5)
+
+    def test_refresh_reindexes_only_changed_pages(self):
+        registry = self.registry()
+        registry.refresh()
+        self.assertEqual(registry.refresh()["unchanged"], 3)
+
+        topics = self.engineering_topics[:2] + ["Robotics"]
+        write_pdf(os.path.join(self.catalog_dir, "engineering", "2024-2025.pdf"), course_pages("ENGR", topics))
+        os.remove(os.path.join(self.catalog_dir, "business_2025.pdf"))
+        summary = registry.refresh()
+
+        self.assertEqual((summary["updated"], summary["removed"]), (["engineering/2024-2025"], ["business_2025"]))
+        self.assertEqual((summary["pages_extracted"], summary["pages_indexed"]), (3, 1))
+        self.assertEqual(registry.search("robotics")[0]["page"], 2)
+        self.assertEqual(registry.search("circuit"), [])
+        self.assertEqual(registry.search("marketing"), [])
+
+        # A restart loads the persisted pages instead of extracting them again
+        restarted = self.registry()
+        self.assertEqual(restarted.refresh()["pages_extracted"], 0)
+        self.assertEqual(restarted.search("robotics")[0]["catalog"], "engineering/2024-2025")
+
+    def test_touched_files_are_hashed_once(self):
+        registry = self.registry()
+        registry.refresh()
+        path = os.path.join(self.catalog_dir, "engineering", "2025-2026.pdf")
+        os.utime(path, ns=(time.time_ns(), time.time_ns() + 10**9))
+
+        with patch.object(catalog_registry, "file_content_hash", wraps=catalog_registry.file_content_hash) as content_hash:
+            self.assertEqual(registry.refresh()["unchanged"], 3)
+            self.assertEqual(self.registry().refresh()["unchanged"], 3)
+        self.assertEqual(content_hash.call_count, 1)
+
+    def test_extraction_runs_unlocked_and_failures_stay_per_catalog(self):
+        registry = self.registry()
+        extract = catalog_registry._extract_page_range
+        searches = []
+
+        def extract_page_range(path, first, last):
+            # Searches are not blocked while PDFs are extracted
+            self.assertFalse(registry._lock.locked())
+            searches.append(registry.search("learning"))
+            if "business" in path:
+                raise RuntimeError("damaged page")
+            return extract(path, first, last)
+
+        with patch.object(catalog_registry, "_extract_page_range", extract_page_range):
+            summary = registry.refresh()
+
+        self.assertEqual(len(searches), 3)
+        self.assertEqual(len(summary["added"]), 3)
+        pages = {catalog["id"]: catalog["pages"] for catalog in registry.catalogs()}
+        self.assertEqual(pages, {"business_2025": 0, "engineering/2024-2025": 3, "engineering/2025-2026": 1})
+        self.assertEqual(registry.search("learning")[0]["name"], "engineering")
+
+        # The failed catalog is not cached as empty; the next refresh extracts it again
+        summary = registry.refresh()
+        self.assertEqual((summary["updated"], summary["pages_extracted"]), (["business_2025"], 2))
+        self.assertEqual(registry.search("marketing")[0]["catalog"], "business_2025")
+
+    def test_parallel_extraction_matches_serial(self):
+        serial = self.registry()
+        serial.refresh()
+        parallel = CatalogRegistry(self.catalog_dir, os.path.join(self.work_dir, "parallel"), processes=2, pages_per_task=1)
+        parallel.refresh()
+
+        self.assertEqual(parallel.view().text, serial.view().text)
+        self.assertEqual(parallel.view().search("thermodynamics"), serial.view().search("thermodynamics"))
+
+    def test_generator_uses_selected_catalogs(self):
+        generator = LearningPlanGenerator(
+            "localhost", "5000", "test_api_key", catalog_path=self.catalog_dir, cache_dir=self.cache_dir,
+            catalog_load="eager", catalogs=["engineering"], years=[2024],
+        )
+        self.addCleanup(lambda: generator.course_store.close())
+
+        self.assertIn("Thermodynamics", generator.search_catalog("thermodynamics")[0])
+        self.assertEqual(generator.search_catalog("deep"), [])
+        self.assertIsNotNone(generator.course_store.get_course_by_code("ENGR 101"))
+
+        write_pdf(os.path.join(self.catalog_dir, "engineering", "2024-2025.pdf"), course_pages("ENGR", ["Robotics"]))
+        previous_store = generator.course_store
+        with patch.object(generator.catalog_registry, "refresh", wraps=generator.catalog_registry.refresh) as refresh:
+            summary = generator.refresh_catalog()
+
+        self.assertEqual(refresh.call_count, 1)
+        self.assertEqual(summary["updated"], ["engineering/2024-2025"])
+        with self.assertRaises(sqlite3.ProgrammingError):
+            previous_store.get_course_by_code("ENGR 101")
+        self.assertIn("Robotics", generator.search_catalog("robotics")[0])
+        self.assertEqual(generator.search_catalog("thermodynamics"), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+"""Tests for merging and selecting catalog snippets into the RAG context."""
+
+import unittest
+
+from src.recommender.context_assembler import (
+    SNIPPET_SEPARATOR, assemble_context, merge_intervals, select_passages
+)
+from src.recommender.prompt_budget import count_tokens
+
+
+CATALOG_TEXT = (
+    "CSCI 632. Machine Learning. Algorithms that learn from data, supervised and unsupervised models. "
+    "Prerequisite: CSCI 443. "
+    "ENGR 691. Deep Learning. Neural networks, convolutional and recurrent architectures for graduates. "
+    "Prerequisite: CSCI 632. "
+    "MATH 240. Linear Algebra. Vector spaces, matrices, eigenvalues and least squares. "
+)
+
+
+class TestContextAssembler(unittest.TestCase):
+    """Test cases for interval merging, de-duplication and MMR selection."""
+
+    def test_merge_overlapping_windows(self):
+        passages = merge_intervals([
+            (0, 50, 1.0, "machine learning"),
+            (30, 80, 0.5, "CSCI 632"),
+            (30, 80, 0.9, "machine learning"),
+            (120, 160, 1.0, "deep learning"),
+        ])
+
+        self.assertEqual([(p["start"], p["end"]) for p in passages], [(0, 80), (120, 160)])
+        self.assertEqual(passages[0]["term_scores"], {"machine learning": 1.0, "CSCI 632": 0.5})
+
+    def test_merge_clips_instead_of_growing_past_limit(self):
+        passages = merge_intervals([(0, 100, 1.0, "a"), (50, 180, 1.0, "b"), (60, 90, 1.0, "c")], max_passage_chars=120)
+
+        self.assertEqual([(p["start"], p["end"]) for p in passages], [(0, 100), (100, 180)])
+        self.assertIn("c", passages[0]["term_scores"])
+
+    def test_duplicate_passages_are_dropped(self):
+        text = "Machine learning basics. " * 4 + "|" + "Machine learning basics. " * 4 + "|Linear algebra review."
+        first_end = text.index("|")
+        second_start = first_end + 1
+        passages = [
+            {"start": 0, "end": first_end, "term_scores": {"ml": 1.0}},
+            {"start": second_start, "end": text.index("|", second_start), "term_scores": {"ml": 0.9}},
+            {"start": text.rindex("|") + 1, "end": len(text), "term_scores": {"algebra": 0.2}},
+        ]
+
+        selected = select_passages(passages, text, max_tokens=500)
+
+        self.assertEqual(len(selected), 2)
+        self.assertEqual(selected[1], "Linear algebra review.")
+
+    def test_selection_fits_budget(self):
+        windows = [(0, 118, 1.0, "ml"), (121, 228, 0.8, "dl"), (232, len(CATALOG_TEXT), 0.3, "algebra")]
+
+        for budget in (20, 45, 80, 500):
+            context = assemble_context(windows, CATALOG_TEXT, budget)
+            self.assertLessEqual(count_tokens(context), budget)
+        self.assertEqual(assemble_context(windows, CATALOG_TEXT, 500).count(SNIPPET_SEPARATOR), 2)
+        self.assertTrue(assemble_context(windows, CATALOG_TEXT, 45).startswith("CSCI 632"))
+
+
+if __name__ == '__main__':
+    unittest.main()
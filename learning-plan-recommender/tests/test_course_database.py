@@ -0,0 +1,86 @@
+"""Tests for the compact course and student models and the indexed course database."""
+
+import pickle
+import unittest
+
+from benchmarks.synthetic_catalog import synthetic_courses
+from src.models.course import Course
+from src.models.course_database import CourseDatabase
+from src.models.student import Student
+
+
+class TestCourseDatabase(unittest.TestCase):
+    """Test cases for code, department and level indexes and memoized text."""
+
+    def setUp(self):
+        self.course_db = CourseDatabase()
+
+    def test_lookup_by_any_spelling(self):
+        self.assertEqual(self.course_db.get_course_by_code("CSCI 632").name, "Machine Learning")
+        self.assertEqual(self.course_db.get_course_by_code("csci-632")["code"], "Csci 632")
+        self.assertIsNone(self.course_db.get_course_by_code("Csci 999"))
+
+    def test_department_and_level_indexes(self):
+        self.assertEqual(len(self.course_db.get_courses_by_department("engr")), 1)
+        self.assertEqual(
+            [course.code for course in self.course_db.find_courses("CSCI", 400)],
+            ["CSci 433", "Csci 443", "Csci 475", "CSci 444", "CSci 492"],
+        )
+        self.assertEqual(self.course_db.get_courses_by_level(5), self.course_db.get_courses_by_level(543))
+
+    def test_text_is_memoized_until_courses_change(self):
+        text = self.course_db.get_courses_as_text()
+        graph = self.course_db.get_prerequisite_graph()
+        self.assertIs(self.course_db.get_courses_as_text(), text)
+
+        self.course_db.add_courses([{"code": "CSCI 700", "name": "Thesis", "prerequisites": ["Csci 632"]}])
+
+        self.assertIn("CSCI 700: Thesis", self.course_db.get_courses_as_text())
+        self.assertIsNot(self.course_db.get_prerequisite_graph(), graph)
+        self.assertEqual(len(self.course_db.get_courses_by_level(700)), 1)
+        self.assertTrue(self.course_db.remove_course("csci 700"))
+        self.assertEqual(self.course_db.get_courses_as_text(), text)
+        self.assertEqual(self.course_db.get_courses_by_level(700), [])
+
+    def test_replacing_a_course_keeps_its_position(self):
+        self.course_db.add_courses([{"code": "CSCI 256", "name": "Python Programming", "prerequisites": []}])
+
+        self.assertEqual(len(self.course_db.get_all_courses()), 14)
+        self.assertEqual(self.course_db.get_all_courses()[0].name, "Python Programming")
+        self.assertEqual(self.course_db.get_course_by_code("Csci 256").code, "CSCI 256")
+
+    def test_large_catalog_matches_dicts(self):
+        courses = synthetic_courses(3000, seed=2)
+        course_db = CourseDatabase(courses)
+
+        self.assertEqual([course.to_dict() for course in course_db.get_all_courses()],
+                         [{**course, "credits": "", "page": None} for course in courses])
+        self.assertEqual(course_db.get_courses_as_text().count("\n"), 2999)
+
+
+class TestModels(unittest.TestCase):
+    """Test cases for the slotted Course and Student models."""
+
+    def test_course_is_compact_and_read_only_mapping(self):
+        course = Course("Machine Learning", "Algorithms", ["Csci 443"], code="Csci 632")
+
+        self.assertFalse(hasattr(course, "__dict__"))
+        self.assertEqual((course.key, course.department, course.level), ("CSCI 632", "CSCI", 600))
+        self.assertEqual(course.get("credits"), "")
+        self.assertIsNone(course.get("missing"))
+        with self.assertRaises(TypeError):
+            course["name"] = "Changed"
+        self.assertEqual(course.get_course_info()["prerequisites"], ["Csci 443"])
+
+    def test_student_values_are_interned(self):
+        first = Student(["".join(["Csci ", "256"])], "".join(["Computer ", "Science"]), "Graduate")
+        second = Student(["Csci 256"], "Computer Science", "Graduate")
+
+        self.assertIs(first.department, second.department)
+        self.assertIs(first.prior_courses[0], second.prior_courses[0])
+        self.assertFalse(hasattr(first, "__dict__"))
+        self.assertEqual(pickle.loads(pickle.dumps(first)).to_dict(), first.to_dict())
+
+
+if __name__ == '__main__':
+    unittest.main()
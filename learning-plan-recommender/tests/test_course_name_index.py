@@ -0,0 +1,88 @@
+"""Tests for the course-name canonicalization index."""
+
+import random
+import unittest
+
+from src.models.course_database import CourseDatabase
+from src.models.course_name_index import CourseNameIndex, levenshtein
+
+
+def reference_levenshtein(a, b):
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+class TestCourseNameIndex(unittest.TestCase):
+    """Test cases for resolving free-text course names to catalog codes."""
+
+    def setUp(self):
+        self.index = CourseNameIndex.from_course_dbs(
+            CourseDatabase(), aliases={"intro to programming": "Csci 256"}
+        )
+
+    def test_levenshtein_matches_dynamic_programming(self):
+        rng = random.Random(7)
+        for _ in range(500):
+            a = "".join(rng.choice("abc ") for _ in range(rng.randint(0, 15)))
+            b = "".join(rng.choice("abc ") for _ in range(rng.randint(0, 15)))
+            self.assertEqual(levenshtein(a, b), reference_levenshtein(a, b))
+
+    def test_exact_code_and_alias(self):
+        self.assertEqual(self.index.resolve("csci-356"), ("CSci 356", "Data Structures in Python", 1.0))
+        self.assertEqual(self.index.resolve("Intro to Programming")[0], "Csci 256")
+        self.assertEqual(self.index.resolve("Intro to ML")[0], "Csci 632")
+
+    def test_fuzzy_match_with_confidence(self):
+        code, _, confidence = self.index.resolve("Fundamentals of Data Sciense")
+
+        self.assertEqual(code, "Csci 343")
+        self.assertGreater(confidence, 0.8)
+        self.assertLess(confidence, 1.0)
+        self.assertIsNone(self.index.resolve("Underwater basket weaving"))
+
+    def test_ambiguous_topic_has_lower_confidence(self):
+        self.assertEqual(self.index.resolve("Deep Learning", min_confidence=0)[2], 0.5)
+        self.assertEqual(self.index.resolve("computer vision")[0], "Csci 581")
+
+    def test_canonicalize_is_order_independent(self):
+        first = self.index.canonicalize(["Data Structures", "intro to programming", "Art History"])
+        second = self.index.canonicalize([" Art  History", "CSci 356", "Csci-256", "Programming in Python", "Art History"])
+
+        self.assertEqual(first, second)
+        self.assertEqual(first, ["Art History", "Csci 256: Programming in Python", "CSci 356: Data Structures in Python"])
+
+    def test_names_sharing_only_a_word_stay_unresolved(self):
+        for name in ("Computer Networks", "Python", "Computer Science", "Data Science"):
+            self.assertIsNone(self.index.resolve(name), name)
+        self.assertIsNone(self.index.resolve("Deep Learning"))
+
+        canonical = self.index.canonicalize(["Computer Networks", "Python", " Art  History", "Machine Learnin"])
+
+        self.assertEqual(canonical, ["Art History", "Computer Networks", "Csci 632: Machine Learning", "Python"])
+
+    def test_partial_titles_naming_one_course(self):
+        index = CourseNameIndex.from_course_dbs(CourseDatabase())
+        expected = {
+            "Data Structures": "CSci 356", "Introduction to Programming": "Csci 256", "intro to programming": "Csci 256",
+            "Database Systems": "Csci 475", "Algorithms": "CSci 433",
+        }
+
+        self.assertEqual({name: index.resolve(name)[0] for name in expected}, expected)
+
+    def test_resolve_many_preserves_order(self):
+        names = ["machine learning", "data structures", "machine learning"]
+
+        codes = [match[0] for match in self.index.resolve_many(names)]
+
+        self.assertEqual(codes, ["Csci 632", "CSci 356", "Csci 632"])
+        self.index.clear_cache()
+        self.assertEqual(self.index.resolve("machine learning")[0], "Csci 632")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
 """Tests for the LLM client module."""
 
+import threading
 import unittest
 from unittest.mock import MagicMock, patch
 import os
@@ -9,7 +10,7 @@ from dotenv import load_dotenv
 load_dotenv(dotenv_path='../../backend/.env')
 
 
-from src.recommender.llm_client import LLMClient
+from src.recommender.llm_client import LLMClient, LLMClientPool
 
 
 class TestLLMClient(unittest.TestCase):
@@ -65,6 +66,85 @@ class TestLLMClient(unittest.TestCase):
             client.query_llm(message, history_json)
         self.assertTrue('API error' in str(context.exception))
 
+    @patch('src.recommender.llm_client.openai.Client')
+    def test_query_llm_stream(self, mock_client):
+        """Test that streamed chunks are yielded in order, skipping empty deltas."""
+        # Arrange
+        chunks = []
+        for content in ['Deep ', None, 'Learning']:
+            chunk = MagicMock()
+            chunk.choices[0].delta.content = content
+            chunks.append(chunk)
+        mock_client.return_value.chat.completions.create.return_value = iter(chunks)
+
+        # Act
+        client = LLMClient('localhost', '5000', 'test_api_key')
+        result = list(client.query_llm_stream('What should I study?'))
+
+        # Assert
+        self.assertEqual(result, ['Deep ', 'Learning'])
+        kwargs = mock_client.return_value.chat.completions.create.call_args[1]
+        self.assertTrue(kwargs['stream'])
+
+
+class TestLLMClientPool(unittest.TestCase):
+    """Test cases for sharing clients and model ids across LLMClient instances."""
+
+    @patch('src.recommender.llm_client.openai.Client')
+    def test_pool_reuses_client_and_model_id(self, mock_client):
+        """Test that pooled clients connect and list models only once per endpoint."""
+        mock_client.return_value.models.list.return_value.data[0].id = 'model-a'
+        pool = LLMClientPool()
+
+        first = LLMClient('localhost', '5000', 'test_api_key', pool=pool)
+        second = LLMClient('localhost', '5000', 'test_api_key', pool=pool)
+
+        self.assertIs(first.client, second.client)
+        self.assertEqual(second.model_name, 'model-a')
+        self.assertEqual(mock_client.call_count, 1)
+        self.assertEqual(mock_client.return_value.models.list.call_count, 1)
+
+    @patch('src.recommender.llm_client.openai.Client')
+    def test_refresh_model(self, mock_client):
+        """Test that refreshing re-queries the server and updates the cached id."""
+        models = mock_client.return_value.models.list.return_value
+        models.data[0].id = 'model-a'
+        pool = LLMClientPool()
+        client = LLMClient('localhost', '5000', 'test_api_key', pool=pool)
+
+        models.data[0].id = 'model-b'
+        self.assertEqual(client.refresh_model(), 'model-b')
+        self.assertEqual(LLMClient('localhost', '5000', 'test_api_key', pool=pool).model_name, 'model-b')
+        self.assertEqual(mock_client.return_value.models.list.call_count, 2)
+
+    @patch('src.recommender.llm_client.openai.Client')
+    def test_slow_endpoint_does_not_block_other_endpoints(self, mock_client):
+        """Test that the model lookup of one endpoint runs outside the pool lock."""
+        release = threading.Event()
+
+        def make_client(base_url, **kwargs):
+            client = MagicMock()
+            if "slow" in base_url:
+                client.models.list.side_effect = lambda: release.wait(5) and MagicMock(data=[MagicMock(id='slow-model')])
+            else:
+                client.models.list.return_value.data[0].id = 'fast-model'
+            return client
+
+        mock_client.side_effect = make_client
+        pool = LLMClientPool()
+        slow = threading.Thread(target=pool.get, args=('slow', '5000', 'key'))
+        slow.start()
+        try:
+            fast_result = []
+            fast = threading.Thread(target=lambda: fast_result.append(pool.get('fast', '5000', 'key')))
+            fast.start()
+            fast.join(2)
+            self.assertEqual(fast_result[0][1], 'fast-model')
+        finally:
+            release.set()
+            slow.join()
+        self.assertEqual(pool.get('slow', '5000', 'key')[1], 'slow-model')
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
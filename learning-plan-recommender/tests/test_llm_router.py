@@ -0,0 +1,184 @@
+"""Tests for routing LLM calls over several endpoints."""
+
+import asyncio
+import time
+import unittest
+
+from loadtest.stub_server import StubServer, StubSettings
+from src.models.course_database import CourseDatabase
+from src.models.student import Student
+from src.recommender.llm_router import AsyncLLMRouter, parse_endpoints
+from src.recommender.plan_generator import LearningPlanGenerator
+from src.recommender.response_cache import ResponseCache
+
+
+class TestLLMRouter(unittest.TestCase):
+    """Test cases for balancing, retries, deadlines, hedging and ejection against stub servers."""
+
+    def start_server(self, **settings):
+        defaults = {"first_token_ms": 1, "tokens_per_second": 0, "completion_tokens": 10, "jitter": 0.0}
+        server = StubServer(("127.0.0.1", 0), StubSettings(**{**defaults, **settings}))
+        server.start_background()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def router(self, servers, **options):
+        return AsyncLLMRouter([("127.0.0.1", str(server.port), "test_api_key") for server in servers], **options)
+
+    def requests(self, server):
+        return server.stats.snapshot()["requests"]
+
+    def run_queries(self, router, count, concurrent=False):
+        async def run():
+            try:
+                if concurrent:
+                    return await asyncio.gather(*(router.query_llm(f"Question {i}") for i in range(count)))
+                return [await router.query_llm(f"Question {i}") for i in range(count)]
+            finally:
+                await router.close()
+        return asyncio.run(run())
+
+    def test_parse_endpoints(self):
+        self.assertEqual(
+            parse_endpoints("gpu1:8000, gpu2:8001,", "key"),
+            [("gpu1", "8000", "key"), ("gpu2", "8001", "key")],
+        )
+        self.assertEqual(parse_endpoints(""), [])
+        with self.assertRaises(ValueError):
+            parse_endpoints("gpu1")
+
+    def test_slow_endpoint_gets_less_traffic(self):
+        fast, slow = self.start_server(), self.start_server(first_token_ms=150)
+        router = self.router([slow, fast])
+
+        results = self.run_queries(router, 20)
+
+        self.assertTrue(all(result["content"] for result in results))
+        self.assertGreater(self.requests(fast), 3 * self.requests(slow))
+
+    def test_cache_hits_do_not_count_as_endpoint_traffic(self):
+        servers = [self.start_server(first_token_ms=50), self.start_server(first_token_ms=50)]
+        router = self.router(servers, cache=ResponseCache())
+
+        async def run():
+            try:
+                await router.query_llm("Question")
+                for _ in range(5):
+                    await router.query_llm("Question")
+                async for _ in router.query_llm_stream("Question"):
+                    pass
+            finally:
+                await router.close()
+        asyncio.run(run())
+
+        endpoints = router.stats()["endpoints"]
+        self.assertEqual(sum(endpoint["requests"] for endpoint in endpoints), 1)
+        self.assertEqual(sum(self.requests(server) for server in servers), 1)
+        # The one real call's latency excludes the model lookup but covers the 50 ms answer
+        latency = next(endpoint["latency_ewma_seconds"] for endpoint in endpoints if endpoint["requests"])
+        self.assertGreaterEqual(latency, 0.04)
+
+    def test_failing_endpoint_is_ejected_and_calls_are_retried(self):
+        healthy, failing = self.start_server(), self.start_server(error_rate=1.0)
+        router = self.router([failing, healthy], eject_after=2, backoff=0.01, max_retries=2)
+
+        results = self.run_queries(router, 10)
+
+        self.assertEqual(len(results), 10)
+        stats = {endpoint["endpoint"]: endpoint for endpoint in router.stats()["endpoints"]}
+        failing_stats = stats[f"127.0.0.1:{failing.port}"]
+        self.assertTrue(failing_stats["ejected"])
+        self.assertEqual(failing_stats["ejections"], 1)
+        self.assertEqual(self.requests(failing), 2)
+        self.assertEqual(self.requests(healthy), 10)
+
+    def test_deadline_bounds_a_stalled_call(self):
+        stalled = self.start_server(first_token_ms=3000)
+        router = self.router([stalled], timeout=0.3, max_retries=1, backoff=0.01)
+
+        started = time.perf_counter()
+        with self.assertRaises(TimeoutError):
+            self.run_queries(router, 1)
+        self.assertLess(time.perf_counter() - started, 2.0)
+
+    def test_hedged_call_is_answered_by_the_faster_endpoint(self):
+        slow, fast = self.start_server(first_token_ms=2000), self.start_server()
+        router = self.router([slow, fast], hedge_after=0.05)
+
+        started = time.perf_counter()
+        results = self.run_queries(router, 1)
+
+        self.assertTrue(results[0]["content"])
+        self.assertLess(time.perf_counter() - started, 1.5)
+        self.assertEqual((router.counts["hedges"], router.counts["hedge_wins"]), (1, 1))
+
+    def test_stream_is_retried_before_the_first_chunk(self):
+        failing, healthy = self.start_server(error_rate=1.0), self.start_server()
+        router = self.router([failing, healthy], backoff=0.01)
+
+        async def stream():
+            try:
+                return [chunk async for chunk in router.query_llm_stream("Stream please")]
+            finally:
+                await router.close()
+
+        chunks = asyncio.run(stream())
+
+        self.assertTrue("".join(chunks))
+        self.assertEqual(router.counts["retries"], 1)
+
+    def test_generator_spreads_plan_calls_over_endpoints(self):
+        first, second = self.start_server(), self.start_server()
+        endpoints = [("127.0.0.1", str(server.port), "test_api_key") for server in (first, second)]
+        generator = LearningPlanGenerator("127.0.0.1", str(first.port), "test_api_key", endpoints=endpoints, response_cache=ResponseCache())
+        student = Student(prior_courses=["CSCI 111"], department="Computer Science", degree_level="Graduate")
+
+        plan = generator.generate_plan(student, "Deep Learning", CourseDatabase(), bypass_cache=True)
+        chunks = list(generator.generate_plan_stream(student, "Machine Learning", CourseDatabase(), bypass_cache=True))
+
+        self.assertTrue(plan)
+        self.assertTrue("".join(chunks))
+        self.assertEqual(self.requests(first) + self.requests(second), 8)
+        self.assertGreater(self.requests(first), 0)
+        self.assertGreater(self.requests(second), 0)
+
+    def test_blocking_plans_close_their_connections(self):
+        servers = [self.start_server(), self.start_server()]
+        endpoints = [("127.0.0.1", str(server.port), "test_api_key") for server in servers]
+        generator = LearningPlanGenerator("127.0.0.1", str(servers[0].port), "test_api_key", endpoints=endpoints, response_cache=ResponseCache())
+        student = Student(prior_courses=["CSCI 111"], department="Computer Science", degree_level="Graduate")
+
+        for _ in range(3):
+            generator.generate_plan(student, "Deep Learning", CourseDatabase(), bypass_cache=True)
+
+        # Each plan's event loop closes its clients when it ends; the model id outlives them
+        deadline = time.monotonic() + 5
+        while any(server.stats.snapshot()["active_connections"] for server in servers) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual([server.stats.snapshot()["active_connections"] for server in servers], [0, 0])
+        self.assertTrue(all(endpoint.model_name for endpoint in generator._router.endpoints))
+        self.assertFalse(any(endpoint._clients for endpoint in generator._router.endpoints))
+
+    def test_async_plans_close_their_connections_when_the_loop_ends(self):
+        servers = [self.start_server(), self.start_server()]
+        endpoints = [("127.0.0.1", str(server.port), "test_api_key") for server in servers]
+        generator = LearningPlanGenerator("127.0.0.1", str(servers[0].port), "test_api_key", endpoints=endpoints, response_cache=ResponseCache())
+        student = Student(prior_courses=["CSCI 111"], department="Computer Science", degree_level="Graduate")
+
+        async def run():
+            return await asyncio.gather(*(
+                generator.generate_plan_async(student, target_course, CourseDatabase(), bypass_cache=True)
+                for target_course in ("Deep Learning", "Machine Learning")
+            ))
+        self.assertTrue(all(asyncio.run(run())))
+
+        # The caller's loop never closes the router, but its shutdown closes the clients made on it
+        deadline = time.monotonic() + 5
+        while any(server.stats.snapshot()["active_connections"] for server in servers) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual([server.stats.snapshot()["active_connections"] for server in servers], [0, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+"""Tests for the load generator, run against the stub server."""
+
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+
+from benchmarks.synthetic_catalog import write_catalog_pdf
+from loadtest.load_generator import LoadTest, synthetic_students
+from loadtest.stub_server import StubServer, StubSettings
+from src.models.course_database import CourseDatabase
+from src.recommender.plan_generator_fast import LearningPlanGenerator
+from src.recommender.response_cache import ResponseCache
+
+
+class TestLoadTest(unittest.TestCase):
+    """Test cases for the async and thread-pool modes."""
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.work_dir)
+        catalog_path = os.path.join(self.work_dir, "catalog.pdf")
+        write_catalog_pdf(catalog_path, pages=3)
+
+        server = StubServer(("127.0.0.1", 0), StubSettings(first_token_ms=1, tokens_per_second=0, completion_tokens=12))
+        server.start_background()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        self.generator = LearningPlanGenerator(
+            "127.0.0.1", str(server.port), "test_api_key", catalog_path=catalog_path,
+            cache_dir=os.path.join(self.work_dir, "cache"), catalog_load="eager", response_cache=ResponseCache(),
+        )
+        self.addCleanup(self.generator.course_store.close)
+        self.course_db = CourseDatabase()
+
+    def test_both_modes_record_every_plans_stages(self):
+        students = list(synthetic_students(4, self.course_db))
+
+        async_test = LoadTest(self.generator, self.course_db, concurrency=2)
+        asyncio.run(async_test.run_async(students))
+        threads_test = LoadTest(self.generator, self.course_db, concurrency=2)
+        threads_test.run_threads(students)
+
+        for load_test in (async_test, threads_test):
+            self.assertEqual(load_test.errors, {})
+            self.assertEqual(len(load_test.latencies), 4)
+            self.assertIn("final_plan", load_test.stage_latencies)
+            self.assertEqual(set(load_test.stage_latencies), set(async_test.stage_latencies))
+            self.assertTrue(all(len(values) == 4 for values in load_test.stage_latencies.values()))
+            self.assertEqual(load_test.token_totals["llm_calls"], 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
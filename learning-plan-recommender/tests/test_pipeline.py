@@ -0,0 +1,72 @@
+"""Tests for the dependency-aware stage pipeline."""
+
+import asyncio
+import time
+import unittest
+
+from src.recommender.pipeline import Stage, StagePipeline
+
+
+class TestStagePipeline(unittest.TestCase):
+    """Test cases for running stages as a DAG."""
+
+    def test_results_follow_dependencies(self):
+        async def double(value):
+            return value * 2
+
+        pipeline = StagePipeline([
+            Stage("total", lambda doubled, offset: doubled + offset, ["doubled", "offset"]),
+            Stage("doubled", double, ["value"]),
+            Stage("offset", lambda: 1),
+        ])
+
+        run = asyncio.run(pipeline.run({"value": 20}))
+
+        self.assertEqual(run.results["total"], 41)
+
+    def test_independent_stages_overlap(self):
+        async def slow_llm_call():
+            await asyncio.sleep(0.2)
+            return "assessment"
+
+        def slow_lookup():
+            time.sleep(0.2)
+            return ["snippet"]
+
+        pipeline = StagePipeline([
+            Stage("knowledge", slow_llm_call),
+            Stage("lookup", slow_lookup),
+            Stage("plan", lambda knowledge, lookup: (knowledge, lookup), ["knowledge", "lookup"]),
+        ])
+
+        started = time.perf_counter()
+        run = asyncio.run(pipeline.run())
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(run.results["plan"], ("assessment", ["snippet"]))
+        self.assertLess(elapsed, 0.35)
+        self.assertEqual([name for name, _ in run.critical_path()][-1], "plan")
+        self.assertEqual(set(run.report()["stages"]), {"knowledge", "lookup", "plan"})
+
+    def test_critical_path_follows_slowest_input(self):
+        pipeline = StagePipeline([
+            Stage("fast", lambda: None),
+            Stage("slow", lambda: time.sleep(0.05)),
+            Stage("end", lambda fast, slow: None, ["fast", "slow"]),
+        ])
+
+        run = asyncio.run(pipeline.run())
+
+        self.assertEqual([name for name, _ in run.critical_path()], ["slow", "end"])
+
+    def test_cycles_and_missing_inputs_are_rejected(self):
+        with self.assertRaises(ValueError):
+            StagePipeline([Stage("a", lambda b: b, ["b"]), Stage("b", lambda a: a, ["a"])])
+
+        pipeline = StagePipeline([Stage("a", lambda missing: missing, ["missing"])])
+        with self.assertRaises(ValueError):
+            asyncio.run(pipeline.run())
+
+
+if __name__ == '__main__':
+    unittest.main()
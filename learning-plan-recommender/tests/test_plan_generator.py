@@ -1,5 +1,7 @@
+import asyncio
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
+from src.recommender.llm_router import run_blocking
 from src.recommender.plan_generator import LearningPlanGenerator
 from src.models.student import Student
 from src.models.course_database import CourseDatabase
@@ -65,4 +67,73 @@ class TestPlanGenerator(unittest.TestCase):
         
         # Fourth prompt should be about the final plan
         self.assertIn("learning plan", calls[3][0][0].lower())
-        self.assertIn("Course Selection Content", calls[3][0][0])
\ No newline at end of file
+        self.assertIn("Course Selection Content", calls[3][0][0])
+
+    def test_generate_plan_async_with_async_client(self):
+        # Arrange - an async client whose query_llm is a coroutine
+        mock_llm_client = MagicMock()
+        mock_llm_client.query_llm = AsyncMock(side_effect=[
+            {"content": "Knowledge Assessment Content", "role": "assistant"},
+            {"content": "Gap Analysis Content", "role": "assistant"},
+            {"content": "Course Selection Content", "role": "assistant"},
+            {"content": "Final Learning Plan Content", "role": "assistant"},
+        ])
+        
+        # Act
+        plan_generator = LearningPlanGenerator(self.host, self.port, self.api_key)
+        learning_plan = asyncio.run(plan_generator.generate_plan_async(
+            self.student, self.target_course, self.course_db, llm_client=mock_llm_client
+        ))
+        
+        # Assert
+        self.assertEqual(learning_plan, "Final Learning Plan Content")
+        self.assertEqual(mock_llm_client.query_llm.await_count, 4)
+        self.assertIn("Gap Analysis Content", mock_llm_client.query_llm.await_args_list[2][0][0])
+
+    def test_concurrent_plans_keep_their_own_trace(self):
+        # Arrange - a slow client, so the two plans' calls interleave
+        async def query_llm(prompt, *args, **kwargs):
+            await asyncio.sleep(0.01)
+            return {"content": "Plan Content", "role": "assistant"}
+
+        mock_llm_client = MagicMock()
+        mock_llm_client.query_llm = AsyncMock(side_effect=query_llm)
+        plan_generator = LearningPlanGenerator(self.host, self.port, self.api_key)
+
+        async def plan(target_course):
+            await plan_generator.generate_plan_async(self.student, target_course, self.course_db, llm_client=mock_llm_client)
+            return plan_generator.last_trace.attributes["target_course"]
+
+        async def run():
+            return await asyncio.gather(plan("Deep Learning"), plan("Compilers"))
+
+        # Act
+        blocking_target = run_blocking(plan(self.target_course))
+        concurrent_targets = asyncio.run(run())
+
+        # Assert
+        self.assertEqual(blocking_target, "Deep Learning")
+        self.assertEqual(concurrent_targets, ["Deep Learning", "Compilers"])
+        self.assertEqual(plan_generator.last_trace.attributes["target_course"], "Deep Learning")
+
+    @patch('src.recommender.plan_generator.LLMClient')
+    def test_generate_plan_stream(self, mock_llm_client_class):
+        # Arrange - three regular responses, then a streamed final plan
+        mock_llm_client = MagicMock()
+        mock_llm_client_class.return_value = mock_llm_client
+        mock_llm_client.query_llm.side_effect = [
+            {"content": "Knowledge Assessment Content", "role": "assistant"},
+            {"content": "Gap Analysis Content", "role": "assistant"},
+            {"content": "Course Selection Content", "role": "assistant"},
+        ]
+        mock_llm_client.query_llm_stream.return_value = iter(["Final ", "Learning ", "Plan"])
+        
+        # Act
+        plan_generator = LearningPlanGenerator(self.host, self.port, self.api_key)
+        chunks = list(plan_generator.generate_plan_stream(self.student, self.target_course, self.course_db))
+        
+        # Assert
+        self.assertEqual("".join(chunks), "Final Learning Plan")
+        self.assertEqual(mock_llm_client.query_llm.call_count, 3)
+        final_prompt = mock_llm_client.query_llm_stream.call_args[0][0]
+        self.assertIn("Course Selection Content", final_prompt)
@@ -0,0 +1,125 @@
+"""Tests for the fused two-call plan generator."""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+from benchmarks.synthetic_catalog import write_catalog_pdf
+from loadtest.stub_server import StubServer, StubSettings
+from src.models.course_database import CourseDatabase
+from src.models.student import Student
+from src.recommender.plan_generator_fast import LearningPlanGenerator, format_assessment, parse_assessment
+from src.recommender.llm_router import run_blocking
+from src.recommender.plan_generator_rag import LearningPlanGenerator as RagLearningPlanGenerator
+from src.recommender.response_cache import ResponseCache
+
+
+class TestParseAssessment(unittest.TestCase):
+    """Test cases for reading the JSON stage output."""
+
+    def test_fenced_json_with_loose_types(self):
+        text = """Here you go:
+        ```json
+        {"knowledge_summary": " Knows Python. ", "known_topics": ["python", 3, ""],
+         "gaps": [{"topic": "linear algebra", "reason": "matrix calculus", "priority": "ESSENTIAL"},
+                  "probability", {"reason": "no topic"}, {"topic": "GPUs", "priority": "someday"}],
+         "search_terms": ["MATH 221", null]}
+        ```"""
+
+        assessment = parse_assessment(text)
+
+        self.assertTrue(assessment["structured"])
+        self.assertEqual(assessment["knowledge_summary"], "Knows Python.")
+        self.assertEqual(assessment["known_topics"], ["python"])
+        self.assertEqual(assessment["search_terms"], ["MATH 221"])
+        self.assertEqual(
+            [(gap["topic"], gap["priority"]) for gap in assessment["gaps"]],
+            [("linear algebra", "essential"), ("probability", "essential"), ("GPUs", "essential")],
+        )
+        self.assertIn("- linear algebra (essential): matrix calculus", format_assessment(assessment))
+
+    def test_prose_falls_back_to_summary(self):
+        assessment = parse_assessment("The student needs linear algebra {but this is not JSON}")
+
+        self.assertFalse(assessment["structured"])
+        self.assertIn("linear algebra", assessment["knowledge_summary"])
+        self.assertEqual(assessment["gaps"], [])
+
+
+class TestFastPlanGenerator(unittest.TestCase):
+    """Test cases for the two-call pipeline against a synthetic catalog."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.work_dir = tempfile.mkdtemp()
+        cls.catalog_path = os.path.join(cls.work_dir, "catalog.pdf")
+        write_catalog_pdf(cls.catalog_path, pages=3)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.work_dir)
+
+    def setUp(self):
+        self.student = Student(prior_courses=["CSCI 111"], department="Computer Science", degree_level="Graduate")
+        self.course_db = CourseDatabase()
+
+    def generator(self, generator_class, host="localhost", port="5000"):
+        generator = generator_class(
+            host, port, "test_api_key", catalog_path=self.catalog_path, cache_dir=os.path.join(self.work_dir, "cache"),
+            catalog_load="eager", response_cache=ResponseCache(),
+        )
+        self.addCleanup(generator.course_store.close)
+        return generator
+
+    def test_structured_terms_drive_retrieval(self):
+        generator = self.generator(LearningPlanGenerator)
+        course = generator.course_store.get_all_courses()[0]
+        llm_client = MagicMock()
+        llm_client.query_llm = AsyncMock(side_effect=[
+            {"content": json.dumps({
+                "knowledge_summary": "Knows programming basics.",
+                "known_topics": ["programming"],
+                "gaps": [{"topic": "optimization", "reason": "training", "priority": "essential"}],
+                "search_terms": [course["code"]],
+            }), "role": "assistant"},
+            {"content": "Final Learning Plan Content", "role": "assistant"},
+        ])
+
+        plan = run_blocking(generator.generate_plan_async(self.student, "Deep Learning", self.course_db, llm_client=llm_client))
+
+        self.assertEqual(plan, "Final Learning Plan Content")
+        self.assertEqual(llm_client.query_llm.await_count, 2)
+        self.assertIn("JSON object", llm_client.query_llm.await_args_list[0][0][0])
+        final_prompt = llm_client.query_llm.await_args_list[1][0][0]
+        self.assertIn(course["code"], final_prompt)
+        self.assertIn("- optimization (essential): training", final_prompt)
+        self.assertIn("## Recommended Courses", final_prompt)
+        self.assertEqual(generator.last_trace.attributes["generator"], "fast")
+
+    def test_fewer_calls_and_prompt_tokens_than_rag(self):
+        server = StubServer(("127.0.0.1", 0), StubSettings(first_token_ms=1, tokens_per_second=0, completion_tokens=40))
+        server.start_background()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        usage = {}
+        for generator_class in (RagLearningPlanGenerator, LearningPlanGenerator):
+            before = server.stats.snapshot()
+            generator = self.generator(generator_class, "127.0.0.1", str(server.port))
+            chunks = list(generator.generate_plan_stream(self.student, "Deep Learning", self.course_db, bypass_cache=True))
+            self.assertTrue("".join(chunks))
+            after = server.stats.snapshot()
+            usage[generator_class.generator_name] = (
+                after["requests"] - before["requests"], after["prompt_tokens"] - before["prompt_tokens"],
+            )
+
+        self.assertEqual(usage["rag"][0], 4)
+        self.assertEqual(usage["fast"][0], 2)
+        self.assertLess(usage["fast"][1], usage["rag"][1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+"""Tests for the shared memory-mapped catalog and the plan-serving process pool."""
+
+import os
+import shutil
+import signal
+import tempfile
+import time
+import unittest
+
+from benchmarks.synthetic_catalog import write_catalog_pdf
+from loadtest.stub_server import StubServer, StubSettings
+from src.models.student import Student
+from src.recommender.catalog_index import CatalogIndex
+from src.recommender.plan_generator_rag import LearningPlanGenerator
+from src.recommender.plan_pool import PlanPool
+from src.recommender.shared_catalog import SharedCatalog
+
+
+class TestSharedCatalog(unittest.TestCase):
+    """Test cases for the memory-mapped catalog file."""
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.work_dir)
+
+    def shared(self, text, page_offsets):
+        return SharedCatalog.build(os.path.join(self.work_dir, "catalog.bin"), text, page_offsets, meta={"name": "test"})
+
+    def test_search_matches_in_memory_index(self):
+        text = "".join(
+            f"CSCI {500 + i} Topic {i}: machine learning, neural networks and statistics for week {i}. " * 3
+            for i in range(60)
+        )
+        index = CatalogIndex.build(text, [0, len(text) // 2])
+        shared = self.shared(text, [0, len(text) // 2])
+
+        for query in ("machine learning", "neural week", "Topic 17", "absent term"):
+            self.assertEqual(shared.index.search(query, 5), index.search(query, 5))
+        self.assertEqual([shared.index.chunks[i] for i in range(len(index.chunks))], list(index.chunks))
+        self.assertEqual(shared.page_offsets, [0, len(text) // 2])
+        self.assertEqual(shared.meta, {"name": "test"})
+
+    def test_text_slices_for_every_character_width(self):
+        for text in ("plain ascii text", "café résumé", "Σ calculus → ∫", "emoji 🎓 graduation"):
+            shared = self.shared(text, [0])
+            self.assertEqual(len(shared.text), len(text))
+            self.assertEqual(shared.text[2:9], text[2:9])
+            self.assertEqual(shared.text[-3:], text[-3:])
+            self.assertEqual(shared.text[5], text[5])
+            self.assertEqual(str(shared.text), text)
+
+    def test_generator_attached_to_shared_catalog(self):
+        catalog_path = os.path.join(self.work_dir, "catalog.pdf")
+        write_catalog_pdf(catalog_path, pages=3)
+        cache_dir = os.path.join(self.work_dir, "cache")
+        local = LearningPlanGenerator("localhost", "5000", "test_api_key", catalog_path=catalog_path,
+                                      cache_dir=cache_dir, catalog_load="eager")
+        self.addCleanup(local.course_store.close)
+        path = local.export_shared_catalog(os.path.join(cache_dir, "shared.bin"))
+
+        attached = LearningPlanGenerator("localhost", "5000", "test_api_key", cache_dir=cache_dir,
+                                         catalog_load="eager", shared_catalog=path)
+        self.addCleanup(attached.course_store.close)
+
+        self.assertEqual(attached.search_catalog("machine learning"), local.search_catalog("machine learning"))
+        self.assertEqual(len(attached.course_store.get_all_courses()), len(local.course_store.get_all_courses()))
+        with self.assertRaises(ValueError):
+            LearningPlanGenerator("localhost", "5000", "test_api_key", retriever="semantic", shared_catalog=path)
+
+
+class TestPlanPool(unittest.TestCase):
+    """Test cases for work distribution, recycling and worker health in the pool."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.work_dir = tempfile.mkdtemp()
+        cls.catalog_path = os.path.join(cls.work_dir, "catalog.pdf")
+        write_catalog_pdf(cls.catalog_path, pages=3)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.work_dir)
+
+    def start_server(self, **settings):
+        server = StubServer(("127.0.0.1", 0), StubSettings(**{"first_token_ms": 1, "tokens_per_second": 0, "completion_tokens": 20, **settings}))
+        server.start_background()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def pool(self, server, **options):
+        pool = PlanPool("127.0.0.1", server.port, "test_api_key", catalog_path=self.catalog_path,
+                        cache_dir=os.path.join(self.work_dir, "cache"), **options)
+        self.addCleanup(pool.close, wait=False)
+        return pool.start()
+
+    def student(self, i=0):
+        return Student(prior_courses=["CSCI 111"], department=f"Computer Science {i}", degree_level="Graduate")
+
+    def test_plans_are_spread_over_workers_and_recycled(self):
+        server = self.start_server()
+        pool = self.pool(server, processes=2, threads_per_worker=2, max_tasks_per_worker=3, task_timeout=60)
+
+        futures = [pool.submit(self.student(i), "Deep Learning", bypass_cache=True) for i in range(8)]
+        plans = [future.result(60) for future in futures]
+
+        self.assertTrue(all(plans))
+        stats = pool.stats()
+        self.assertEqual(stats["completed"], 8)
+        self.assertGreaterEqual(stats["recycled"], 2)
+        self.assertEqual(server.stats.snapshot()["requests"], 32)
+        pool.close()
+        self.assertEqual(pool.stats()["workers"], [])
+
+    def test_crashed_worker_is_replaced(self):
+        server = self.start_server()
+        pool = self.pool(server, processes=1, threads_per_worker=1, task_timeout=60)
+        pid = pool.stats()["workers"][0]["pid"]
+
+        os.kill(pid, signal.SIGKILL)
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline and pool.stats()["crashes"] == 0:
+            time.sleep(0.05)
+
+        self.assertTrue(pool.generate_plan(self.student(), "Deep Learning", bypass_cache=True, timeout=60))
+        stats = pool.stats()
+        self.assertEqual(stats["crashes"], 1)
+        self.assertNotEqual(stats["workers"][0]["pid"], pid)
+
+    def test_slow_plan_times_out_and_worker_is_replaced(self):
+        server = self.start_server(first_token_ms=5000)
+        pool = self.pool(server, processes=1, threads_per_worker=1, task_timeout=0.5)
+
+        with self.assertRaises(TimeoutError):
+            pool.generate_plan(self.student(), "Deep Learning", bypass_cache=True, timeout=30)
+        stats = pool.stats()
+        self.assertEqual(stats["timeouts"], 1)
+        self.assertEqual(stats["spawned"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+"""Tests for the precomputed prerequisite graph."""
+
+import unittest
+
+from src.models.course import Course
+from src.models.course_database import CourseDatabase
+from src.models.prerequisite_graph import PrerequisiteGraph, structural_plan
+from src.models.student import Student
+
+
+class TestPrerequisiteGraph(unittest.TestCase):
+    """Test cases for transitive closure and topological planning."""
+
+    def setUp(self):
+        self.course_db = CourseDatabase()
+        self.graph = self.course_db.get_prerequisite_graph()
+
+    def assert_topological(self, codes):
+        position = {self.graph.index[code.upper()]: i for i, code in enumerate(codes)}
+        for i, code in enumerate(codes):
+            course = self.course_db.get_course_by_code(code)
+            for prereq in course["prerequisites"]:
+                prereq_index = self.graph.index[prereq.upper()]
+                if prereq_index in position:
+                    self.assertLess(position[prereq_index], i)
+
+    def test_prerequisite_chain(self):
+        chain = self.graph.prerequisite_chain("engr-691")
+
+        self.assertEqual(set(chain), {"Csci 256", "Csci 343", "CSci 356", "Csci 443", "Csci 632"})
+        self.assertEqual(chain[0], "Csci 256")
+        self.assertEqual(chain[-1], "Csci 632")
+        self.assert_topological(chain)
+
+    def test_completed_course_satisfies_its_own_prerequisites(self):
+        missing = self.graph.missing_prerequisites("Engr 691", ["Csci 443"])
+
+        self.assertEqual(missing, ["Csci 632"])
+        self.assertEqual(self.graph.missing_prerequisites("Csci 256", []), [])
+        self.assertEqual(self.graph.missing_prerequisites("Unknown 100", []), [])
+
+    def test_completed_courses_by_name(self):
+        completed = self.graph.completed_codes(["Programming in Python", "csci 343", "Basket Weaving"])
+
+        self.assertEqual(completed, ["Csci 256", "Csci 343"])
+
+    def test_find_courses_prefers_exact_names(self):
+        self.course_db.add_courses([{"code": "Csci 643", "name": "Advanced Data Mining", "prerequisites": ["Csci 543"]}])
+        graph = self.course_db.get_prerequisite_graph()
+
+        self.assertEqual(graph.find_courses("data mining"), ["CSci 543"])
+        self.assertEqual(graph.find_courses("Deep Learning"), ["CSci 492", "Engr 691"])
+        self.assertEqual(graph.find_courses("Data"), ["Csci 343", "CSci 356", "CSci 433"])
+        self.assertEqual(graph.find_courses("Data", max_matches=1), ["Csci 343"])
+        self.assertEqual(graph.find_courses("Quantum"), [])
+
+    def test_cycles_do_not_hang(self):
+        graph = PrerequisiteGraph([
+            {"code": "A 100", "prerequisites": ["B 100"]},
+            {"code": "B 100", "prerequisites": ["A 100"]},
+            {"code": "C 100", "prerequisites": ["B 100"]},
+        ])
+
+        self.assertEqual(set(graph.prerequisite_chain("C 100")), {"A 100", "B 100"})
+        self.assertEqual(set(graph.cyclic), {"A 100", "B 100"})
+
+    def test_structural_plan(self):
+        student = Student(prior_courses=["Programming in Python"], department="CS", degree_level="Graduate")
+
+        plan = structural_plan(student, "Machine Learning", self.course_db)
+
+        self.assertIn("Csci 632 (Machine Learning): take Csci 343 -> CSci 356 -> Csci 443", plan)
+        self.assertIsNone(structural_plan(student, "Underwater Basket Weaving", self.course_db))
+
+    def test_course_model_lookups(self):
+        course = Course("ML", "Machine learning", ["Csci 443"])
+
+        self.assertTrue(course.has_prerequisites(["Csci 256", "Csci 443"]))
+        self.assertFalse(course.has_prerequisites(["Csci 256"]))
+        self.assertEqual(self.course_db.get_course_by_code("csci 632")["name"], "Machine Learning")
+        self.assertIsNone(self.course_db.get_course_by_code("Csci 999"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+"""Tests for token-budgeted prompt assembly."""
+
+import unittest
+
+from src.recommender.prompt_budget import PromptBudget, compact_text, count_tokens, truncate_to_tokens
+
+
+GAP_ANALYSIS = """
+Here is a detailed analysis of the gaps this student needs to close before the course.
+
+## Mathematical Prerequisites
+- Linear algebra: the student has not taken a matrix course. Eigenvalues and SVD appear throughout.
+- Probability: only informal exposure. Bayes rule and distributions are needed.
+
+## Programming Skills
+1. PyTorch or TensorFlow experience. The labs assume one of them.
+2. Vectorised NumPy code. Loops over arrays will be too slow.
+
+Overall the student should plan roughly two semesters of preparation, as explained in detail above.
+"""
+
+
+class TestPromptBudget(unittest.TestCase):
+    """Test cases for token counting, compaction and budget allocation."""
+
+    def test_count_tokens(self):
+        self.assertEqual(count_tokens(""), 0)
+        self.assertGreater(count_tokens("Deep learning needs linear algebra."), 4)
+
+    def test_text_within_budget_is_unchanged(self):
+        self.assertEqual(compact_text(GAP_ANALYSIS, 1000), GAP_ANALYSIS)
+
+    def test_compaction_keeps_headings_and_bullets(self):
+        compacted = compact_text(GAP_ANALYSIS, 90)
+
+        self.assertLessEqual(count_tokens(compacted), 90)
+        self.assertIn("## Mathematical Prerequisites", compacted)
+        self.assertIn("- Linear algebra", compacted)
+        self.assertNotIn("Here is a detailed analysis", compacted)
+
+    def test_truncate_to_tokens(self):
+        truncated = truncate_to_tokens(GAP_ANALYSIS, 30)
+
+        self.assertLessEqual(count_tokens(truncated), 30)
+        self.assertTrue(truncated.endswith("...[truncated]"))
+
+    def test_fit_shares_budget_between_sections(self):
+        budget = PromptBudget(max_input_tokens=300, template_tokens=100, min_section_tokens=10)
+        short = "Student is ready."
+        long_sections = [GAP_ANALYSIS * 3, GAP_ANALYSIS * 2]
+
+        fitted = budget.fit([short] + long_sections)
+
+        self.assertEqual(fitted[0], short)
+        self.assertLessEqual(sum(count_tokens(section) for section in fitted), 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
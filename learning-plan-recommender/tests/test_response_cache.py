@@ -0,0 +1,85 @@
+"""Tests for the LLM response cache."""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from src.recommender.llm_client import LLMClient
+from src.recommender.response_cache import ResponseCache
+
+
+class TestResponseCache(unittest.TestCase):
+    """Test cases for the memory and disk tiers of the response cache."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.response = {"content": "cached plan", "role": "assistant"}
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_key_depends_on_sampling_parameters(self):
+        messages = [{"role": "user", "content": "hi"}]
+
+        key = ResponseCache.make_key("model", messages, 0.6, 0.95)
+
+        self.assertEqual(key, ResponseCache.make_key("model", messages, 0.6, 0.95))
+        self.assertNotEqual(key, ResponseCache.make_key("model", messages, 0.7, 0.95))
+        self.assertNotEqual(key, ResponseCache.make_key("other", messages, 0.6, 0.95))
+
+    def test_memory_lru_eviction(self):
+        cache = ResponseCache(max_memory_entries=2)
+        cache.put("a", self.response)
+        cache.put("b", self.response)
+        cache.get("a")
+        cache.put("c", self.response)
+
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.stats()["memory_hits"], 2)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_disk_tier_survives_restart(self):
+        ResponseCache(self.tmp_dir.name).put("key", self.response)
+
+        cache = ResponseCache(self.tmp_dir.name)
+
+        self.assertEqual(cache.get("key"), self.response)
+        self.assertEqual(cache.stats()["disk_hits"], 1)
+
+    def test_ttl_expiry(self):
+        cache = ResponseCache(self.tmp_dir.name, ttl_seconds=60)
+        with patch("src.recommender.response_cache.time.time", return_value=1000.0):
+            cache.put("key", self.response)
+        with patch("src.recommender.response_cache.time.time", return_value=1100.0):
+            self.assertIsNone(cache.get("key"))
+
+    def test_disk_size_eviction(self):
+        cache = ResponseCache(self.tmp_dir.name, max_disk_bytes=400)
+        for i in range(10):
+            cache.put(f"{i:064d}", {"content": "x" * 50, "role": "assistant"})
+
+        self.assertLessEqual(cache.stats()["disk_bytes"], 400)
+        remaining = sum(len(files) for _, _, files in os.walk(self.tmp_dir.name))
+        self.assertLess(remaining, 10)
+
+    @patch('src.recommender.llm_client.openai.Client')
+    def test_llm_client_uses_cache(self, mock_client):
+        mock_client.return_value.models.list.return_value.data[0].id = 'model-a'
+        mock_response = MagicMock()
+        mock_response.choices[0].message.content = 'fresh plan'
+        create = mock_client.return_value.chat.completions.create
+        create.return_value = mock_response
+        client = LLMClient('localhost', '5000', 'test_api_key', cache=ResponseCache())
+
+        first = client.query_llm('same prompt')
+        second = client.query_llm('same prompt')
+        client.query_llm('same prompt', bypass_cache=True)
+
+        self.assertEqual(first, second)
+        self.assertEqual(create.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+"""Tests for the semantic catalog index."""
+
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.recommender.semantic_index import HashingEmbedder, SemanticCatalogIndex
+
+
+CATALOG_TEXT = (
+    "Csci 343. Fundamentals of Data Science. Statistics, probability and data analysis.\n"
+    "Csci 632. Machine Learning. Algorithms that learn from data, regression and classification.\n"
+    "Engr 691. Deep Learning. Neural networks, backpropagation and convolutional networks.\n"
+    "Csci 475. Database Systems. Relational databases, SQL and transactions.\n"
+)
+
+
+class TestSemanticCatalogIndex(unittest.TestCase):
+    """Test cases for dense retrieval over catalog chunks."""
+
+    def setUp(self):
+        self.index = SemanticCatalogIndex.build(CATALOG_TEXT, max_chunk_chars=100)
+
+    def _best_text(self, results):
+        start, end, _ = self.index.chunks[results[0][0]]
+        return CATALOG_TEXT[start:end]
+
+    def test_embeddings_are_float32_and_normalized(self):
+        self.assertEqual(self.index.embeddings.dtype, np.float32)
+        np.testing.assert_allclose(np.linalg.norm(self.index.embeddings, axis=1), 1.0, rtol=1e-5)
+
+    def test_search(self):
+        results = self.index.search("neural networks", top_k=2)
+
+        self.assertLessEqual(len(results), 2)
+        self.assertIn("Deep Learning", self._best_text(results))
+
+    def test_batch_matches_single_queries(self):
+        queries = ["sql transactions", "probability and statistics"]
+
+        batch = self.index.search_batch(queries, top_k=3)
+
+        for query, results in zip(queries, batch):
+            self.assertEqual([chunk for chunk, _ in results], [chunk for chunk, _ in self.index.search(query, top_k=3)])
+
+    def test_load_or_build_memory_maps_embeddings(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            index = SemanticCatalogIndex.load_or_build(CATALOG_TEXT, cache_dir=tmp_dir)
+
+            built = SemanticCatalogIndex.build(CATALOG_TEXT)
+
+            self.assertIsInstance(index.embeddings, np.memmap)
+            self.assertEqual(index.chunks, built.chunks)
+            self.assertEqual(index.search("databases"), built.search("databases"))
+
+    def test_load_or_build_replaces_a_stale_saved_index(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            SemanticCatalogIndex.load_or_build(CATALOG_TEXT, cache_dir=tmp_dir)
+            (directory,) = os.listdir(tmp_dir)
+            meta_path = os.path.join(tmp_dir, directory, "meta.json")
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump({"version": 0}, f)
+
+            index = SemanticCatalogIndex.load_or_build(CATALOG_TEXT, cache_dir=tmp_dir)
+
+            self.assertIsInstance(index.embeddings, np.memmap)
+            self.assertEqual(os.listdir(tmp_dir), [directory])
+            self.assertIsNotNone(SemanticCatalogIndex.load(os.path.join(tmp_dir, directory)))
+
+    def test_embedder_feature_cache_is_bounded(self):
+        embedder = HashingEmbedder(n_features=64, cache_size=8)
+        expected = embedder.transform(["unique query words"])
+
+        embedder.transform([f"query number {i}" for i in range(100)])
+
+        self.assertEqual(embedder._bucket.cache_info().currsize, 8)
+        np.testing.assert_array_equal(embedder.transform(["unique query words"]), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
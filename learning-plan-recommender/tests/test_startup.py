@@ -0,0 +1,92 @@
+"""Tests for lazy imports and deferred catalog loading."""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from benchmarks.synthetic_catalog import write_catalog_pdf
+from src.recommender import llm_client
+from src.recommender.lazy_import import LazyModule
+from src.recommender.plan_generator_rag import LearningPlanGenerator
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestLazyImports(unittest.TestCase):
+    """Test cases for keeping heavy modules out of startup."""
+
+    def test_app_import_skips_heavy_modules(self):
+        code = (
+            "import sys, app\n"
+            "print(','.join(m for m in ('openai', 'fitz', 'pymupdf', 'numpy', 'tiktoken', 'http.server') if m in sys.modules))"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code], cwd=PROJECT_DIR, check=True, capture_output=True, text=True
+        ).stdout.strip()
+        self.assertEqual(output, "")
+
+    def test_lazy_module_loads_on_first_use(self):
+        module = LazyModule("json")
+        self.assertIn("not loaded", repr(module))
+
+        self.assertEqual(module.dumps([1]), "[1]")
+        self.assertIn("(loaded)", repr(module))
+
+    def test_patching_through_lazy_module(self):
+        with patch("src.recommender.llm_client.openai.Client") as mock_client:
+            self.assertIs(llm_client.openai.Client, mock_client)
+        self.assertIsNot(llm_client.openai.Client, mock_client)
+
+
+class TestCatalogLoading(unittest.TestCase):
+    """Test cases for eager, background and lazy catalog loading."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.work_dir = tempfile.mkdtemp()
+        cls.catalog_path = os.path.join(cls.work_dir, "catalog.pdf")
+        write_catalog_pdf(cls.catalog_path, pages=3)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.work_dir)
+
+    def generator(self, mode):
+        generator = LearningPlanGenerator(
+            "localhost", "5000", "test_api_key", catalog_path=self.catalog_path,
+            cache_dir=os.path.join(self.work_dir, "cache"), catalog_load=mode,
+        )
+        self.addCleanup(lambda: generator.course_store.close())
+        return generator
+
+    def test_lazy_load_waits_for_first_use(self):
+        generator = self.generator("lazy")
+        self.assertIsNone(generator.catalog_load_seconds)
+
+        snippets = generator.search_catalog("machine learning")
+
+        self.assertTrue(snippets)
+        self.assertIsNotNone(generator.catalog_load_seconds)
+
+    def test_background_load_matches_eager_load(self):
+        background = self.generator("background")
+        eager = self.generator("eager")
+
+        self.assertGreaterEqual(background.wait_for_catalog(), 0.0)
+        self.assertEqual(background.catalog_text, eager.catalog_text)
+        self.assertEqual(background.page_offsets, eager.page_offsets)
+        self.assertEqual(len(background.course_store.get_all_courses()), len(eager.course_store.get_all_courses()))
+
+    def test_unknown_modes_fail_at_construction(self):
+        with self.assertRaises(ValueError):
+            LearningPlanGenerator("localhost", "5000", "test_api_key", catalog_path=self.catalog_path, catalog_load="sometimes")
+        with self.assertRaises(ValueError):
+            LearningPlanGenerator("localhost", "5000", "test_api_key", catalog_path=self.catalog_path, retriever="grep")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+"""Tests for the load-test stub server, driven through the real LLM clients."""
+
+import asyncio
+import unittest
+
+from loadtest.stub_server import MODEL_NAME, StubServer, StubSettings
+from src.recommender.llm_client import AsyncLLMClient, LLMClient, LLMClientPool
+from src.recommender.response_cache import ResponseCache
+
+
+class TestStubServer(unittest.TestCase):
+    """Test cases for the OpenAI-compatible stub endpoints."""
+
+    def setUp(self):
+        self.server = StubServer(("127.0.0.1", 0), StubSettings(first_token_ms=1, tokens_per_second=0, completion_tokens=12))
+        self.server.start_background()
+        self.pool = LLMClientPool()
+
+    def tearDown(self):
+        self.pool.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def client(self):
+        return LLMClient("127.0.0.1", self.server.port, "test_api_key", pool=self.pool, cache=ResponseCache())
+
+    def test_chat_completion(self):
+        client = self.client()
+
+        response = client.query_llm("What should I take before Deep Learning?", bypass_cache=True)
+
+        self.assertEqual(client.model_name, MODEL_NAME)
+        self.assertTrue(response["content"])
+        stats = self.server.stats.snapshot()
+        self.assertEqual(stats["requests"], 1)
+        self.assertEqual(stats["completion_tokens"], 12)
+
+    def test_streaming_matches_non_streaming(self):
+        client = self.client()
+
+        streamed = "".join(client.query_llm_stream("Plan please", bypass_cache=True))
+        response = client.query_llm("Plan please", bypass_cache=True)
+
+        self.assertEqual(streamed.split(), response["content"].split())
+        self.assertEqual(self.server.stats.snapshot()["streamed_requests"], 1)
+
+    def test_pooled_clients_reuse_connections(self):
+        for _ in range(5):
+            self.client().query_llm("Same endpoint", bypass_cache=True)
+
+        stats = self.server.stats.snapshot()
+        self.assertEqual(stats["requests"], 5)
+        self.assertEqual(stats["connections_opened"], 1)
+
+    def test_async_client_and_injected_errors(self):
+        self.server.settings.error_rate = 1.0
+
+        async def query():
+            client = AsyncLLMClient("127.0.0.1", self.server.port, "test_api_key", model_name=MODEL_NAME, cache=ResponseCache())
+            client.client = client.client.with_options(max_retries=0)
+            try:
+                return await client.query_llm("This will fail", bypass_cache=True)
+            finally:
+                await client.close()
+
+        with self.assertRaises(Exception):
+            asyncio.run(query())
+        self.assertEqual(self.server.stats.snapshot()["errors"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
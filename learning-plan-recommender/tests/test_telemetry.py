@@ -0,0 +1,203 @@
+"""Tests for per-request tracing, token accounting and metrics export."""
+
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import urllib.request
+from unittest.mock import patch
+
+from loadtest.stub_server import MODEL_NAME, StubServer, StubSettings
+from src.recommender.llm_client import LLMClient, LLMClientPool
+from src.recommender.pipeline import Stage, StagePipeline
+from src.recommender.response_cache import ResponseCache
+from src.recommender.telemetry import (
+    METRICS, MetricsRegistry, current_trace, maybe_profile, profile_label, record_llm_usage, serve_metrics, span,
+    tracing,
+)
+
+
+class TestTracing(unittest.TestCase):
+    """Test cases for traces and spans."""
+
+    def setUp(self):
+        METRICS.reset()
+
+    def test_spans_nest_and_record_attributes(self):
+        with tracing("request", target_course="Deep Learning") as trace:
+            with span("outer") as outer:
+                with span("inner") as inner:
+                    inner.set(snippets=3)
+                outer.set(done=True)
+
+        spans = {s["name"]: s for s in trace.to_dict()["spans"]}
+        self.assertEqual(spans["inner"]["parent_id"], spans["outer"]["span_id"])
+        self.assertIsNone(spans["outer"]["parent_id"])
+        self.assertEqual(spans["inner"]["attributes"], {"snippets": 3})
+        self.assertGreaterEqual(trace.duration, spans["outer"]["duration"])
+        self.assertIsNone(current_trace())
+
+    def test_pipeline_stages_become_spans_across_tasks_and_threads(self):
+        async def fetch():
+            await asyncio.sleep(0)
+            return 1
+
+        def compute(fetch):
+            with span("work"):
+                return fetch + 1
+
+        async def run():
+            with tracing("request") as trace:
+                await StagePipeline([Stage("fetch", fetch), Stage("compute", compute, ["fetch"])]).run()
+            return trace
+
+        trace = asyncio.run(run())
+
+        spans = {s["name"]: s for s in trace.to_dict()["spans"]}
+        self.assertEqual(set(spans), {"stage:fetch", "stage:compute", "work"})
+        self.assertEqual(spans["work"]["parent_id"], spans["stage:compute"]["span_id"])
+        stage_histograms = [h for h in METRICS.to_dict()["histograms"] if h["name"] == "stage_duration_seconds"]
+        self.assertEqual(len(stage_histograms), 2)
+
+    def test_nested_tracing_joins_outer_trace(self):
+        with tracing("batch") as outer:
+            with tracing("generate_plan") as inner:
+                pass
+        self.assertIs(inner, outer)
+        self.assertEqual([s["name"] for s in outer.to_dict()["spans"]], ["generate_plan"])
+
+    def test_errors_are_recorded_on_the_span(self):
+        with tracing("request") as trace:
+            with self.assertRaises(KeyError):
+                with span("lookup"):
+                    raise KeyError("missing")
+        self.assertEqual(trace.spans[0].attributes["error"], "KeyError")
+
+    def test_span_outside_trace_still_feeds_metric(self):
+        with span("orphan", metric="orphan_seconds") as s:
+            s.set(ignored=True)
+        self.assertEqual(METRICS.to_dict()["histograms"][0]["count"], 1)
+
+
+class TestUsageAndMetrics(unittest.TestCase):
+    """Test cases for token accounting and metric export."""
+
+    def setUp(self):
+        METRICS.reset()
+
+    def test_record_llm_usage_prefers_server_usage(self):
+        class Usage:
+            prompt_tokens = 120
+            completion_tokens = 40
+
+        with tracing("request") as trace:
+            with span("llm_call") as call:
+                record_llm_usage(Usage(), prompt_tokens=999, completion_tokens=999)
+            record_llm_usage(cached=True)
+            record_llm_usage(prompt_tokens=10, completion_tokens=5)
+
+        self.assertEqual(trace.totals, {"llm_calls": 3, "cache_hits": 1, "prompt_tokens": 130, "completion_tokens": 45})
+        self.assertEqual(call.attributes["usage_source"], "server")
+        self.assertIn('llm_requests_total{cached="true"} 1', METRICS.render_prometheus())
+
+    def test_prometheus_histogram_and_gauges(self):
+        registry = MetricsRegistry(buckets=(0.1, 1.0))
+        registry.observe("latency_seconds", 0.5, stage="gap_analysis")
+        registry.observe("latency_seconds", 2.0, stage="gap_analysis")
+        registry.register_collector("cache", lambda: {"cache_hit_rate": 0.25})
+
+        text = registry.render_prometheus()
+
+        self.assertIn("# TYPE latency_seconds histogram", text)
+        self.assertIn('latency_seconds_bucket{stage="gap_analysis",le="0.1"} 0', text)
+        self.assertIn('latency_seconds_bucket{stage="gap_analysis",le="1.0"} 1', text)
+        self.assertIn('latency_seconds_bucket{stage="gap_analysis",le="+Inf"} 2', text)
+        self.assertIn('latency_seconds_sum{stage="gap_analysis"} 2.5', text)
+        self.assertIn("cache_hit_rate 0.25", text)
+
+    def test_prometheus_label_values_are_escaped(self):
+        registry = MetricsRegistry()
+        registry.inc("llm_errors_total", error='Bad "model"\\path\nline two')
+
+        text = registry.render_prometheus()
+
+        self.assertIn('llm_errors_total{error="Bad \\"model\\"\\\\path\\nline two"} 1', text)
+
+    def test_metrics_endpoint(self):
+        METRICS.inc("catalog_retrievals_total")
+        server = serve_metrics(0)
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}"
+            with urllib.request.urlopen(f"{url}/metrics", timeout=5) as response:
+                text = response.read().decode("utf-8")
+            with urllib.request.urlopen(f"{url}/metrics.json", timeout=5) as response:
+                snapshot = json.loads(response.read())
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertIn("catalog_retrievals_total 1", text)
+        self.assertEqual(snapshot["counters"][0]["name"], "catalog_retrievals_total")
+
+    def test_maybe_profile_writes_sampled_profile(self):
+        output_dir = tempfile.mkdtemp()
+        try:
+            with maybe_profile(0.0, output_dir, "skipped") as path:
+                self.assertIsNone(path)
+            with maybe_profile(1.0, output_dir, "sampled") as path:
+                sum(range(1000))
+            self.assertTrue(os.path.exists(path))
+            self.assertEqual(os.listdir(output_dir), ["sampled.prof"])
+        finally:
+            shutil.rmtree(output_dir)
+
+    def test_profile_labels_are_unique_within_a_second(self):
+        labels = {profile_label("generate_plan") for _ in range(100)}
+
+        self.assertEqual(len(labels), 100)
+        self.assertTrue(all(label.startswith("generate_plan_") for label in labels))
+
+
+class TestLLMClientUsage(unittest.TestCase):
+    """Token counts of real LLM calls end up in the trace."""
+
+    def setUp(self):
+        METRICS.reset()
+        self.server = StubServer(("127.0.0.1", 0), StubSettings(first_token_ms=1, tokens_per_second=0, completion_tokens=12))
+        self.server.start_background()
+        self.pool = LLMClientPool()
+
+    def tearDown(self):
+        self.pool.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_llm_calls_and_cache_hits_are_counted(self):
+        client = LLMClient("127.0.0.1", self.server.port, "test_api_key", pool=self.pool, cache=ResponseCache())
+
+        with tracing("request") as trace:
+            client.query_llm("What should I take before Deep Learning?")
+            client.query_llm("What should I take before Deep Learning?")
+            "".join(client.query_llm_stream("Stream a plan", bypass_cache=True))
+
+        self.assertEqual(client.model_name, MODEL_NAME)
+        self.assertEqual(trace.totals["llm_calls"], 3)
+        self.assertEqual(trace.totals["cache_hits"], 1)
+        self.assertGreaterEqual(trace.totals["completion_tokens"], 12)
+        calls = [s for s in trace.spans if s.name == "llm_call"]
+        self.assertEqual([s.attributes["mode"] for s in calls], ["sync", "stream"])
+        self.assertEqual(calls[0].attributes["usage_source"], "server")
+        self.assertIn("first_token_seconds", calls[1].attributes)
+
+    def test_tokens_are_counted_locally_only_without_server_usage(self):
+        client = LLMClient("127.0.0.1", self.server.port, "test_api_key", pool=self.pool, cache=ResponseCache())
+
+        with patch("src.recommender.llm_client.count_tokens") as count_tokens:
+            client.query_llm("What should I take before Deep Learning?", bypass_cache=True)
+
+        count_tokens.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
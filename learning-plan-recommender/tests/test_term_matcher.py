@@ -0,0 +1,97 @@
+"""Tests for single-pass key-term extraction and catalog retrieval."""
+
+import os
+import random
+import re
+import tempfile
+import unittest
+
+import fitz
+
+from src.recommender.plan_generator_rag import LearningPlanGenerator
+from src.recommender.term_matcher import (
+    EDUCATIONAL_TOPICS, TermMatcher, course_code_patterns, extract_key_terms
+)
+
+
+CATALOG_PAGES = [
+    "School of Engineering\nCourse Descriptions\n",
+    "CSCI 443. Advanced Data Science. Advanced topics in data science.\n"
+    "CSCI 632. Machine Learning. Algorithms that learn from data.\nPrerequisite: CSCI 443.\n",
+    "ENGR 691. Deep Learning Methods. Neural networks and deep learning for graduates.\n"
+    "Prerequisite: CSCI 632.\n",
+]
+
+
+class TestTermMatcher(unittest.TestCase):
+    """Test cases for the Aho-Corasick term matcher."""
+
+    def test_matches_agree_with_regex_scan(self):
+        terms = ["ab", "abc", "bc", "b", "cab", "a b"]
+        matcher = TermMatcher(terms)
+        rng = random.Random(3)
+        for _ in range(300):
+            text = "".join(rng.choice("abc  ") for _ in range(rng.randint(0, 30)))
+            expected = {
+                (m.start(), m.start() + len(term), term)
+                for term in terms
+                for m in re.finditer(r"(?<![a-z0-9])(?=" + re.escape(term) + r"(?![a-z0-9]))", text)
+            }
+            self.assertEqual(set(matcher.find_all(text)), expected)
+
+    def test_case_whitespace_and_word_boundaries(self):
+        matcher = TermMatcher(EDUCATIONAL_TOPICS)
+
+        terms = matcher.terms_in("Needs Machine\nLearning and PROGRAMMING, not programmingx or neural networks")
+
+        self.assertEqual(terms, ["machine learning", "programming", "neural networks", "networks"])
+
+    def test_extract_key_terms(self):
+        patterns = {topic: topic for topic in EDUCATIONAL_TOPICS}
+        patterns.update(course_code_patterns(["Csci 632"]))
+        matcher = TermMatcher(patterns)
+
+        terms = extract_key_terms("Take csci632 first, then MATH 240, not Room 101. Then machine learning.", matcher)
+
+        self.assertEqual(terms, ["CSCI 632", "machine learning", "MATH 240"])
+
+
+class TestCatalogRetrieval(unittest.TestCase):
+    """Test cases for batched catalog retrieval in the RAG generator."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        catalog_path = os.path.join(self.tmp_dir.name, "catalog.pdf")
+        document = fitz.open()
+        for page_text in CATALOG_PAGES:
+            document.new_page().insert_text((72, 72), page_text, fontsize=9)
+        document.save(catalog_path)
+        document.close()
+        self.generator = LearningPlanGenerator(
+            "localhost", "5000", "test_api_key", catalog_path=catalog_path, cache_dir=self.tmp_dir.name
+        )
+
+    def tearDown(self):
+        self.generator.course_store.close()
+        self.tmp_dir.cleanup()
+
+    def test_retrieve_catalog_information(self):
+        gap_analysis = "- Missing machine learning background (Csci 632 covers it)\n- Review csci443 first"
+
+        catalog_data = self.generator._retrieve_catalog_information(gap_analysis, "Deep Learning Methods")
+
+        self.assertIn("Catalog Course Records:", catalog_data)
+        self.assertIn("CSCI 632 | Machine Learning", catalog_data)
+        self.assertIn("CSCI 443 | Advanced Data Science", catalog_data)
+
+    def test_batch_search_matches_single_search(self):
+        queries = ["machine learning", "neural networks"]
+
+        batched = self.generator.search_catalog_batch(queries, context_size=20, top_k=2)
+
+        self.assertEqual(batched, [self.generator.search_catalog(q, context_size=20, top_k=2) for q in queries])
+        self.assertIn("Machine Learning", batched[0][0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+"""Tests for the long-lived NDJSON worker."""
+
+import asyncio
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from benchmarks.synthetic_catalog import write_catalog_pdf
+from loadtest.stub_server import StubServer, StubSettings
+from src.recommender.response_cache import ResponseCache
+from src.recommender.worker import PlanWorker
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestPlanWorker(unittest.TestCase):
+    """Test cases for the worker protocol against the stub LLM server."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.work_dir = tempfile.mkdtemp()
+        cls.catalog_path = os.path.join(cls.work_dir, "catalog.pdf")
+        write_catalog_pdf(cls.catalog_path, pages=3)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.work_dir)
+
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.cache_dir = cache_dir.name
+        self.server = StubServer(("127.0.0.1", 0), StubSettings(first_token_ms=1, tokens_per_second=0, completion_tokens=20))
+        self.server.start_background()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def serve(self, requests):
+        """Run a worker over the given request objects and return its output messages."""
+        lines = []
+        worker = PlanWorker(
+            lines.append, "127.0.0.1", self.server.port, "test_api_key", catalog_path=self.catalog_path,
+            cache_dir=self.cache_dir, response_cache=ResponseCache(),
+        )
+        stdin = io.StringIO("".join(json.dumps(request) + "\n" for request in requests))
+        asyncio.run(worker.serve(stdin))
+        for generator in worker._generators.values():
+            if hasattr(generator, "course_store"):
+                generator.course_store.close()
+        return [json.loads(line) for line in lines]
+
+    def test_requests_are_answered_by_id(self):
+        messages = self.serve([
+            {"id": "a", "method": "query_llm", "params": {"message": "Plan please", "history": [], "bypass_cache": True}},
+            {"id": "b", "method": "ping"},
+            {"id": "c", "method": "nope"},
+            {"id": "d", "method": "query_llm", "params": {}},
+        ])
+        by_id = {message["id"]: message for message in messages}
+
+        self.assertEqual(len(messages), 4)
+        self.assertEqual(by_id["a"]["result"]["role"], "assistant")
+        self.assertTrue(by_id["a"]["result"]["content"])
+        self.assertEqual(by_id["b"]["result"], {"pong": True})
+        self.assertEqual(by_id["c"]["error"]["type"], "UnknownMethod")
+        self.assertEqual(by_id["d"]["error"]["type"], "ValueError")
+
+    def test_cancel_stops_a_request(self):
+        self.server.settings.first_token_ms = 1000
+        messages = self.serve([
+            {"id": "slow", "method": "query_llm", "params": {"message": "Plan please", "bypass_cache": True}},
+            {"id": "c", "method": "cancel", "params": {"id": "slow"}},
+            {"id": "d", "method": "cancel", "params": {"id": "missing"}},
+        ])
+        by_id = {message["id"]: message for message in messages}
+
+        self.assertEqual(by_id["slow"]["error"]["type"], "Cancelled")
+        self.assertEqual(by_id["c"]["result"], {"cancelled": True})
+        self.assertEqual(by_id["d"]["result"], {"cancelled": False})
+
+    def test_streamed_plan_reuses_one_generator(self):
+        student = {"prior_courses": ["CSCI 111"], "department": "Computer Science", "degree_level": "Graduate"}
+        messages = self.serve([
+            {"id": 1, "method": "generate_plan", "params": {"student": student, "target_course": "Deep Learning", "stream": True, "bypass_cache": True}},
+            {"id": 2, "method": "generate_plan", "params": {"student": student, "target_course": "Machine Learning", "bypass_cache": True}},
+        ])
+
+        chunks = [message["chunk"] for message in messages if message["id"] == 1 and "chunk" in message]
+        results = {message["id"]: message["result"] for message in messages if "result" in message}
+        self.assertTrue(chunks)
+        self.assertEqual("".join(chunks), results[1]["plan"])
+        self.assertTrue(results[2]["plan"])
+        # Four LLM calls per plan over the worker's pooled connections
+        self.assertEqual(self.server.stats.snapshot()["requests"], 8)
+
+    def test_subprocess_protocol(self):
+        process = subprocess.Popen(
+            [sys.executable, "-m", "src.recommender.worker", "--host", "127.0.0.1", "--port", str(self.server.port),
+             "--api-key", "test_api_key"],
+            cwd=PROJECT_DIR, env={**os.environ, "LLM_CACHE_ENABLED": "0", "RECOMMENDER_CACHE_DIR": self.cache_dir},
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+        )
+        try:
+            self.assertEqual(json.loads(process.stdout.readline()), {"event": "ready"})
+            for request_id in range(3):
+                request = {"id": request_id, "method": "query_llm", "params": {"message": f"Question {request_id}", "bypass_cache": True}}
+                process.stdin.write(json.dumps(request) + "\n")
+            process.stdin.write(json.dumps({"id": "s", "method": "shutdown"}) + "\n")
+            process.stdin.flush()
+            responses = [json.loads(line) for line in process.stdout]
+        finally:
+            process.stdin.close()
+            process.wait(timeout=30)
+
+        self.assertEqual(sorted(str(response["id"]) for response in responses), ["0", "1", "2", "s"])
+        self.assertEqual(process.returncode, 0)
+        self.assertEqual(self.server.stats.snapshot()["requests"], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()